@@ -0,0 +1,131 @@
+"""ネットワークに接続せずに GitHubBackend を動かすための、PyGithub の Repository のインメモリ実装。
+
+GitHub に送信されるはずだったリクエストの回数と、リクエストボディの大きさを記録します。
+"""
+from collections import Counter
+from typing import Dict, List, Optional
+import hashlib
+import json
+
+import github
+
+from dpy_github import util
+
+class FakeGitObject:
+    def __init__(self, sha: str):
+        self.sha = sha
+
+class FakeTreeEntry:
+    def __init__(self, path: str, type_: str, sha: str):
+        self.path = path
+        self.type = type_
+        self.sha = sha
+
+class FakeGitTree(FakeGitObject):
+    def __init__(self, sha: str, blobs: Dict[str, str]):
+        super().__init__(sha)
+        self.blobs = blobs
+        self.raw_data = {"sha": sha, "truncated": False}
+
+    @property
+    def tree(self) -> List[FakeTreeEntry]:
+        return [FakeTreeEntry(path, "blob", sha) for path, sha in self.blobs.items()]
+
+class FakeGitCommit(FakeGitObject):
+    def __init__(self, sha: str, tree: FakeGitTree, parents: List["FakeGitCommit"]):
+        super().__init__(sha)
+        self.tree = tree
+        self.parents = parents
+
+class FakeGitRef:
+    def __init__(self, repository: "FakeRepository", ref: str, sha: str):
+        self.repository = repository
+        self.ref = ref
+        self.object = FakeGitObject(sha)
+
+    def edit(self, sha: str, force=False):
+        self.repository.count("PATCH git/refs", {"sha": sha, "force": force})
+        self.object = FakeGitObject(sha)
+        self.repository.refs[self.ref] = sha
+
+class FakeRepository:
+    """GitHubBackend が利用する github.Repository のメソッドのみを実装した偽物。
+    """
+
+    def __init__(self, name="benchmark"):
+        self.name = name
+        self.html_url = f"https://github.com/benchmark/{name}"
+        self.blobs: Dict[str, bytes] = {}
+        self.trees: Dict[str, FakeGitTree] = {}
+        self.commits: Dict[str, FakeGitCommit] = {}
+        self.refs: Dict[str, str] = {}
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.requests: Counter = Counter()
+        self.bytes_sent = 0
+
+    @property
+    def request_count(self) -> int:
+        return sum(self.requests.values())
+
+    def count(self, endpoint: str, payload=None):
+        self.requests[endpoint] += 1
+        if payload is not None:
+            self.bytes_sent += len(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+    def get_git_ref(self, ref: str) -> FakeGitRef:
+        self.count("GET git/ref")
+        if ref not in self.refs:
+            raise github.UnknownObjectException(404, {"message": "Not Found"})
+        return FakeGitRef(self, ref, self.refs[ref])
+
+    def create_git_ref(self, ref: str, sha: str) -> FakeGitRef:
+        self.count("POST git/refs", {"ref": ref, "sha": sha})
+        ref = ref[len("refs/"):]
+        self.refs[ref] = sha
+        return FakeGitRef(self, ref, sha)
+
+    def get_git_commit(self, sha: str) -> FakeGitCommit:
+        self.count("GET git/commits")
+        return self.commits[sha]
+
+    def get_git_tree(self, sha: str, recursive=False) -> FakeGitTree:
+        self.count("GET git/trees")
+        return self.trees[sha]
+
+    def create_git_blob(self, content: str, encoding: str) -> FakeGitObject:
+        self.count("POST git/blobs", {"content": content, "encoding": encoding})
+        sha = util.git_blob_sha(content)
+        self.blobs[sha] = content.encode("utf-8") if isinstance(content, str) else content
+        return FakeGitObject(sha)
+
+    def create_git_tree(self, tree: List[github.InputGitTreeElement], base_tree: Optional[FakeGitTree]=None) -> FakeGitTree:
+        identities = [util.tree_element_identity(element) for element in tree]
+        payload = {"tree": identities}
+        if base_tree is not None:
+            payload["base_tree"] = base_tree.sha
+        self.count("POST git/trees", payload)
+
+        blobs = dict(base_tree.blobs) if base_tree is not None else {}
+        for identity in identities:
+            if "content" in identity:
+                content = identity["content"].encode("utf-8")
+                sha = util.git_blob_sha(content)
+                self.blobs[sha] = content
+                blobs[identity["path"]] = sha
+            elif identity["sha"] is None:
+                blobs.pop(identity["path"], None)
+            else:
+                blobs[identity["path"]] = identity["sha"]
+
+        sha = hashlib.sha1(json.dumps(sorted(blobs.items())).encode("utf-8")).hexdigest()
+        self.trees[sha] = FakeGitTree(sha, blobs)
+        return self.trees[sha]
+
+    def create_git_commit(self, message: str, tree: FakeGitTree, parents: List[FakeGitCommit]) -> FakeGitCommit:
+        payload = {"message": message, "tree": tree.sha, "parents": [parent.sha for parent in parents]}
+        self.count("POST git/commits", payload)
+        sha = hashlib.sha1(json.dumps(payload).encode("utf-8")).hexdigest()
+        self.commits[sha] = FakeGitCommit(sha, tree, parents)
+        return self.commits[sha]
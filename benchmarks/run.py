@@ -0,0 +1,124 @@
+"""合成したサーバーに対して、フォーマット・目次の作成・ツリーの作成・push の各段階を計測します。
+
+    python -m benchmarks.run --members 100000 --channels 2000 --roles 300 --pushes 2 --incremental
+
+GitHub へのリクエストは benchmarks.fake_github.FakeRepository が受け取り、回数と送信量を数えます。
+"""
+from typing import Callable, Dict
+import argparse
+import json
+import time
+import tracemalloc
+
+from dpy_github import util
+from dpy_github.create_elements import DefaultTreeCreator
+from dpy_github.main import Reporter
+from dpy_github.parallel import ParallelRenderer
+from dpy_github.render_cache import RenderCache
+from dpy_github.storage import GitHubBackend
+
+from . import synthetic
+from .fake_github import FakeRepository
+
+def measure(name: str, results: Dict[str, dict], func: Callable, trace_memory: bool):
+    """func を実行し、経過時間と（trace_memory が有効なら）メモリ使用量のピークを results に記録します。
+    """
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    value = func()
+    elapsed = time.perf_counter() - start
+    result = {"seconds": round(elapsed, 4)}
+    if trace_memory:
+        result["peak_mib"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+        tracemalloc.stop()
+    results[name] = result
+    return value
+
+def format_all(reporter: Reporter) -> int:
+    """全てのオブジェクトをフォーマットし、シリアライズされたバイト数を返します。
+    """
+    formatter = reporter.element_creator.formatter
+    guild = reporter.guild
+    total = 0
+    for channel in guild.channels:
+        total += len(formatter.format_channel(channel).encode("utf-8"))
+    for role in guild.roles:
+        total += len(formatter.format_role(role).encode("utf-8"))
+    for member in guild.members:
+        total += len(formatter.format_member(member).encode("utf-8"))
+    total += len(formatter.format_guild(guild).encode("utf-8"))
+    return total
+
+def run(args) -> dict:
+    results: Dict[str, dict] = {}
+    guild = measure("generate_guild", results, lambda: synthetic.create_guild(
+        members=args.members, channels=args.channels, roles=args.roles,
+        overwrites_per_channel=args.overwrites, seed=args.seed
+    ), args.trace_memory)
+
+    repository = FakeRepository()
+    cache = RenderCache() if args.render_cache else None
+    renderer = ParallelRenderer(max_workers=args.workers) if args.workers else None
+    element_creator = DefaultTreeCreator(shard_digits=args.shard_digits, render_cache=cache, renderer=renderer)
+    reporter = Reporter(guild, None, None, element_creator=element_creator,
+        backend=GitHubBackend(repository, upload_workers=args.upload_workers, max_tree_entries=args.max_tree_entries),
+        incremental=args.incremental)
+
+    serialized = measure("format", results, lambda: format_all(reporter), args.trace_memory)
+    results["format"]["bytes_serialized"] = serialized
+
+    index = measure("index", results, lambda: reporter.create_index_content(
+        util.sort_category_position(guild.by_category()), guild.members, guild.roles
+    ), args.trace_memory)
+    results["index"]["bytes_serialized"] = len(index.encode("utf-8"))
+
+    measure("create_tree_elements", results, reporter.create_tree_elements, args.trace_memory)
+    if cache is not None:
+        cache.hits = cache.misses = 0
+
+    for number in range(1, args.pushes + 1):
+        repository.reset_counters()
+        name = f"push_{number}"
+        measure(name, results, lambda: reporter.push(f"benchmark {number}"), args.trace_memory)
+        results[name]["api_requests"] = repository.request_count
+        results[name]["bytes_uploaded"] = repository.bytes_sent
+        results[name]["requests_by_endpoint"] = dict(repository.requests)
+        results[name]["phases"] = {phase: round(seconds, 4) for phase, seconds in reporter.last_metrics.phases.items()}
+        if cache is not None:
+            results[name]["render_cache_hits"] = cache.hits
+            cache.hits = cache.misses = 0
+
+    if renderer is not None:
+        renderer.shutdown()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=10000)
+    parser.add_argument("--channels", type=int, default=1000)
+    parser.add_argument("--roles", type=int, default=200)
+    parser.add_argument("--overwrites", type=int, default=8, help="チャンネルごとの権限上書きの数")
+    parser.add_argument("--pushes", type=int, default=2, help="続けて行う push の回数")
+    parser.add_argument("--incremental", action="store_true")
+    parser.add_argument("--shard-digits", type=int, default=0, help="メンバーのファイルを分けるIDの末尾の桁数")
+    parser.add_argument("--render-cache", action="store_true", help="整形結果をキャッシュし、変更のないオブジェクトの整形を省略します")
+    parser.add_argument("--workers", type=int, default=0, help="0より大きければ、この数のプロセスで並列に整形します")
+    parser.add_argument("--upload-workers", type=int, default=4, help="blobを並行してアップロードするスレッド数")
+    parser.add_argument("--max-tree-entries", type=int, default=2000, help="1回のツリー作成リクエストに含める要素数の上限")
+    parser.add_argument("--trace-memory", action="store_true", help="tracemalloc でメモリ使用量のピークを計測します（遅くなります）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力します")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+
+    for name, result in results.items():
+        details = ", ".join(f"{key}={value}" for key, value in result.items() if key != "seconds")
+        print(f"{name:<24} {result['seconds']:>10.4f}s  {details}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""ベンチマーク用に、任意の規模の discord.Guild を生成します。
+
+ゲートウェイから受け取るのと同じ形式のペイロードを作成し、discord.py 自身に discord.Guild を組み立てさせるため、
+フォーマッターからは実際のサーバーと区別できません。
+"""
+import asyncio
+import random
+
+import discord
+from discord.state import ConnectionState
+
+SNOWFLAKE_BASE = 700000000000000000
+
+# 実際のサーバーと同様に、権限上書きの組み合わせは少数のパターンの使い回しになります。
+OVERWRITE_PATTERNS = [
+    (1024, 0),
+    (0, 1024),
+    (1024 | 2048, 0),
+    (0, 2048),
+    (1024, 2048 | 64),
+    (3072 | 65536, 8192),
+    (0, 0x7FFFFFFF & ~8),
+    (1049600, 0),
+]
+
+def snowflake(index: int) -> int:
+    # 下位22ビット（ワーカーID・連番）にも値を入れ、実際のIDと同様に末尾の桁を分散させます。
+    return SNOWFLAKE_BASE + (index << 22) + (index * 7919) % 4194304
+
+def create_state() -> ConnectionState:
+    """ネットワークに接続しない ConnectionState を作成します。
+    """
+    return ConnectionState(
+        dispatch=lambda *args, **kwargs: None, handlers={}, hooks={}, syncer=None, http=None,
+        loop=asyncio.new_event_loop(), intents=discord.Intents.all()
+    )
+
+def create_guild_payload(members=10000, channels=1000, roles=200, categories=None,
+    overwrites_per_channel=8, roles_per_member=3, seed=0) -> dict:
+    """GUILD_CREATE と同じ形式のペイロードを作成します。
+
+    Args:
+        members (int, optional): メンバー数。 Defaults to 10000.
+        channels (int, optional): カテゴリーを除くチャンネル数。 Defaults to 1000.
+        roles (int, optional): @everyone を除くロール数。 Defaults to 200.
+        categories (int, optional): カテゴリー数。省略した場合は channels の10分の1。
+        overwrites_per_channel (int, optional): チャンネルごとの権限上書きの数。 Defaults to 8.
+        roles_per_member (int, optional): メンバーごとのロール数。 Defaults to 3.
+        seed (int, optional): 乱数のシード。 Defaults to 0.
+    """
+    rng = random.Random(seed)
+    if categories is None:
+        categories = max(channels // 10, 1)
+    guild_id = snowflake(0)
+    counter = iter(range(1, 10 ** 9))
+
+    role_payloads = [{
+        "id": str(guild_id), "name": "@everyone", "permissions": "104324673", "position": 0,
+        "color": 0, "hoist": False, "mentionable": False, "managed": False
+    }]
+    role_ids = []
+    for position in range(1, roles + 1):
+        role_id = snowflake(next(counter))
+        role_ids.append(role_id)
+        role_payloads.append({
+            "id": str(role_id), "name": f"role-{position}", "permissions": str(rng.getrandbits(31)),
+            "position": position, "color": rng.getrandbits(24), "hoist": rng.random() < 0.2,
+            "mentionable": rng.random() < 0.5, "managed": False
+        })
+
+    member_ids = [snowflake(next(counter)) for _ in range(members)]
+    member_payloads = [{
+        "user": {"id": str(member_id), "username": f"user-{index}", "discriminator": f"{index % 10000:04d}", "avatar": None},
+        "roles": [str(role_id) for role_id in rng.sample(role_ids, min(roles_per_member, len(role_ids)))],
+        "nick": f"nick-{index}" if rng.random() < 0.3 else None,
+        "joined_at": "2020-01-01T00:00:00+00:00"
+    } for index, member_id in enumerate(member_ids)]
+
+    def overwrites():
+        result = []
+        for role_id in rng.sample(role_ids, min(overwrites_per_channel, len(role_ids))):
+            allow, deny = rng.choice(OVERWRITE_PATTERNS)
+            result.append({"id": str(role_id), "type": "role", "allow_new": str(allow), "deny_new": str(deny)})
+        if member_ids and rng.random() < 0.1:
+            allow, deny = rng.choice(OVERWRITE_PATTERNS)
+            result.append({"id": str(rng.choice(member_ids)), "type": "member", "allow_new": str(allow), "deny_new": str(deny)})
+        return result
+
+    channel_payloads = []
+    category_ids = []
+    for position in range(categories):
+        category_id = snowflake(next(counter))
+        category_ids.append(category_id)
+        channel_payloads.append({
+            "id": str(category_id), "type": 4, "name": f"category-{position}", "position": position,
+            "nsfw": False, "permission_overwrites": overwrites()
+        })
+    for position in range(channels):
+        channel_id = snowflake(next(counter))
+        payload = {
+            "id": str(channel_id), "name": f"channel-{position}", "position": position,
+            "parent_id": str(rng.choice(category_ids)) if rng.random() < 0.9 else None,
+            "permission_overwrites": overwrites()
+        }
+        if rng.random() < 0.7:
+            payload.update(type=0, topic=f"topic of channel {position}", nsfw=rng.random() < 0.05,
+                rate_limit_per_user=rng.choice([0, 0, 0, 5, 30]))
+        else:
+            payload.update(type=2, bitrate=64000, user_limit=rng.choice([0, 0, 10, 25]))
+        channel_payloads.append(payload)
+
+    return {
+        "id": str(guild_id), "name": "synthetic guild", "region": "japan", "verification_level": 2,
+        "default_message_notifications": 1, "explicit_content_filter": 1, "afk_timeout": 300,
+        "roles": role_payloads, "channels": channel_payloads, "members": member_payloads,
+        "owner_id": str(member_ids[0]) if member_ids else None, "mfa_level": 1, "emojis": [], "features": [],
+        "member_count": members, "premium_tier": 2, "premium_subscription_count": 14
+    }
+
+def create_guild(**kwargs) -> discord.Guild:
+    """create_guild_payload と同じ引数を受け取り、discord.Guild を作成します。
+    """
+    return discord.Guild(data=create_guild_payload(**kwargs), state=create_state())
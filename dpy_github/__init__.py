@@ -8,6 +8,67 @@ from .format_model import (
   DefaultFormatter
 )
 
+from .storage import (
+  StorageBackend,
+  GitHubBackend,
+  LocalGitBackend
+)
+
 from .main import (
+  BaseReporter,
   Reporter
 )
+
+from .async_main import (
+  AsyncReporter
+)
+
+from .cog import (
+  SnapshotCog
+)
+
+from .pool import (
+  ReporterPool
+)
+
+from .render_cache import (
+  RenderCache
+)
+
+from .parallel import (
+  ParallelRenderer
+)
+
+from .snapshot import (
+  GuildSnapshot
+)
+
+from .diff import (
+  Change,
+  Changeset
+)
+
+from .manifest import (
+  Manifest
+)
+
+from .metrics import (
+  PushMetrics
+)
+
+from .clients import (
+  ClientCache
+)
+
+from .history import (
+  History
+)
+
+from .restore import (
+  RestorePlan,
+  RestoreExecutor
+)
+
+from .checkpoint import (
+  Checkpoint
+)
@@ -0,0 +1,448 @@
+from typing import Iterable, List, Dict, Optional, Set
+import asyncio
+import base64
+import json
+
+import aiohttp
+import github
+import discord
+
+from . import util
+from . import create_elements
+from . import clients
+from . import manifest
+from . import history
+from . import metrics
+from . import snapshot
+from .main import BaseReporter
+
+class AsyncReporter(BaseReporter):
+    """Discordサーバーの情報を、イベントループを止めずにGitHubに記録する起点。
+    Reporter と同じツリー構成を、aiohttp による非同期のHTTPリクエストで作成します。
+    """
+
+    api_url = "https://api.github.com"
+
+    def __init__(self, guild: discord.Guild, github_token: str, repository_name:str,
+        branch_name:str="main", element_creator:create_elements.GitTreeElementCreator=None, allow_new_repository=False,
+        incremental=False, max_concurrency=8, render_batch_size=500, session:aiohttp.ClientSession=None, locale="ja",
+        index_page_digits=0, max_tree_entries=2000, manifest: Optional[manifest.Manifest]=None,
+        client_cache: Optional[clients.ClientCache]=None, history: Optional[history.History]=None):
+        """コンストラクタではHTTPリクエストを行いません。リポジトリは最初の push() または create_git_tree() で解決されます。
+
+        Args:
+            guild (discord.Guild): 記録を行うサーバー。
+            github_token (str): GitHubアカウントのアクセストークン。
+            repository_name (str): リポジトリ名。
+            branch_name (str, optional): 記録を行うブランチ名. Defaults to "main".
+            element_creator (create_elements.GitTreeElementCreator, optional): GitTreeの生成を行うオブジェクト。 Defaults to None.
+            allow_new_repository (bool, optional): もし repository_name に該当するリポジトリが見つからなかったとき、Trueなら新規作成します。
+            incremental (bool, optional): Trueなら、ブランチの先頭のツリーと比較して追加・変更・削除されたファイルのみを送信します。 Defaults to False.
+            max_concurrency (int, optional): 同時に送信するblob・treeのリクエスト数の上限。 Defaults to 8.
+            render_batch_size (int, optional): この数の要素を作成するごとにイベントループへ制御を返します。 Defaults to 500.
+            session (aiohttp.ClientSession, optional): 利用するセッション。省略した場合は接続数を max_concurrency に制限したセッションを作成します。
+            locale (str, optional): 目次と、element_creator を省略した場合の各ファイルに利用する言語（"ja" または "en"）。 Defaults to "ja".
+            index_page_digits (int, optional): 0より大きければ、目次をチャンネル・ロール・メンバー（IDの末尾 index_page_digits 桁ごと）のページに分け、
+                index.md にはそれらへのリンクのみを載せます。メンバーの参加・脱退で差分が出るのは該当するページのみになります。 Defaults to 0.
+            max_tree_entries (int, optional): 1回のツリー作成リクエストに含める要素数の上限。
+                これを超える変更やディレクトリは、前のツリーを base_tree として順に作成します。 Defaults to 2000.
+            manifest (Optional[manifest.Manifest], optional): 記録したツリーのファイルの対応を保存する先。
+                ブランチの先頭が保存したコミットと一致すれば、先頭のコミットとリモートのツリーの取得を省略します。 Defaults to None.
+            client_cache (Optional[clients.ClientCache], optional): 解決済みのリポジトリを保持するキャッシュ。
+                省略した場合はプロセス全体で共有する clients.default_cache を利用します。
+            history (Optional[history.History], optional): push() で記録した変更をオブジェクトのID・属性ごとに保存する先。 Defaults to None.
+
+        Raises:
+            NotImplementedError: element_creator は create_elements.GitTreeElementCreator を実装している必要があります。
+            ValueError: 対応していない言語が指定されました。
+        """
+        super().__init__(guild, branch_name=branch_name, element_creator=element_creator, incremental=incremental,
+            locale=locale, index_page_digits=index_page_digits, manifest=manifest, history=history)
+        self.repository_name = repository_name
+        self.allow_new_repository = allow_new_repository
+        self.max_concurrency = max_concurrency
+        self.render_batch_size = render_batch_size
+        self.max_tree_entries = max_tree_entries
+        # リモートに存在することが分かっているblobのSHA。これらはアップロードを省略します。
+        self._known_blobs: Set[str] = set()
+
+        self._headers = {
+            "Authorization": f"token {github_token}",
+            "Accept": "application/vnd.github.v3+json"
+        }
+        self._session = session
+        self._owns_session = session is None
+        self._repository: Optional[dict] = None
+        self.client_cache = client_cache if client_cache is not None else clients.default_cache
+        self._repository_key = ("async_repository", clients.ClientCache.token_key(github_token), repository_name)
+        # 送信したリクエストの累計と、最後のレスポンスが示したレート制限の残り回数。
+        self.request_count = 0
+        # アップロードしたblobの内容のバイト数の累計。
+        self.bytes_uploaded = 0
+        self.rate_limit_remaining: Optional[int] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """このインスタンスが作成したセッションを閉じます。外部から渡されたセッションは閉じません。
+        """
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @property
+    def html_url(self) -> str:
+        if self._repository is None:
+            raise RuntimeError("リポジトリがまだ解決されていません。先に push() または create_git_tree() を呼び出してください。")
+        return self._repository["html_url"]
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def _request(self, method: str, path: str, payload: dict=None):
+        """GitHub REST APIにリクエストを送信し、レスポンスのJSONを返します。
+
+        Raises:
+            github.UnknownObjectException: 404が返された場合。
+            github.GithubException: その他のエラーが返された場合。
+        """
+        session = self._get_session()
+        self.request_count += 1
+        async with session.request(method, self.api_url + path, json=payload, headers=self._headers) as response:
+            remaining = response.headers.get("X-RateLimit-Remaining")
+            if remaining is not None:
+                self.rate_limit_remaining = int(remaining)
+            text = await response.text()
+            data = json.loads(text) if text else None
+            if response.status == 404:
+                raise github.UnknownObjectException(response.status, data)
+            if response.status >= 400:
+                raise github.GithubException(response.status, data)
+            return data
+
+    async def _get_repository(self) -> dict:
+        if self._repository is None:
+            self._repository = self.client_cache.get(self._repository_key)
+        if self._repository is None:
+            user = await self._request("GET", "/user")
+            try:
+                self._repository = await self._request("GET", f"/repos/{user['login']}/{self.repository_name}")
+            except github.UnknownObjectException:
+                if not self.allow_new_repository:
+                    raise ValueError(f"{self.repository_name} という名前のリポジトリは見つかりませんでした。")
+                self._repository = await self._request("POST", "/user/repos", {
+                    "name": self.repository_name, "auto_init": True
+                })
+            self.client_cache.put(self._repository_key, self._repository)
+        return self._repository
+
+    @property
+    def _repository_path(self) -> str:
+        return f"/repos/{self._repository['full_name']}"
+
+    async def _get_head_ref(self) -> Optional[dict]:
+        """ブランチの参照を返します。ブランチが存在しなければNoneを返します。
+        リポジトリが空の場合は、Git Data APIを利用できるよう最初のコミットを作成してから参照を返します。
+        """
+        ref_path = f"{self._repository_path}/git/ref/{self.ref_name}"
+        try:
+            return await self._request("GET", ref_path)
+        except github.UnknownObjectException:
+            return None
+        except github.GithubException as e:
+            # 空のリポジトリに対しては 409 Conflict が返されます。
+            if e.status != 409:
+                raise
+        readme = base64.b64encode(f"# {self.guild.name}\n".encode("utf-8")).decode("ascii")
+        await self._request("PUT", f"{self._repository_path}/contents/README.md", {
+            "message": "initial commit", "content": readme, "branch": self.branch_name
+        })
+        return await self._request("GET", ref_path)
+
+    async def _get_head_commit(self, ref: Optional[dict]=None) -> Optional[dict]:
+        if ref is None:
+            ref = await self._get_head_ref()
+            if ref is None:
+                return None
+        return await self._request("GET", f"{self._repository_path}/git/commits/{ref['object']['sha']}")
+
+    async def _resolve_head_commit(self, ref: Optional[dict]) -> Optional[dict]:
+        """ブランチの先頭のコミットを返します。 manifest に保存したコミットと一致すれば、取得せずに保存した内容から作成します。
+        """
+        if ref is None:
+            return None
+        if self.manifest is not None:
+            saved_head = self.manifest.head(self.html_url, self.branch_name)
+            if saved_head is not None and saved_head[0] == ref["object"]["sha"]:
+                return {"sha": saved_head[0], "tree": {"sha": saved_head[1]}}
+        return await self._get_head_commit(ref)
+
+    async def _get_base_blobs(self, head_commit: dict) -> Optional[Dict[str, str]]:
+        """head_commit のツリーのファイルのパスとblobのSHAの対応を、 manifest に保存されていればそこから、なければリモートから取得します。
+        """
+        if self.manifest is not None:
+            entry = self.manifest.get(self.html_url, self.branch_name, head_commit["sha"])
+            if entry is not None:
+                return entry.blobs
+        return await self._get_remote_blobs(head_commit["tree"]["sha"])
+
+    async def _get_remote_blobs(self, tree_sha: str) -> Optional[Dict[str, str]]:
+        remote_tree = await self._request("GET", f"{self._repository_path}/git/trees/{tree_sha}?recursive=1")
+        if remote_tree.get("truncated"):
+            return None
+        blobs = {
+            element["path"]: element["sha"]
+            for element in remote_tree["tree"] if element["type"] == "blob"
+        }
+        self._known_blobs.update(blobs.values())
+        return blobs
+
+    async def _create_tree_elements(self, guild_snapshot: Optional[snapshot.GuildSnapshot]=None,
+        push_metrics: Optional[metrics.PushMetrics]=None) -> List[github.InputGitTreeElement]:
+        """create_tree_elements と同じ要素を、イベントループを止めずに作成します。
+        element_creator がレコードに対応していれば、ループ上でスナップショットを写し取った後、整形は別のスレッドで行います。
+        そうでなければ、一定数ごとにイベントループへ制御を返しながら作成します。
+        """
+        if self.element_creator.supports_records:
+            if guild_snapshot is None:
+                guild_snapshot = self.capture_snapshot()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self.create_tree_elements, guild_snapshot, push_metrics)
+
+        elements = []
+        for element in self._iter_tree_elements(None, push_metrics):
+            elements.append(element)
+            if len(elements) % self.render_batch_size == 0:
+                await asyncio.sleep(0)
+        return elements
+
+    async def _upload_blobs(self, elements: List[github.InputGitTreeElement]) -> List[dict]:
+        """内容を持つ要素をblobとして並行してアップロードし、SHAを参照するツリーの要素に置き換えて返します。
+        リモートに存在するblobと、同じ内容の2つ目以降の要素はアップロードしません。
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        entries = []
+        pending: Dict[str, str] = {}
+        for element in elements:
+            identity = util.tree_element_identity(element)
+            if "content" in identity:
+                blob_sha = util.element_blob_sha(element)
+                if blob_sha not in self._known_blobs:
+                    pending.setdefault(blob_sha, identity["content"])
+                identity = {"path": identity["path"], "mode": identity["mode"], "type": identity["type"], "sha": blob_sha}
+            entries.append(identity)
+
+        async def upload(content: str):
+            self.bytes_uploaded += len(content.encode("utf-8"))
+            async with semaphore:
+                blob = await self._request("POST", f"{self._repository_path}/git/blobs", {
+                    "content": content, "encoding": "utf-8"
+                })
+            self._known_blobs.add(blob["sha"])
+
+        await asyncio.gather(*(upload(content) for content in pending.values()))
+        return entries
+
+    async def _create_chained_trees(self, entries: List[dict], base_tree_sha: str) -> str:
+        """entries を max_tree_entries 個ずつ、前に作成したツリーを base_tree として順に適用し、最後のツリーのSHAを返します。
+        """
+        tree_sha = base_tree_sha
+        for start in range(0, len(entries), self.max_tree_entries):
+            tree = await self._request("POST", f"{self._repository_path}/git/trees", {
+                "base_tree": tree_sha, "tree": entries[start:start + self.max_tree_entries]
+            })
+            tree_sha = tree["sha"]
+        return tree_sha
+
+    async def _create_nested_trees(self, entries: List[dict]) -> str:
+        """ディレクトリごとにツリーを作成し、ルートのツリーのSHAを返します。
+        同じ深さのディレクトリのツリーは並行して作成し、 max_tree_entries を超えるディレクトリは分割して作成します。
+        """
+        directories: Dict[str, List[dict]] = {"": []}
+        for entry in entries:
+            parent, _, name = entry["path"].rpartition("/")
+            directory = parent
+            while directory not in directories:
+                directories[directory] = []
+                directory = directory.rpartition("/")[0]
+            directories[parent].append(dict(entry, path=name))
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def create_tree(directory: str) -> str:
+            # 要素の多いディレクトリ（members/ 等）は1回のリクエストに収まらないため、
+            # max_tree_entries 個ずつ、前のツリーを base_tree として順に作成します。
+            directory_entries = directories[directory]
+            async with semaphore:
+                tree = await self._request("POST", f"{self._repository_path}/git/trees", {
+                    "tree": directory_entries[:self.max_tree_entries]
+                })
+                return await self._create_chained_trees(directory_entries[self.max_tree_entries:], tree["sha"])
+
+        depths = sorted({directory.count("/") + 1 for directory in directories if directory}, reverse=True)
+        for depth in depths:
+            level = [directory for directory in directories if directory and directory.count("/") + 1 == depth]
+            shas = await asyncio.gather(*(create_tree(directory) for directory in level))
+            for directory, sha in zip(level, shas):
+                parent, _, name = directory.rpartition("/")
+                directories[parent].append({"path": name, "mode": "040000", "type": "tree", "sha": sha})
+
+        return await create_tree("")
+
+    async def create_git_tree(self) -> str:
+        """element_creatorを利用してツリーを作成し、そのSHAを返します。
+
+        Returns:
+            str: 作成されたツリーのSHA。
+        """
+        await self._get_repository()
+        head_commit = await self._get_head_commit() if self.incremental else None
+        return await self._create_git_tree(head_commit)
+
+    async def _create_git_tree(self, head_commit: Optional[dict], guild_snapshot: Optional[snapshot.GuildSnapshot]=None) -> str:
+        return await self._create_tree_from_elements(await self._create_tree_elements(guild_snapshot), head_commit)
+
+    async def _create_tree_from_elements(self, elements: List[github.InputGitTreeElement], head_commit: Optional[dict],
+        push_metrics: Optional[metrics.PushMetrics]=None) -> str:
+        if push_metrics is None:
+            push_metrics = metrics.PushMetrics()
+        if self.incremental and head_commit is not None:
+            base_tree_sha = head_commit["tree"]["sha"]
+            with push_metrics.phase("base_tree"):
+                remote_blobs = await self._get_base_blobs(head_commit)
+            if remote_blobs is not None:
+                with push_metrics.phase("compare"):
+                    changed_elements = self._filter_changed_elements(elements, remote_blobs)
+                self._count_files(push_metrics, "changed", changed_elements)
+                if not changed_elements:
+                    return base_tree_sha
+                with push_metrics.phase("tree"):
+                    entries = await self._upload_blobs(changed_elements)
+                    return await self._create_chained_trees(entries, base_tree_sha)
+
+        self._count_files(push_metrics, "changed", elements)
+        with push_metrics.phase("tree"):
+            entries = await self._upload_blobs(elements)
+            return await self._create_nested_trees(entries)
+
+    async def push(self, commit_title="commit", skip_unchanged=False) -> str:
+        """GitHubに実際にサーバー情報を保存します。
+
+        Args:
+            commit_title (str, optional): コミットのタイトルです。 Defaults to "commit".
+            skip_unchanged (bool, optional): Trueなら、前回の push() から diff() で検出できる変更がない場合に、
+                APIへのリクエストを行わずに終了します。 Defaults to False.
+
+        Returns:
+            str: 編集を行ったリポジトリのGitHub上のURL。計測結果は last_metrics から参照できます。
+        """
+        push_metrics = metrics.PushMetrics()
+        requests_before, bytes_before = self.request_count, self.bytes_uploaded
+        with push_metrics.phase("snapshot"):
+            guild_snapshot = self.capture_snapshot()
+        if skip_unchanged and self._previous_snapshot(guild_snapshot.id) is not None and not self.diff(guild_snapshot):
+            push_metrics.increment("skipped")
+            self._finish_metrics(push_metrics, 0, self.rate_limit_remaining)
+            return self.html_url
+
+        with push_metrics.phase("head"):
+            repository = await self._get_repository()
+            ref = await self._get_head_ref()
+            head_commit = await self._resolve_head_commit(ref)
+
+        elements = await self._create_tree_elements(self._snapshot_for_elements(guild_snapshot), push_metrics)
+        self._count_files(push_metrics, "total", elements)
+        tree_sha = await self._create_tree_from_elements(elements, head_commit, push_metrics)
+        commit = await self._create_commit(commit_title, tree_sha, ref, head_commit, push_metrics)
+        # スナップショットの pickle とSQLiteへの書き込みは、イベントループを止めないよう別のスレッドで行います。
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._record_history, commit["sha"], guild_snapshot, push_metrics)
+        self.last_snapshot = guild_snapshot
+        if self.manifest is not None:
+            with push_metrics.phase("manifest"):
+                await loop.run_in_executor(None, lambda: self.manifest.save(
+                    repository["html_url"], self.branch_name, commit["sha"], tree_sha, self._element_blobs(elements)
+                ))
+        self._finish_metrics(push_metrics, self.request_count - requests_before, self.rate_limit_remaining,
+            self.bytes_uploaded - bytes_before)
+        return repository["html_url"]
+
+    async def push_elements(self, elements: List[github.InputGitTreeElement], commit_title="commit",
+        guild_snapshot: Optional[snapshot.GuildSnapshot]=None, object_ids: Optional[Iterable[int]]=None,
+        include_guild=False) -> str:
+        """ブランチの先頭のツリーに elements のみを適用したコミットを作成します。
+        ブランチが存在しない場合は、サーバー全体を push() で記録します。
+        history と last_snapshot の扱いは Reporter.push_elements と同じです。
+
+        Args:
+            elements (List[github.InputGitTreeElement]): 追加・変更・削除するファイルの要素。
+            commit_title (str, optional): コミットのタイトルです。 Defaults to "commit".
+            guild_snapshot (Optional[snapshot.GuildSnapshot], optional): elements を作成した時点のサーバーの状態。
+                省略した場合は capture_snapshot() の結果を利用します。
+            object_ids (Optional[Iterable[int]], optional): elements に反映したチャンネル・ロール・メンバーのID。削除したオブジェクトも含めます。
+                省略した場合は guild_snapshot の全体を記録したものとします。
+            include_guild (bool, optional): Trueなら elements にサーバー設定の変更も反映したものとします。 Defaults to False.
+
+        Returns:
+            str: 編集を行ったリポジトリのGitHub上のURL。計測結果は last_metrics から参照できます。
+        """
+        push_metrics = metrics.PushMetrics()
+        requests_before, bytes_before = self.request_count, self.bytes_uploaded
+        with push_metrics.phase("head"):
+            repository = await self._get_repository()
+            ref = await self._get_head_ref()
+            if ref is None:
+                return await self.push(commit_title)
+            head_commit = await self._resolve_head_commit(ref)
+        if guild_snapshot is None:
+            with push_metrics.phase("snapshot"):
+                guild_snapshot = self.capture_snapshot()
+
+        self._count_files(push_metrics, "changed", elements)
+        with push_metrics.phase("tree"):
+            entries = await self._upload_blobs(elements)
+            tree_sha = await self._create_chained_trees(entries, head_commit["tree"]["sha"])
+        commit = await self._create_commit(commit_title, tree_sha, ref, head_commit, push_metrics)
+        loop = asyncio.get_running_loop()
+        if self.manifest is not None:
+            with push_metrics.phase("manifest"):
+                await loop.run_in_executor(None, lambda: self.manifest.update(
+                    repository["html_url"], self.branch_name, head_commit["sha"], commit["sha"], tree_sha,
+                    self._element_blobs(elements)
+                ))
+        # 前回の状態の読み込みとSQLiteへの書き込みは、イベントループを止めないよう別のスレッドで行います。
+        recorded_snapshot = await loop.run_in_executor(None, self._partial_snapshot, guild_snapshot, object_ids, include_guild)
+        await loop.run_in_executor(None, self._record_history, commit["sha"], recorded_snapshot, push_metrics)
+        self.last_snapshot = recorded_snapshot
+        self._finish_metrics(push_metrics, self.request_count - requests_before, self.rate_limit_remaining,
+            self.bytes_uploaded - bytes_before)
+        return repository["html_url"]
+
+    async def _create_commit(self, commit_title: str, tree_sha: str, ref: Optional[dict], head_commit: Optional[dict],
+        push_metrics: Optional[metrics.PushMetrics]=None) -> dict:
+        """tree_sha を指すコミットを作成し、ブランチの参照を更新します。ブランチが存在しなければ作成します。
+        """
+        if push_metrics is None:
+            push_metrics = metrics.PushMetrics()
+        parents = [head_commit["sha"]] if head_commit is not None else []
+        with push_metrics.phase("commit"):
+            commit = await self._request("POST", f"{self._repository_path}/git/commits", {
+                "message": commit_title, "tree": tree_sha, "parents": parents
+            })
+        with push_metrics.phase("ref_update"):
+            if ref is None:
+                await self._request("POST", f"{self._repository_path}/git/refs", {
+                    "ref": "refs/" + self.ref_name, "sha": commit["sha"]
+                })
+            else:
+                await self._request("PATCH", f"{self._repository_path}/git/refs/{self.ref_name}", {
+                    "sha": commit["sha"], "force": True
+                })
+        return commit
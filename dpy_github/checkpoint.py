@@ -0,0 +1,254 @@
+"""push() を途中から再開するための記録と、一時的な失敗の再試行。
+
+Checkpoint を渡した Reporter は、記録を始める前に写し取ったサーバーの状態と親コミットを保存し、
+ツリーのバッチ・アップロードしたblob・作成したコミットを完了するごとに書き込みます。
+プロセスの停止やGitHubの5xxで push() が中断しても、次の push() は保存した状態から同じ要素を作り直し、
+完了したバッチのツリーとコミットを再利用して、残りの手順のみを行います。
+"""
+from typing import Callable, Iterable, List, Optional, Set, TypeVar
+import json
+import logging
+import pickle
+import random
+import sqlite3
+import threading
+import time
+
+import github
+import requests
+
+from . import snapshot
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+class PushJob:
+    """
+    中断された、または実行中の1回の push()。
+
+    Attributes:
+        repository (str): 記録先の html_url。
+        branch (str): ブランチ名。
+        head_sha (Optional[str]): 記録を始めた時点のブランチの先頭のコミット。新しいコミットの親です。
+        guild_snapshot (snapshot.GuildSnapshot): 記録するサーバーの状態。
+        batch_size (int): ツリーを作成したバッチの大きさ。
+        batch_trees (List[str]): 完了したバッチごとの、そのバッチまでを適用したツリーのSHA。
+        tree_sha (Optional[str]): 全てのバッチを適用したツリーのSHA。
+        commit_sha (Optional[str]): 作成したコミットのSHA。ブランチの参照の更新が終わると PushJob は削除されます。
+        attempts (int): この PushJob を実行した回数。
+    """
+    __slots__ = (
+        "checkpoint", "repository", "branch", "head_sha", "guild_snapshot", "batch_size", "batch_trees",
+        "tree_sha", "commit_sha", "attempts"
+    )
+
+    def __init__(self, checkpoint: "Checkpoint", repository: str, branch: str, head_sha: Optional[str],
+        guild_snapshot: snapshot.GuildSnapshot, batch_size: int, batch_trees: List[str], tree_sha: Optional[str]=None,
+        commit_sha: Optional[str]=None, attempts: int=1):
+        self.checkpoint = checkpoint
+        self.repository = repository
+        self.branch = branch
+        self.head_sha = head_sha
+        self.guild_snapshot = guild_snapshot
+        self.batch_size = batch_size
+        self.batch_trees = batch_trees
+        self.tree_sha = tree_sha
+        self.commit_sha = commit_sha
+        self.attempts = attempts
+
+    def batch_done(self, index: int, tree_sha: str):
+        """index 番目のバッチのツリーを作成したことを記録します。 StorageBackend.create_tree_streaming の on_batch です。
+        """
+        del self.batch_trees[index:]
+        self.batch_trees.append(tree_sha)
+        self.checkpoint._update(self, batch_trees=json.dumps(self.batch_trees))
+
+    def tree_done(self, tree_sha: str):
+        self.tree_sha = tree_sha
+        self.checkpoint._update(self, tree_sha=tree_sha)
+
+    def commit_done(self, commit_sha: str):
+        self.commit_sha = commit_sha
+        self.checkpoint._update(self, commit_sha=commit_sha)
+
+    def blobs_uploaded(self, blob_shas: List[str]):
+        """アップロードしたblobを記録します。 StorageBackend.upload_hook です。
+        """
+        self.checkpoint.add_blobs(self.repository, self.branch, blob_shas)
+
+    def finish(self):
+        """ブランチの参照の更新まで完了したため、記録を削除します。
+        アップロードしたblobは作成したツリーから分かるため、この PushJob でアップロードしたblobの記録も削除します。
+        """
+        self.checkpoint.discard(self.repository, self.branch)
+        self.checkpoint.discard_blobs(self.repository, self.branch)
+
+    def __repr__(self) -> str:
+        return (
+            f"<PushJob repository={self.repository} branch={self.branch} head_sha={self.head_sha} "
+            f"batches={len(self.batch_trees)} tree_sha={self.tree_sha} commit_sha={self.commit_sha} attempts={self.attempts}>"
+        )
+
+class Checkpoint:
+    """
+    中断された push() の途中経過と、記録先にアップロードしたblobを保存するSQLiteのファイル。
+    記録先・ブランチごとに、完了していない push() を1つだけ保持します。
+    blobも記録先・ブランチごとに保存するため、同じリポジトリの別のブランチの push() が完了しても削除されません。
+    """
+
+    # 保存形式を変更した場合は値を増やし、古い内容を読み込まないようにします。
+    schema_version = 2
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): SQLiteのファイルのパス。存在しなければ作成します。 ":memory:" も指定できます。
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # blobのアップロードは複数のスレッドから報告されるため、接続を共有しロックで保護します。
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            if self._connection.execute("PRAGMA user_version").fetchone()[0] != self.schema_version:
+                self._connection.execute("DROP TABLE IF EXISTS jobs")
+                self._connection.execute("DROP TABLE IF EXISTS blobs")
+                self._connection.execute(f"PRAGMA user_version = {self.schema_version}")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "repository TEXT NOT NULL, branch TEXT NOT NULL, head_sha TEXT, snapshot BLOB NOT NULL, "
+                "batch_size INTEGER NOT NULL, batch_trees TEXT NOT NULL, tree_sha TEXT, commit_sha TEXT, "
+                "attempts INTEGER NOT NULL, PRIMARY KEY (repository, branch))"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                "repository TEXT NOT NULL, branch TEXT NOT NULL, sha TEXT NOT NULL, "
+                "PRIMARY KEY (repository, branch, sha)) WITHOUT ROWID"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def begin(self, repository: str, branch: str, head_sha: Optional[str], guild_snapshot: snapshot.GuildSnapshot,
+        batch_size: int) -> PushJob:
+        """新しい push() を記録します。同じ記録先・ブランチの記録は置き換えます。
+        """
+        data = pickle.dumps(guild_snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO jobs (repository, branch, head_sha, snapshot, batch_size, batch_trees, "
+                "tree_sha, commit_sha, attempts) VALUES (?, ?, ?, ?, ?, '[]', NULL, NULL, 1)",
+                (repository, branch, head_sha, data, batch_size)
+            )
+        return PushJob(self, repository, branch, head_sha, guild_snapshot, batch_size, [])
+
+    def get(self, repository: str, branch: str) -> Optional[PushJob]:
+        """完了していない push() を返します。なければNoneを返します。取得するごとに attempts が増えます。
+        """
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT head_sha, snapshot, batch_size, batch_trees, tree_sha, commit_sha, attempts FROM jobs "
+                "WHERE repository = ? AND branch = ?", (repository, branch)
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE jobs SET attempts = attempts + 1 WHERE repository = ? AND branch = ?", (repository, branch)
+            )
+        head_sha, data, batch_size, batch_trees, tree_sha, commit_sha, attempts = row
+        return PushJob(self, repository, branch, head_sha, pickle.loads(data), batch_size, json.loads(batch_trees),
+            tree_sha, commit_sha, attempts + 1)
+
+    def discard(self, repository: str, branch: str):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM jobs WHERE repository = ? AND branch = ?", (repository, branch))
+
+    def discard_blobs(self, repository: str, branch: str):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM blobs WHERE repository = ? AND branch = ?", (repository, branch))
+
+    def _update(self, job: PushJob, **columns):
+        assignments = ", ".join(f"{name} = ?" for name in columns)
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"UPDATE jobs SET {assignments} WHERE repository = ? AND branch = ?",
+                (*columns.values(), job.repository, job.branch)
+            )
+
+    def add_blobs(self, repository: str, branch: str, blob_shas: Iterable[str]):
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO blobs (repository, branch, sha) VALUES (?, ?, ?)",
+                ((repository, branch, sha) for sha in blob_shas)
+            )
+
+    def blobs(self, repository: str, branch: str) -> Set[str]:
+        """branch への push() で repository にアップロード済みと記録したblobのSHAを返します。
+        """
+        with self._lock:
+            return {sha for sha, in self._connection.execute(
+                "SELECT sha FROM blobs WHERE repository = ? AND branch = ?", (repository, branch)
+            )}
+
+def is_transient(error: BaseException) -> bool:
+    """再試行すれば成功する可能性のある失敗（GitHubの5xx・レート制限・通信の失敗）であればTrueを返します。
+    """
+    if isinstance(error, (github.RateLimitExceededException, requests.exceptions.ConnectionError,
+        requests.exceptions.Timeout)):
+        return True
+    if isinstance(error, github.GithubException):
+        return error.status is not None and error.status >= 500
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+def rate_limit_delay(error: BaseException) -> Optional[float]:
+    """error がレート制限による失敗であれば、レスポンスのヘッダーから制限が解除されるまでの秒数を返します。
+    レート制限でないか、ヘッダーから分からなければNoneを返します。
+    """
+    if not isinstance(error, github.RateLimitExceededException):
+        return None
+    headers = {name.lower(): value for name, value in (error.headers or {}).items()}
+    # 二次レート制限は Retry-After で待機する秒数を指定します。
+    if "retry-after" in headers:
+        return float(headers["retry-after"])
+    if "x-ratelimit-reset" in headers:
+        return max(float(headers["x-ratelimit-reset"]) - time.time(), 0) + 1
+    return None
+
+def retry(func: Callable[[], T], retries: int=5, base_delay: float=1.0, max_delay: float=60.0,
+    transient: Callable[[BaseException], bool]=is_transient) -> T:
+    """func を呼び出し、一時的な失敗であれば指数関数的に間隔を空けて最大 retries 回まで再試行します。
+
+    n 回目の再試行の前に、 min(max_delay, base_delay * 2 ** (n - 1)) 秒を上限とするランダムな秒数だけ待機します。
+    レート制限による失敗では、 max_delay に関わらずレスポンスのヘッダーが示すリセットの時刻まで待機します。
+
+    Args:
+        retries (int, optional): 再試行の最大回数。 Defaults to 5.
+        base_delay (float, optional): 最初の再試行の前に待機する最大秒数。 Defaults to 1.0.
+        max_delay (float, optional): 1回の待機の最大秒数。 Defaults to 60.0.
+        transient (Callable[[BaseException], bool], optional): 再試行する失敗であればTrueを返す関数。 Defaults to is_transient.
+
+    Raises:
+        Exception: 一時的でない失敗か、再試行しても失敗した場合は最後の例外をそのまま送出します。
+    """
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except Exception as e:
+            if attempt >= retries or not transient(e):
+                raise
+            # レート制限はリセットまで待たなければ再試行しても失敗するため、間隔を空けるだけでは足りません。
+            delay = rate_limit_delay(e)
+            if delay is None:
+                # 複数の Reporter が同時に失敗した場合に再試行が重ならないよう、待機時間をばらつかせます。
+                delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            attempt += 1
+            logger.warning("一時的な失敗のため %.1f 秒後に再試行します（%d/%d回目）: %r", delay, attempt, retries, e)
+            time.sleep(delay)
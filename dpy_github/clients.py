@@ -0,0 +1,101 @@
+from typing import Any, Dict, Hashable, Optional, Tuple
+import hashlib
+import threading
+import time
+
+import github
+
+class ClientCache:
+    """
+    認証済みの github.Github と、解決済みのリポジトリをトークン・リポジトリ名ごとに ttl 秒間保持するキャッシュ。
+    コマンドごとに Reporter を作成しても、リポジトリの解決にかかるリクエストは ttl 秒に1回で済みます。
+    複数のスレッドから利用できます。
+    """
+
+    def __init__(self, ttl: float=600.0, **client_options):
+        """
+        Args:
+            ttl (float, optional): 保持する秒数。 Defaults to 600.0.
+            **client_options: get_client で github.Github を作成する際に渡すキーワード引数（pool_size 等）。
+        """
+        self.ttl = ttl
+        self.client_options = client_options
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def token_key(github_token: str) -> str:
+        """トークンそのものをキーに残さないよう、SHA-256のダイジェストを返します。
+        """
+        return hashlib.sha256(github_token.encode("utf-8")).hexdigest()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """保持している値を返します。存在しないか期限切れならNoneを返します。
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key: Optional[Hashable]=None):
+        """key の値を破棄します。Noneなら全ての値を破棄します。
+        リポジトリの削除・名前の変更を行った場合に呼び出してください。
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def get_client(self, github_token: str) -> github.Github:
+        """github_token で認証したクライアントを返します。作成時にリクエストは行いません。
+        """
+        key = ("client", self.token_key(github_token))
+        client = self.get(key)
+        if client is None:
+            client = github.Github(github_token, **self.client_options)
+            self.put(key, client)
+        return client
+
+    def get_repository(self, github_client: github.Github, repository_name: str,
+        allow_new_repository=False) -> github.Repository:
+        """github_client のユーザーの repository_name のリポジトリを返します。
+
+        Raises:
+            ValueError: リポジトリが見つからず、 allow_new_repository がFalseです。
+        """
+        # 同じクライアントに対する値のみを返すよう、クライアントも値に含めて比較します。
+        key = ("repository", id(github_client), repository_name)
+        entry = self.get(key)
+        if entry is not None and entry[0] is github_client:
+            return entry[1]
+
+        user = self._get_user(github_client)
+        try:
+            repository = user.get_repo(repository_name)
+        except github.UnknownObjectException:
+            if not allow_new_repository:
+                raise ValueError(f"{repository_name} という名前のリポジトリは見つかりませんでした。")
+            repository = user.create_repo(repository_name, auto_init=True)
+        self.put(key, (github_client, repository))
+        return repository
+
+    def _get_user(self, github_client: github.Github) -> github.AuthenticatedUser:
+        # 取得したユーザー名を使い回すため、ユーザーも保持します。
+        key = ("user", id(github_client))
+        entry = self.get(key)
+        if entry is not None and entry[0] is github_client:
+            return entry[1]
+        user = github_client.get_user()
+        self.put(key, (github_client, user))
+        return user
+
+default_cache = ClientCache()
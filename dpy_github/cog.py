@@ -0,0 +1,209 @@
+from typing import Callable, Dict, List, Optional, Set, Union
+import asyncio
+import functools
+import logging
+
+import discord
+from discord.ext import commands
+
+from .main import Reporter
+from .async_main import AsyncReporter
+from .snapshot import GuildSnapshot
+
+logger = logging.getLogger(__name__)
+
+class DirtySet:
+    """前回の記録以降に変更されたオブジェクトのIDと、削除されたオブジェクトのIDとファイルのパスを保持します。
+    """
+
+    def __init__(self, now: float):
+        self.channel_ids: Set[int] = set()
+        self.role_ids: Set[int] = set()
+        self.member_ids: Set[int] = set()
+        self.removed_ids: Set[int] = set()
+        self.removed_paths: Set[str] = set()
+        self.guild = False
+        self.first_event = now
+        self.last_event = now
+
+class SnapshotCog(commands.Cog):
+    """サーバーの変更イベントを監視し、変更されたオブジェクトのみをまとめて1つのコミットとして記録するCog。
+
+    イベントが最後に届いてから quiet_period 秒経過するか、最初のイベントから max_delay 秒経過した時点で記録します。
+    大量のロール変更などが短時間に起きても、1つの小さなコミットにまとめられます。
+    """
+
+    def __init__(self, bot: commands.Bot, reporter_factory: Callable[[discord.Guild], Optional[Union[Reporter, AsyncReporter]]],
+        quiet_period=30.0, max_delay=300.0, commit_title="update"):
+        """
+        Args:
+            bot (commands.Bot): Cogを登録するBot。
+            reporter_factory (Callable[[discord.Guild], Optional[Union[Reporter, AsyncReporter]]]):
+                サーバーを受け取り記録に利用する Reporter を返す関数。Noneを返したサーバーは記録しません。
+                返された Reporter はサーバーごとに再利用されます。
+            quiet_period (float, optional): 最後のイベントから記録までの待機秒数。 Defaults to 30.0.
+            max_delay (float, optional): 最初のイベントから記録までの最大秒数。 Defaults to 300.0.
+            commit_title (str, optional): 作成するコミットのタイトル。 Defaults to "update".
+        """
+        self.bot = bot
+        self.reporter_factory = reporter_factory
+        self.quiet_period = quiet_period
+        self.max_delay = max_delay
+        self.commit_title = commit_title
+
+        self._reporters: Dict[int, Optional[Union[Reporter, AsyncReporter]]] = {}
+        self._dirty: Dict[int, DirtySet] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    def cog_unload(self):
+        for task in self._tasks.values():
+            task.cancel()
+
+    def _get_reporter(self, guild: discord.Guild) -> Optional[Union[Reporter, AsyncReporter]]:
+        if guild.id not in self._reporters:
+            self._reporters[guild.id] = self.reporter_factory(guild)
+        return self._reporters[guild.id]
+
+    def _mark(self, guild: discord.Guild) -> Optional[DirtySet]:
+        """サーバーを変更ありとして記録し、記録を待つタスクがなければ開始します。
+        """
+        if self._get_reporter(guild) is None:
+            return None
+        now = self.bot.loop.time()
+        dirty = self._dirty.get(guild.id)
+        if dirty is None:
+            dirty = self._dirty[guild.id] = DirtySet(now)
+        dirty.last_event = now
+        if guild.id not in self._tasks:
+            self._tasks[guild.id] = self.bot.loop.create_task(self._wait_and_flush(guild.id))
+        return dirty
+
+    def _mark_channel(self, channel: discord.abc.GuildChannel):
+        dirty = self._mark(channel.guild)
+        if dirty is not None:
+            dirty.channel_ids.add(channel.id)
+
+    def _mark_removed(self, guild: discord.Guild, object_id: int,
+        path_factory: Callable[[Union[Reporter, AsyncReporter]], str]):
+        dirty = self._mark(guild)
+        if dirty is not None:
+            dirty.removed_ids.add(object_id)
+            dirty.removed_paths.add(path_factory(self._get_reporter(guild)))
+
+    async def _wait_and_flush(self, guild_id: int):
+        try:
+            while True:
+                dirty = self._dirty[guild_id]
+                deadline = min(dirty.last_event + self.quiet_period, dirty.first_event + self.max_delay)
+                delay = deadline - self.bot.loop.time()
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+            await self.flush(guild_id)
+        except asyncio.CancelledError:
+            self._tasks.pop(guild_id, None)
+            raise
+
+        self._tasks.pop(guild_id, None)
+        if guild_id in self._dirty:
+            # 記録中に届いた変更は、次のコミットにまとめます。
+            self._tasks[guild_id] = self.bot.loop.create_task(self._wait_and_flush(guild_id))
+
+    async def flush(self, guild_id: int):
+        """保留中の変更を直ちに1つのコミットとして記録します。変更がなければ何もしません。
+
+        Args:
+            guild_id (int): 記録するサーバーのID。
+        """
+        dirty = self._dirty.pop(guild_id, None)
+        guild = self.bot.get_guild(guild_id)
+        if dirty is None or guild is None:
+            return
+        reporter = self._get_reporter(guild)
+
+        channels = [channel for channel in map(guild.get_channel, dirty.channel_ids) if channel is not None]
+        roles = [role for role in map(guild.get_role, dirty.role_ids) if role is not None]
+        members = [member for member in map(guild.get_member, dirty.member_ids) if member is not None]
+        # history には記録したオブジェクトの変更のみを保存するため、状態はイベントループのスレッドで写し取ります。
+        guild_snapshot = reporter.capture_snapshot()
+
+        try:
+            if isinstance(reporter, AsyncReporter):
+                # 目次のURLを作成するため、先にリポジトリを解決しておきます。
+                await reporter._get_repository()
+                elements = reporter.create_partial_tree_elements(
+                    channels=channels, roles=roles, members=members,
+                    removed_paths=dirty.removed_paths, include_guild=dirty.guild
+                )
+                await reporter.push_elements(elements, self.commit_title, guild_snapshot, self._object_ids(dirty), dirty.guild)
+            else:
+                # 同期の Reporter はリポジトリの解決・整形・送信のいずれもイベントループを止めるため、まとめて別のスレッドで行います。
+                await self.bot.loop.run_in_executor(
+                    None, functools.partial(self._push_partial, reporter, channels, roles, members, dirty, guild_snapshot)
+                )
+        except Exception:
+            logger.exception("サーバー %s の変更の記録に失敗しました。", guild_id)
+
+    def _push_partial(self, reporter: Reporter, channels: List[discord.abc.GuildChannel], roles: List[discord.Role],
+        members: List[discord.Member], dirty: DirtySet, guild_snapshot: GuildSnapshot):
+        """変更されたオブジェクトの要素を作成し、1つのコミットとして記録します。
+        """
+        elements = reporter.create_partial_tree_elements(
+            channels=channels, roles=roles, members=members,
+            removed_paths=dirty.removed_paths, include_guild=dirty.guild
+        )
+        reporter.push_elements(elements, self.commit_title, guild_snapshot, self._object_ids(dirty), dirty.guild)
+
+    @staticmethod
+    def _object_ids(dirty: DirtySet) -> Set[int]:
+        return dirty.channel_ids | dirty.role_ids | dirty.member_ids | dirty.removed_ids
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel):
+        self._mark_channel(channel)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+        if before.category_id != after.category_id:
+            # カテゴリーが変わるとファイルのパスも変わるため、移動前のファイルを削除します。
+            self._mark_removed(before.guild, before.id, lambda reporter: reporter.element_creator.channel_path(before))
+        self._mark_channel(after)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        self._mark_removed(channel.guild, channel.id, lambda reporter: reporter.element_creator.channel_path(channel))
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role: discord.Role):
+        dirty = self._mark(role.guild)
+        if dirty is not None:
+            dirty.role_ids.add(role.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        await self.on_guild_role_create(after)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        self._mark_removed(role.guild, role.id, lambda reporter: reporter.element_creator.role_path(role))
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        dirty = self._mark(member.guild)
+        if dirty is not None:
+            dirty.member_ids.add(member.id)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.nick != after.nick or before.roles != after.roles:
+            await self.on_member_join(after)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        self._mark_removed(member.guild, member.id, lambda reporter: reporter.element_creator.member_path(member))
+
+    @commands.Cog.listener()
+    async def on_guild_update(self, before: discord.Guild, after: discord.Guild):
+        dirty = self._mark(after)
+        if dirty is not None:
+            dirty.guild = True
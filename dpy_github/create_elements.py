@@ -1,14 +1,57 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Callable, Iterable, Iterator, List, Optional, Union
 
 from github import InputGitTreeElement
 import discord
 
 from . import format_model
+from . import parallel
+from . import records
+from . import render_cache
+from . import util
+
+class BlobTreeElement(InputGitTreeElement):
+    """
+    内容を持つファイルを表すInputGitTreeElement。
+    UTF-8でエンコードしたバイト列とGitのblobのSHAを初めて必要になった時に一度だけ計算し、保持します。
+    """
+
+    def __init__(self, file_path: str, content: str, mode: str="100644"):
+        super().__init__(file_path, mode, "blob", content=content)
+        self.file_path = file_path
+        self.content = content
+        self._content_bytes: Optional[bytes] = None
+        self._blob_sha: Optional[str] = None
+
+    @classmethod
+    def from_rendered(cls, file_path: str, content_bytes: bytes, blob_sha: str, mode: str="100644") -> "BlobTreeElement":
+        """
+        以前に作成した要素の content_bytes と blob_sha から、SHAの計算を省略して要素を作成します。
+        """
+        element = cls(file_path, content_bytes.decode("utf-8"), mode)
+        element._content_bytes = content_bytes
+        element._blob_sha = blob_sha
+        return element
+
+    @property
+    def content_bytes(self) -> bytes:
+        if self._content_bytes is None:
+            self._content_bytes = self.content.encode("utf-8")
+        return self._content_bytes
+
+    @property
+    def blob_sha(self) -> str:
+        if self._blob_sha is None:
+            self._blob_sha = util.git_blob_sha(self.content_bytes)
+        return self._blob_sha
 
 class GitTreeElementCreator(ABC):
     """
     Discordモデルを受け取りInputGitTreeElementを作成して返す動作の抽象基底クラス。
+
+    create_channel_elements 等の複数の要素を作成するメソッドは、要素を1つずつ返すイテレーターを返します。
+    Reporter.push() は受け取った要素をバッチごとに送信して手放すため、独自の実装でもリストにまとめずに返すと、
+    メモリ使用量がサーバーの大きさに比例しなくなります。
     """
 
     @abstractmethod
@@ -39,12 +82,85 @@ class GitTreeElementCreator(ABC):
         """
         pass
 
+    @property
+    def supports_records(self) -> bool:
+        """
+        Trueなら、各 create_*_element に discord.py のモデルの代わりに records のレコード（snapshot.GuildSnapshot の内容）を渡せます。
+        """
+        return False
+
+    def create_channel_elements(self, channels: Iterable[discord.abc.GuildChannel]) -> Iterator[InputGitTreeElement]:
+        """
+        複数のチャンネルの要素を、渡した順番で作成します。デフォルトでは create_channel_element を順に呼び出します。
+        """
+        for channel in channels:
+            yield self.create_channel_element(channel)
+
+    def create_role_elements(self, roles: Iterable[discord.Role]) -> Iterator[InputGitTreeElement]:
+        """
+        複数のロールの要素を、渡した順番で作成します。
+        """
+        for role in roles:
+            yield self.create_role_element(role)
+
+    def create_member_elements(self, members: Iterable[discord.Member]) -> Iterator[InputGitTreeElement]:
+        """
+        複数のメンバーの要素を、渡した順番で作成します。
+        """
+        for member in members:
+            yield self.create_member_element(member)
+
+    def create_index_page_element(self, file_path: str, content: str) -> InputGitTreeElement:
+        """
+        分割した目次の1ページを表すInputGitTreeElementを作成します。
+        """
+        return InputGitTreeElement(file_path, "100644", "blob", content=content)
+
+    def channel_path(self, channel: discord.abc.GuildChannel) -> str:
+        """
+        チャンネルを記録するファイルのリポジトリ内のパスを返します。目次のリンクや削除されたファイルの特定に利用されます。
+        """
+        if channel.category_id is not None:
+            return f"channels/{channel.category_id}/{channel.id}.json"
+        return f"channels/{channel.id}.json"
+
+    def role_path(self, role: discord.Role) -> str:
+        """
+        ロールを記録するファイルのリポジトリ内のパスを返します。
+        """
+        return f"roles/{role.id}.json"
+
+    def member_path(self, member: discord.Member) -> str:
+        """
+        メンバーを記録するファイルのリポジトリ内のパスを返します。
+        """
+        return f"members/{member.id}.json"
+
+_record_captures = {
+    "channel": (records.ChannelRecord, records.ChannelRecord.from_channel),
+    "role": (records.RoleRecord, records.RoleRecord.from_role),
+    "member": (records.MemberRecord, records.MemberRecord.from_member)
+}
+
 class DefaultTreeCreator(GitTreeElementCreator):
     """
     Discordモデルを受け取りInputGitTreeElementを作成して返す動作のデフォルト実装を定義します。
     """
 
     def __init__(self,**kwargs):
+        """
+        Args:
+            formatter (format_model.BaseFormatter, optional): 各オブジェクトを文字列に整形するオブジェクト。
+            shard_digits (int, optional): 0より大きければ、メンバーを members/<IDの末尾 shard_digits 桁>/<ID>.json に分けて記録します。
+                メンバー数が多いサーバーで1つのディレクトリのツリーが巨大になるのを防ぎます。 Defaults to 0.
+            render_cache (render_cache.RenderCache, optional): 指定した場合、フォーマッターの指紋が前回と同じチャンネル・ロール・メンバーは
+                整形し直さずに保持している内容を利用します。
+            renderer (parallel.ParallelRenderer, optional): 指定した場合、サーバー全体の要素を作成する際の整形とblobのSHAの計算を
+                プロセスプールで並列に行います。 formatter が format_model.DefaultFormatter の場合のみ有効です。
+        """
+        self.shard_digits = kwargs.get("shard_digits", 0)
+        self.render_cache: Optional[render_cache.RenderCache] = kwargs.get("render_cache")
+        self.renderer: Optional[parallel.ParallelRenderer] = kwargs.get("renderer")
         user_formatter = kwargs.get("formatter")
         if user_formatter is not None and not isinstance(user_formatter, format_model.BaseFormatter):
             raise NotImplementedError(
@@ -55,55 +171,121 @@ class DefaultTreeCreator(GitTreeElementCreator):
         else:
             self.formatter = user_formatter
 
-    def create_channel_element(self, channel: discord.abc.GuildChannel) -> InputGitTreeElement:
-        if channel.category_id is not None:
-            file_path = f"channels/{channel.category_id}/{channel.id}.json"
+    def member_path(self, member: discord.Member) -> str:
+        if self.shard_digits > 0:
+            # スノーフレークの上位桁は作成日時のため偏りますが、下位桁はほぼ均等に分布します。
+            shard = str(member.id)[-self.shard_digits:]
+            return f"members/{shard}/{member.id}.json"
+        return super().member_path(member)
+
+    @property
+    def supports_records(self) -> bool:
+        # レコードを整形できるのは DefaultFormatter のみです。
+        return isinstance(self.formatter, format_model.DefaultFormatter)
+
+    def _to_record(self, kind: str, model) -> records.Record:
+        record_class, capture = _record_captures[kind]
+        return model if isinstance(model, record_class) else capture(model)
+
+    def _create_element(self, kind: str, model, file_path: str) -> BlobTreeElement:
+        """model を整形した要素を作成します。 render_cache があれば、フォーマッターの指紋が同じ場合に保持している内容を利用します。
+        """
+        formatter = self.formatter
+        if self.supports_records:
+            model = self._to_record(kind, model)
+            render = getattr(formatter, f"format_{kind}_record")
         else:
-            file_path = f"channels/{channel.id}.json"
-        element = InputGitTreeElement(
-            file_path,
-            "100644",
-            "blob",
-            content=self.formatter.format_channel(channel)
-        )
-        return element
+            render = getattr(formatter, f"format_{kind}")
 
-    def create_member_element(self, member: discord.Member) -> InputGitTreeElement:
-        file_path = f"members/{member.id}.json"
-        element = InputGitTreeElement(
-            file_path,
-            "100644",
-            "blob",
-            content=self.formatter.format_member(member)
-        )
-        return element
+        cache = self.render_cache
+        fingerprint = getattr(formatter, f"{kind}_fingerprint")(model) if cache is not None else None
+        if fingerprint is None:
+            return BlobTreeElement(file_path, render(model))
 
-    def create_role_element(self, role: discord.Role) -> InputGitTreeElement:
-        file_path = f"roles/{role.id}.json"
-        element = InputGitTreeElement(
-            file_path,
-            "100644",
-            "blob",
-            content=self.formatter.format_role(role)
-        )
+        rendered = cache.get(kind, model.id, fingerprint)
+        if rendered is not None:
+            return BlobTreeElement.from_rendered(file_path, *rendered)
+
+        element = BlobTreeElement(file_path, render(model))
+        cache.put(kind, model.id, fingerprint, element.content_bytes, element.blob_sha)
         return element
 
-    def create_guild_element(self, guild: discord.Guild) -> InputGitTreeElement:
+    def _create_elements_in_parallel(self, kind: str, models: Iterable, path: Callable[..., str]) -> Iterator[BlobTreeElement]:
+        """キャッシュにないオブジェクトのみを renderer で整形し、 models と同じ順番の要素を返します。
+        renderer が一度に整形できる数ずつ処理するため、保持する整形結果はサーバーの大きさではなくその数に比例します。
+        """
+        window = self.renderer.chunk_size * self.renderer.max_pending_chunks
+        for models_window in util.iter_batches(models, window):
+            yield from self._create_window_in_parallel(kind, models_window, path)
+
+    def _create_window_in_parallel(self, kind: str, models: Iterable, path: Callable[..., str]) -> List[BlobTreeElement]:
+        record_list = [self._to_record(kind, model) for model in models]
+        cache = self.render_cache
+        fingerprint = getattr(self.formatter, f"{kind}_fingerprint")
+        elements: List[Optional[BlobTreeElement]] = [None] * len(record_list)
+        pending = []
+        fingerprints = []
+        for index, record in enumerate(record_list):
+            record_fingerprint = fingerprint(record) if cache is not None else None
+            if record_fingerprint is not None:
+                rendered = cache.get(kind, record.id, record_fingerprint)
+                if rendered is not None:
+                    elements[index] = BlobTreeElement.from_rendered(path(record), *rendered)
+                    continue
+            pending.append(index)
+            fingerprints.append(record_fingerprint)
+
+        rendered_list = self.renderer.render(self.formatter, kind, [record_list[index] for index in pending])
+        for index, record_fingerprint, (content_bytes, blob_sha) in zip(pending, fingerprints, rendered_list):
+            record = record_list[index]
+            elements[index] = BlobTreeElement.from_rendered(path(record), content_bytes, blob_sha)
+            if record_fingerprint is not None:
+                cache.put(kind, record.id, record_fingerprint, content_bytes, blob_sha)
+        return elements
+
+    def create_channel_elements(self, channels: Iterable[discord.abc.GuildChannel]) -> Iterator[InputGitTreeElement]:
+        if self.renderer is None or not self.supports_records:
+            return super().create_channel_elements(channels)
+        return self._create_elements_in_parallel("channel", channels, self.channel_path)
+
+    def create_role_elements(self, roles: Iterable[discord.Role]) -> Iterator[InputGitTreeElement]:
+        if self.renderer is None or not self.supports_records:
+            return super().create_role_elements(roles)
+        return self._create_elements_in_parallel("role", roles, self.role_path)
+
+    def create_member_elements(self, members: Iterable[discord.Member]) -> Iterator[InputGitTreeElement]:
+        if self.renderer is None or not self.supports_records:
+            return super().create_member_elements(members)
+        return self._create_elements_in_parallel("member", members, self.member_path)
+
+    def create_channel_element(self, channel: Union[discord.abc.GuildChannel, records.ChannelRecord]) -> InputGitTreeElement:
+        return self._create_element("channel", channel, self.channel_path(channel))
+
+    def create_member_element(self, member: Union[discord.Member, records.MemberRecord]) -> InputGitTreeElement:
+        return self._create_element("member", member, self.member_path(member))
+
+    def create_role_element(self, role: Union[discord.Role, records.RoleRecord]) -> InputGitTreeElement:
+        return self._create_element("role", role, self.role_path(role))
+
+    def create_guild_element(self, guild: Union[discord.Guild, records.GuildRecord]) -> InputGitTreeElement:
         file_path = "guild_config.json"
-        element = InputGitTreeElement(
+        if isinstance(guild, records.GuildRecord):
+            content = self.formatter.format_guild_record(guild)
+        else:
+            content = self.formatter.format_guild(guild)
+        element = BlobTreeElement(
             file_path,
-            "100644",
-            "blob",
-            content=self.formatter.format_guild(guild)
+            content
         )
         return element
 
     def create_index_element(self, index_content) -> InputGitTreeElement:
         file_path = "index.md"
-        element = InputGitTreeElement(
+        element = BlobTreeElement(
             file_path,
-            "100644",
-            "blob",
-            content=index_content
+            index_content
         )
         return element
+
+    def create_index_page_element(self, file_path: str, content: str) -> InputGitTreeElement:
+        return BlobTreeElement(file_path, content)
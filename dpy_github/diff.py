@@ -0,0 +1,121 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from . import records
+from . import snapshot
+
+class Change:
+    """
+    1つのオブジェクトの追加・削除・変更。
+
+    Attributes:
+        kind (str): "channel", "role", "member", "guild" のいずれか。
+        id (int): オブジェクトのID。
+        old (Optional[records.Record]): 変更前のレコード。追加されたオブジェクトではNone。
+        new (Optional[records.Record]): 変更後のレコード。削除されたオブジェクトではNone。
+        fields (Dict[str, Tuple[object, object]]): 変更された属性名と (変更前, 変更後) の値。追加・削除では空です。
+    """
+    __slots__ = ("kind", "id", "old", "new", "fields")
+
+    def __init__(self, kind: str, old: Optional[records.Record], new: Optional[records.Record]):
+        self.kind = kind
+        self.old = old
+        self.new = new
+        self.id = (new if new is not None else old).id
+        self.fields: Dict[str, Tuple[object, object]] = {}
+        if old is not None and new is not None:
+            for name, old_value, new_value in zip(old.__slots__, old.astuple(), new.astuple()):
+                if old_value != new_value:
+                    self.fields[name] = (old_value, new_value)
+
+    @property
+    def action(self) -> str:
+        """"added", "removed", "modified" のいずれか。
+        """
+        if self.old is None:
+            return "added"
+        if self.new is None:
+            return "removed"
+        return "modified"
+
+    def as_dict(self) -> dict:
+        record = self.new if self.new is not None else self.old
+        return {
+            "kind": self.kind,
+            "action": self.action,
+            "id": self.id,
+            "name": getattr(record, "name", None),
+            "fields": {name: {"old": old, "new": new} for name, (old, new) in self.fields.items()}
+        }
+
+    def __repr__(self) -> str:
+        return f"<Change kind={self.kind} action={self.action} id={self.id} fields={list(self.fields)}>"
+
+class Changeset:
+    """
+    2つの GuildSnapshot の差分。変更がなければ偽と評価されます。
+
+    Attributes:
+        added (List[Change]): 追加されたチャンネル・ロール・メンバー。
+        removed (List[Change]): 削除されたチャンネル・ロール・メンバー。
+        modified (List[Change]): 属性が変更されたチャンネル・ロール・メンバーとサーバー設定。
+    """
+
+    def __init__(self, added: List[Change], removed: List[Change], modified: List[Change]):
+        self.added = added
+        self.removed = removed
+        self.modified = modified
+
+    @classmethod
+    def between(cls, old: Optional[snapshot.GuildSnapshot], new: snapshot.GuildSnapshot) -> "Changeset":
+        """old から new への差分を計算します。 old がNoneなら、 new の全てのオブジェクトを追加されたものとします。
+        APIへのリクエストは行いません。
+        """
+        added, removed, modified = [], [], []
+        pairs = (
+            ("channel", old.channels if old is not None else [], new.channels),
+            ("role", old.roles if old is not None else [], new.roles),
+            ("member", old.members if old is not None else [], new.members),
+        )
+        for kind, old_records, new_records in pairs:
+            old_by_id = {record.id: record for record in old_records}
+            for record in new_records:
+                old_record = old_by_id.pop(record.id, None)
+                if old_record is None:
+                    added.append(Change(kind, None, record))
+                elif old_record != record:
+                    modified.append(Change(kind, old_record, record))
+            removed.extend(Change(kind, record, None) for record in old_by_id.values())
+
+        if old is None:
+            added.append(Change("guild", None, new.guild))
+        elif old.guild != new.guild:
+            modified.append(Change("guild", old.guild, new.guild))
+        return cls(added, removed, modified)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.modified)
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.modified)
+
+    def __iter__(self) -> Iterator[Change]:
+        yield from self.added
+        yield from self.removed
+        yield from self.modified
+
+    def of_kind(self, kind: str) -> List[Change]:
+        """kind の種類のオブジェクトの変更のみを返します。
+        """
+        return [change for change in self if change.kind == kind]
+
+    def as_dict(self) -> dict:
+        """JSONに変換できる辞書を返します。
+        """
+        return {
+            "added": [change.as_dict() for change in self.added],
+            "removed": [change.as_dict() for change in self.removed],
+            "modified": [change.as_dict() for change in self.modified]
+        }
+
+    def __repr__(self) -> str:
+        return f"<Changeset added={len(self.added)} removed={len(self.removed)} modified={len(self.modified)}>"
@@ -1,10 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import Mapping, Union
-import json
+from typing import Hashable, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
 
 import discord
 
 from . import i18n
+from . import records
+from . import serializer
+from . import util
 
 class BaseFormatter(ABC):
     """Discordモデルを文字列に整形する動作の抽象基底クラス。
@@ -25,95 +27,226 @@ class BaseFormatter(ABC):
     def format_guild(self, guild: discord.Guild) -> str:
         pass
 
+    def channel_fingerprint(self, channel: discord.abc.GuildChannel) -> Optional[Hashable]:
+        """
+        format_channel の結果を決める属性の組を返します。結果が同じになるチャンネルは同じ値を返す必要があります。
+        Noneを返した場合、整形結果はキャッシュされません。
+        """
+        return None
+
+    def role_fingerprint(self, role: discord.Role) -> Optional[Hashable]:
+        """
+        format_role の結果を決める属性の組を返します。Noneを返した場合、整形結果はキャッシュされません。
+        """
+        return None
+
+    def member_fingerprint(self, member: discord.Member) -> Optional[Hashable]:
+        """
+        format_member の結果を決める属性の組を返します。Noneを返した場合、整形結果はキャッシュされません。
+        """
+        return None
+
+_encoder = serializer.IndentedJSONEncoder()
+
+# 権限名とビットの対応。Permissions の反復と同様に、別名（view_channel 等）は含みません。
+_permission_flags: List[Tuple[int, str]] = [
+    (getattr(discord.Permissions, name).flag, name) for name, _ in discord.Permissions()
+]
+_all_permissions = discord.Permissions.all().value
+
 class DefaultFormatter(BaseFormatter):
+    def __init__(self, locale="ja", permission_cache_size=1024):
+        """
+        Args:
+            locale (str, optional): 出力に利用する言語。 i18n.catalogs のキーのいずれかです。 Defaults to "ja".
+            permission_cache_size (int, optional): 整形済みの権限設定を保持する、allow/deny の組み合わせの最大数。 Defaults to 1024.
+        """
+        self.catalog = i18n.get_catalog(locale)
+        # 権限上書きの多くは少数の allow/deny の組み合わせの使い回しのため、組み合わせごとに結果を保持します。
+        self._permission_cache = util.LRUCache(permission_cache_size)
+        self._permission_names = [
+            (flag, self.catalog.permission_name(name)) for flag, name in _permission_flags
+        ]
+
+    def __getstate__(self) -> dict:
+        # プロセスプールへ送る際は、整形済みの権限設定のキャッシュを含めません。
+        # 翻訳の対応表のキーである discord.py の列挙型は pickle できないため、言語コードのみを送ります。
+        state = self.__dict__.copy()
+        state["_permission_cache"] = util.LRUCache(self._permission_cache.maxsize)
+        state["catalog"] = self.catalog.locale
+        return state
+
+    def __setstate__(self, state: dict):
+        state["catalog"] = i18n.get_catalog(state["catalog"])
+        self.__dict__.update(state)
+
     def dumps(self, json_data: dict) -> str:
-        return json.dumps(json_data, sort_keys=True, indent=4, ensure_ascii=False)
+        # json.dumps(json_data, sort_keys=True, indent=4, ensure_ascii=False) と同一の文字列を高速に生成します。
+        return _encoder.encode(json_data)
+
+    def format_permission_pair(self, allow: int, deny: int) -> dict:
+        """allow/deny のビット列から、権限名と 可/不可 の辞書を作成します。
+        どちらにも含まれない権限は出力せず、両方に含まれる権限は discord.PermissionOverwrite.from_pair と同様に 不可 とします。
+        同じ組み合わせには同じ辞書を返すため、戻り値を変更しないでください。
+
+        Args:
+            allow (int): 許可する権限のビット列。
+            deny (int): 拒否する権限のビット列。
+        """
+        key = (allow, deny)
+        permission_data = self._permission_cache.get(key)
+        if permission_data is None:
+            allowed = self.catalog.has_permission(True)
+            denied = self.catalog.has_permission(False)
+            permission_data = {}
+            for flag, name in self._permission_names:
+                if deny & flag:
+                    permission_data[name] = denied
+                elif allow & flag:
+                    permission_data[name] = allowed
+            self._permission_cache.set(key, permission_data)
+        return permission_data
+
+    def format_overwrite_pairs(self, pairs: Iterable[Tuple[bool, int, int, int]]) -> dict:
+        """(ロールであるか, 対象のID, allow, deny) の組から、権限上書き設定の辞書を作成します。
+        """
+        role_data = {}
+        member_data = {}
+        for is_role, target_id, allow, deny in pairs:
+            if is_role:
+                role_data[target_id] = self.format_permission_pair(allow, deny)
+            else:
+                member_data[target_id] = self.format_permission_pair(allow, deny)
+        return {
+            self.catalog.permission_targets.Role: role_data,
+            self.catalog.permission_targets.Member: member_data
+        }
 
     def format_permission_dict(self, permission: Mapping[
         Union[discord.Role,discord.Member],Union[discord.Permissions,discord.PermissionOverwrite
         ]]) -> dict:
-        permission_data = {
-            i18n.PermissionTargets.Role: {},
-            i18n.PermissionTargets.Member: {}
-        }
-
-        for target in permission:
-            converted_permission = {
-                i18n.GeneralConverter.permission_name(perm):
-                i18n.BooleanConverter.has_permission(value)
-                for perm, value in permission[target] if value is not None
-            }
+        pairs = []
+        for target, value in permission.items():
+            if isinstance(value, discord.Permissions):
+                allow, deny = value.value, _all_permissions & ~value.value
+            else:
+                allow, deny = (permissions.value for permissions in value.pair())
             if isinstance(target,discord.Role): 
-                permission_data[i18n.PermissionTargets.Role][target.id] = converted_permission
+                pairs.append((True, target.id, allow, deny))
             elif isinstance(target,discord.Member):
-                permission_data[i18n.PermissionTargets.Member][target.id] = converted_permission
+                pairs.append((False, target.id, allow, deny))
+        return self.format_overwrite_pairs(pairs)
 
-        return permission_data
+    def iter_overwrite_pairs(self, channel: discord.abc.GuildChannel) -> Iterator[Tuple[bool, int, int, int]]:
+        """records.iter_overwrite_pairs を参照してください。
+        """
+        return records.iter_overwrite_pairs(channel)
 
     def format_permission_of_role_dict(self, permission: discord.Permissions) -> dict:
-        permission_data = {}
-        for perm, value in permission:
-            permission_data[i18n.GeneralConverter.permission_name(perm)] = i18n.BooleanConverter.has_permission(value)
-        return permission_data
+        return self.format_permission_pair(permission.value, _all_permissions & ~permission.value)
+
 
+    def channel_fingerprint(self, channel: Union[discord.abc.GuildChannel, records.ChannelRecord]) -> Hashable:
+        # レコードは整形に利用する属性のみを持つため、そのまま指紋になります。
+        if not isinstance(channel, records.ChannelRecord):
+            channel = records.ChannelRecord.from_channel(channel)
+        return self.catalog.locale, channel
+
+    def role_fingerprint(self, role: Union[discord.Role, records.RoleRecord]) -> Hashable:
+        if not isinstance(role, records.RoleRecord):
+            role = records.RoleRecord.from_role(role)
+        return self.catalog.locale, role
+
+    def member_fingerprint(self, member: Union[discord.Member, records.MemberRecord]) -> Hashable:
+        # member.roles はロールの順番で並び替えられるため、ロールの並びが変わった場合も指紋が変わります。
+        if not isinstance(member, records.MemberRecord):
+            member = records.MemberRecord.from_member(member)
+        return self.catalog.locale, member
 
     def format_channel(self, channel: discord.abc.GuildChannel) -> str:
+        return self.format_channel_record(records.ChannelRecord.from_channel(channel))
+
+    def format_role(self, role: discord.Role) -> str:
+        return self.format_role_record(records.RoleRecord.from_role(role))
+
+    def format_member(self, member: discord.Member) -> str:
+        return self.format_member_record(records.MemberRecord.from_member(member))
+
+    def format_channel_record(self, record: records.ChannelRecord) -> str:
+        """チャンネルを写し取ったレコードを整形します。 format_channel と同じ結果を返します。
+        """
+        catalog = self.catalog
         channel_data = {
-            i18n.Channel.Name: channel.name,
-            i18n.Channel.ID: channel.id,
-            i18n.Channel.Position: channel.position,
-            i18n.Channel.Type: channel.type[0],
-            i18n.Channel.Overwrites: self.format_permission_dict(channel.overwrites)
+            catalog.channel.Name: record.name,
+            catalog.channel.ID: record.id,
+            catalog.channel.Position: record.position,
+            catalog.channel.Type: record.type_name,
+            catalog.channel.Overwrites: self.format_overwrite_pairs(record.overwrites)
         }
 
-        if isinstance(channel, discord.TextChannel):
-            channel_data[i18n.Channel.Topic] = channel.topic
-            channel_data[i18n.Channel.SlowModeDelay] = channel.slowmode_delay
-            channel_data[i18n.Channel.Nsfw] = i18n.BooleanConverter.yes_no(channel.is_nsfw())
-            channel_data[i18n.Channel.News] = i18n.BooleanConverter.yes_no(channel.is_news())
+        if record.kind == "text":
+            channel_data[catalog.channel.Topic] = record.topic
+            channel_data[catalog.channel.SlowModeDelay] = record.slowmode_delay
+            channel_data[catalog.channel.Nsfw] = catalog.yes_no(record.nsfw)
+            channel_data[catalog.channel.News] = catalog.yes_no(record.news)
 
-        if isinstance(channel, discord.VoiceChannel):
-            channel_data[i18n.Channel.BitRate] = channel.bitrate
-            channel_data[i18n.Channel.UserLimit] = channel.user_limit
+        if record.kind == "voice":
+            channel_data[catalog.channel.BitRate] = record.bitrate
+            channel_data[catalog.channel.UserLimit] = record.user_limit
 
-        if isinstance(channel, discord.CategoryChannel):
-            channel_data[i18n.Channel.Nsfw] = i18n.BooleanConverter.yes_no(channel.is_nsfw())
+        if record.kind == "category":
+            channel_data[catalog.channel.Nsfw] = catalog.yes_no(record.nsfw)
 
         return self.dumps(channel_data)
 
-    def format_role(self, role: discord.Role) -> str:
+    def format_role_record(self, record: records.RoleRecord) -> str:
+        """ロールを写し取ったレコードを整形します。 format_role と同じ結果を返します。
+        """
+        catalog = self.catalog
         role_data = {
-            i18n.Role.Name: role.name,
-            i18n.Role.Hoist: i18n.BooleanConverter.yes_no(role.hoist),
-            i18n.Role.Position: role.position,
-            i18n.Role.Mentionable: i18n.BooleanConverter.has_permission(role.mentionable),
-            i18n.Role.Permission: self.format_permission_of_role_dict(role.permissions),
-            i18n.Role.Color: str(role.color.to_rgb())
+            catalog.role.Name: record.name,
+            catalog.role.Hoist: catalog.yes_no(record.hoist),
+            catalog.role.Position: record.position,
+            catalog.role.Mentionable: catalog.has_permission(record.mentionable),
+            catalog.role.Permission: self.format_permission_pair(record.permissions, _all_permissions & ~record.permissions),
+            catalog.role.Color: str(record.color)
         }
         return self.dumps(role_data)
 
-    def format_member(self, member: discord.Member) -> str:
+    def format_member_record(self, record: records.MemberRecord) -> str:
+        """メンバーを写し取ったレコードを整形します。 format_member と同じ結果を返します。
+        """
+        catalog = self.catalog
         member_data = {
-            i18n.Member.Nick: member.nick,
-            i18n.Member.Roles: [str(role.id) for role in member.roles][1:]
+            catalog.member.Nick: record.nick,
+            catalog.member.Roles: [str(role_id) for role_id in record.role_ids]
         }
         return self.dumps(member_data)
 
     def format_guild(self, guild: discord.Guild) -> str:
+        return self.format_guild_record(records.GuildRecord.from_guild(guild))
+
+    def format_guild_record(self, record: records.GuildRecord) -> str:
+        """サーバーを写し取ったレコードを整形します。 format_guild と同じ結果を返します。
+        """
+        catalog = self.catalog
         guild_data = {
-            i18n.Guild.Region: i18n.GeneralConverter.region_name(guild.region),
-            i18n.Guild.AfkTimeout: guild.afk_timeout,
-            i18n.Guild.AfkChannelID: guild.afk_channel.id if guild.afk_channel is not None else "",
-            i18n.Guild.IconURL: str(guild.icon_url),
-            i18n.Guild.OwnerID: guild.owner_id,
-            i18n.Guild.BannerURL: str(guild.banner_url),
-            i18n.Guild.Description: guild.description,
-            i18n.Guild.MfaLevel: i18n.BooleanConverter.valid(guild.mfa_level),
-            i18n.Guild.VerificationLevel: i18n.GeneralConverter.verification_level(guild.verification_level),
-            i18n.Guild.ExplicitContentFilter: i18n.GeneralConverter.explicit_content_filter(guild.explicit_content_filter),
-            i18n.Guild.DefaultNotifications: i18n.GeneralConverter.notification_level(guild.default_notifications),
-            i18n.Guild.SplashURL: str(guild.splash_url),
-            i18n.Guild.PermiumTier: guild.premium_tier,
-            i18n.Guild.PremiumSubscriptionCount: guild.premium_subscription_count
+            catalog.guild.Region: catalog.region_name(records.enum_value(discord.VoiceRegion, record.region)),
+            catalog.guild.AfkTimeout: record.afk_timeout,
+            catalog.guild.AfkChannelID: record.afk_channel_id if record.afk_channel_id is not None else "",
+            catalog.guild.IconURL: record.icon_url,
+            catalog.guild.OwnerID: record.owner_id,
+            catalog.guild.BannerURL: record.banner_url,
+            catalog.guild.Description: record.description,
+            catalog.guild.MfaLevel: catalog.valid(record.mfa_level),
+            catalog.guild.VerificationLevel: catalog.verification_level(
+                records.enum_value(discord.VerificationLevel, record.verification_level)),
+            catalog.guild.ExplicitContentFilter: catalog.explicit_content_filter(
+                records.enum_value(discord.ContentFilter, record.explicit_content_filter)),
+            catalog.guild.DefaultNotifications: catalog.notification_level(
+                records.enum_value(discord.NotificationLevel, record.default_notifications)),
+            catalog.guild.SplashURL: record.splash_url,
+            catalog.guild.PermiumTier: record.premium_tier,
+            catalog.guild.PremiumSubscriptionCount: record.premium_subscription_count
         }
         return self.dumps(guild_data)
@@ -0,0 +1,215 @@
+from typing import List, Optional, Union
+import datetime
+import json
+import pickle
+import sqlite3
+import threading
+
+from . import diff
+from . import snapshot
+
+Timestamp = Union[datetime.datetime, float]
+
+class HistoryEntry:
+    """
+    1つのオブジェクトの1回の変更。
+
+    Attributes:
+        guild_id (int): サーバーのID。
+        commit_sha (str): 変更を記録したコミットのSHA。
+        recorded_at (datetime.datetime): 変更を検出した状態を写し取った日時（UTC）。
+        kind (str): "channel", "role", "member", "guild" のいずれか。
+        object_id (int): オブジェクトのID。
+        action (str): "added", "removed", "modified" のいずれか。
+        field (Optional[str]): 変更された属性名。追加・削除ではNone。
+        old, new: 変更前と変更後の値。追加・削除では、レコードの全ての属性の辞書が old または new に入ります。
+            タプルはJSONに保存するためリストになります。
+    """
+    __slots__ = ("guild_id", "commit_sha", "recorded_at", "kind", "object_id", "action", "field", "old", "new")
+
+    def __init__(self, guild_id: int, commit_sha: str, recorded_at: datetime.datetime, kind: str, object_id: int,
+        action: str, field: Optional[str], old, new):
+        self.guild_id = guild_id
+        self.commit_sha = commit_sha
+        self.recorded_at = recorded_at
+        self.kind = kind
+        self.object_id = object_id
+        self.action = action
+        self.field = field
+        self.old = old
+        self.new = new
+
+    def as_dict(self) -> dict:
+        return {
+            "guild_id": self.guild_id,
+            "commit_sha": self.commit_sha,
+            "recorded_at": self.recorded_at.isoformat(),
+            "kind": self.kind,
+            "id": self.object_id,
+            "action": self.action,
+            "field": self.field,
+            "old": self.old,
+            "new": self.new
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"<HistoryEntry commit_sha={self.commit_sha} recorded_at={self.recorded_at.isoformat()} kind={self.kind} "
+            f"id={self.object_id} action={self.action} field={self.field}>"
+        )
+
+class History:
+    """
+    push() で記録した変更を、オブジェクトのID・属性ごとに保存するSQLiteのファイル。
+    「このロールの権限はいつ変わったか」といった問い合わせに、GitHubのコミットを辿らずに答えられます。
+    最後に記録したサーバーの状態も保存するため、再起動後も前回の記録からの変更のみを保存します。
+    """
+
+    # 保存形式を変更した場合は値を増やし、古い内容を読み込まないようにします。
+    schema_version = 1
+
+    _columns = "guild_id, commit_sha, recorded_at, kind, object_id, action, field, old, new"
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): SQLiteのファイルのパス。存在しなければ作成します。 ":memory:" も指定できます。
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # Reporter はイベントループ外のスレッドからも利用されるため、接続を共有しロックで保護します。
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            if self._connection.execute("PRAGMA user_version").fetchone()[0] != self.schema_version:
+                self._connection.execute("DROP TABLE IF EXISTS changes")
+                self._connection.execute("DROP TABLE IF EXISTS snapshots")
+                self._connection.execute(f"PRAGMA user_version = {self.schema_version}")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS changes ("
+                "guild_id INTEGER NOT NULL, commit_sha TEXT NOT NULL, recorded_at REAL NOT NULL, kind TEXT NOT NULL, "
+                "object_id INTEGER NOT NULL, action TEXT NOT NULL, field TEXT, old TEXT, new TEXT)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS changes_by_object ON changes (object_id, recorded_at)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS changes_by_time ON changes (recorded_at)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                "guild_id INTEGER PRIMARY KEY, commit_sha TEXT NOT NULL, data BLOB NOT NULL)"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def last_snapshot(self, guild_id: int) -> Optional[snapshot.GuildSnapshot]:
+        """最後に記録したサーバーの状態を返します。記録していなければNoneを返します。
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT data FROM snapshots WHERE guild_id = ?", (guild_id,)).fetchone()
+        return pickle.loads(row[0]) if row is not None else None
+
+    def record(self, commit_sha: str, guild_snapshot: snapshot.GuildSnapshot,
+        previous: Optional[snapshot.GuildSnapshot]=None) -> diff.Changeset:
+        """previous から guild_snapshot への変更を commit_sha のコミットの変更として保存し、 guild_snapshot を最後の状態にします。
+
+        Args:
+            commit_sha (str): guild_snapshot を記録したコミットのSHA。
+            guild_snapshot (snapshot.GuildSnapshot): 記録した状態。
+            previous (Optional[snapshot.GuildSnapshot], optional): 比較する状態。
+                省略した場合は last_snapshot() の結果を利用し、それもなければ全てのオブジェクトを追加として保存します。
+
+        Returns:
+            diff.Changeset: 保存した変更。
+        """
+        if previous is None:
+            previous = self.last_snapshot(guild_snapshot.id)
+        changeset = diff.Changeset.between(previous, guild_snapshot)
+        recorded_at = guild_snapshot.captured_at.timestamp()
+        rows = []
+        for change in changeset:
+            prefix = (guild_snapshot.id, commit_sha, recorded_at, change.kind, change.id, change.action)
+            if change.action == "modified":
+                for name, (old, new) in change.fields.items():
+                    rows.append(prefix + (name, json.dumps(old, ensure_ascii=False), json.dumps(new, ensure_ascii=False)))
+            else:
+                values = _record_dict(change.old if change.old is not None else change.new)
+                old, new = (None, values) if change.action == "added" else (values, None)
+                rows.append(prefix + (None, json.dumps(old, ensure_ascii=False), json.dumps(new, ensure_ascii=False)))
+
+        data = pickle.dumps(guild_snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock, self._connection:
+            self._connection.executemany(
+                f"INSERT INTO changes ({self._columns}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO snapshots (guild_id, commit_sha, data) VALUES (?, ?, ?)",
+                (guild_snapshot.id, commit_sha, data)
+            )
+        return changeset
+
+    def history(self, object_id: int, field: Optional[str]=None) -> List[HistoryEntry]:
+        """object_id のオブジェクトの変更を古い順に返します。
+
+        Args:
+            object_id (int): チャンネル・ロール・メンバー・サーバーのID。
+            field (Optional[str], optional): 指定した場合、その属性の変更と、追加・削除のみを返します。
+
+        Examples:
+            >>> for entry in history.history(role.id, "permissions"):
+            ...     print(entry.recorded_at, entry.commit_sha, entry.old, entry.new)
+        """
+        query = f"SELECT {self._columns} FROM changes WHERE object_id = ?"
+        parameters = [object_id]
+        if field is not None:
+            query += " AND (field = ? OR field IS NULL)"
+            parameters.append(field)
+        return self._select(query + " ORDER BY recorded_at, rowid", parameters)
+
+    def changes_between(self, start: Timestamp, end: Timestamp, guild_id: Optional[int]=None,
+        kind: Optional[str]=None) -> List[HistoryEntry]:
+        """start 以上 end 未満の日時に検出した変更を古い順に返します。
+
+        Args:
+            start, end (Union[datetime.datetime, float]): 日時。タイムゾーンのない datetime はUTCとして扱います。
+            guild_id (Optional[int], optional): 指定した場合、そのサーバーの変更のみを返します。
+            kind (Optional[str], optional): 指定した場合、その種類のオブジェクトの変更のみを返します。
+        """
+        query = f"SELECT {self._columns} FROM changes WHERE recorded_at >= ? AND recorded_at < ?"
+        parameters = [_timestamp(start), _timestamp(end)]
+        if guild_id is not None:
+            query += " AND guild_id = ?"
+            parameters.append(guild_id)
+        if kind is not None:
+            query += " AND kind = ?"
+            parameters.append(kind)
+        return self._select(query + " ORDER BY recorded_at, rowid", parameters)
+
+    def _select(self, query: str, parameters: list) -> List[HistoryEntry]:
+        with self._lock:
+            rows = self._connection.execute(query, parameters).fetchall()
+        return [
+            HistoryEntry(
+                guild_id, commit_sha, datetime.datetime.fromtimestamp(recorded_at, datetime.timezone.utc), kind,
+                object_id, action, field, json.loads(old), json.loads(new)
+            )
+            for guild_id, commit_sha, recorded_at, kind, object_id, action, field, old, new in rows
+        ]
+
+def _record_dict(record) -> dict:
+    return dict(zip(record.__slots__, record.astuple()))
+
+def _timestamp(value: Timestamp) -> float:
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return value.timestamp()
+    return value
@@ -1,3 +1,5 @@
+from typing import Any, Dict, Tuple
+
 from discord import VoiceRegion, VerificationLevel, ContentFilter, NotificationLevel
 
 class PermissionTargets:
@@ -56,6 +58,90 @@ class Guild:
     PermiumTier = "サーバーブーストのレベル"
     PremiumSubscriptionCount = "サーバーのブースト数"
 
+# 以下の対応表はモジュールの読み込み時に一度だけ作成され、GeneralConverter と日本語の Catalog が共有します。
+_permission_names = {
+    "create_instant_invite": "招待の作成",
+    "kick_members": "メンバーをキック",
+    "ban_members": "メンバーをBAN",
+    "administrator": "管理者",
+    "manage_channels": "チャンネルの管理",
+    "manage_guild": "サーバー管理",
+    "add_reactions": "リアクションの追加",
+    "view_audit_log": "監査ログを表示",
+    "priority_speaker": "優先スピーカー",
+    "stream": "動画（通話内）",
+    "read_messages": "メッセージを読む",
+    "view_channel": "メッセージを読む",
+    "send_messages": "メッセージを送信",
+    "send_tts_messages": "TTSメッセージを送信",
+    "manage_messages": "メッセージの管理",
+    "embed_links": "埋め込みリンク",
+    "attach_files": "ファイルを送信",
+    "read_message_history": "メッセージ履歴を読む",
+    "mention_everyone": "@everyone、@here、全てのロールにメンション",
+    "external_emojis": "外部の絵文字の使用",
+    "use_external_emojis": "外部の絵文字の使用",
+    "view_guild_insights": "サーバーインサイトの閲覧",
+    "connect": "接続",
+    "speak": "発言（通話内）",
+    "mute_members": "メンバーをミュート",
+    "deafen_members": "メンバーのスピーカーをミュート",
+    "move_members": "メンバーを移動",
+    "use_voice_activation": "音声検出を使用",
+    "change_nickname": "ニックネームの変更",
+    "manage_nicknames": "ニックネームの管理",
+    "manage_roles": "ロールの管理",
+    "manage_permissions": "ロールの管理",
+    "manage_webhooks": "ウェブフックの管理",
+    "manage_emojis": "絵文字の管理"
+}
+
+_region_names = {
+    VoiceRegion.amsterdam: "アムステルダム",
+    VoiceRegion.brazil: "ブラジル",
+    VoiceRegion.dubai: "ドバイ",
+    VoiceRegion.eu_central: "中央ヨーロッパ",
+    VoiceRegion.eu_west: "東ヨーロッパ",
+    VoiceRegion.europe: "ヨーロッパ",
+    VoiceRegion.frankfurt: "フランクフルト",
+    VoiceRegion.hongkong: "香港",
+    VoiceRegion.india: "インド",
+    VoiceRegion.japan: "日本",
+    VoiceRegion.london: "ロンドン",
+    VoiceRegion.russia: "ロシア",
+    VoiceRegion.singapore: "シンガポール",
+    VoiceRegion.southafrica: "南アフリカ",
+    VoiceRegion.sydney: "シドニー",
+    VoiceRegion.us_central: "中央アメリカ",
+    VoiceRegion.us_west: "アメリカ西部",
+    VoiceRegion.us_east: "アメリカ東部",
+    VoiceRegion.us_south: "アメリカ南部",
+    VoiceRegion.vip_us_east: "VIP用アメリカ東部サーバー",
+    VoiceRegion.vip_us_west: "VIP用アメリカ西部サーバー",
+    VoiceRegion.amsterdam: "VIP用アムステルダムサーバー",
+}
+
+_verification_levels = {
+    VerificationLevel.low: "低：メール認証がされているアカウントのみ",
+    VerificationLevel.medium: "中：Discordに登録してから5分以上経過したアカウントのみ",
+    VerificationLevel.high: "高：このサーバーのメンバーとなってから10分以上経過したメンバーのみ",
+    VerificationLevel.very_high: "最高：電話認証がされているアカウントのみ",
+    VerificationLevel.table_flip: "高：このサーバーのメンバーとなってから10分以上経過したメンバーのみ",
+    VerificationLevel.extreme: "最高：電話認証がされているアカウントのみ",
+    VerificationLevel.double_table_flip: "最高：電話認証がされているアカウントのみ"
+}
+
+_content_filters = {
+    ContentFilter.disabled: "いかなるメディアコンテンツもスキャンしない",
+    ContentFilter.no_role: "ロールのないメンバーのメディアコンテンツをスキャン",
+    ContentFilter.all_members: "全てのメンバーのメディアコンテンツをスキャン"
+}
+
+_notification_levels = {
+    NotificationLevel.all_messages: "すべてのメッセージ",
+    NotificationLevel.only_mentions: "@mentionsのみ"
+}
+
 class GeneralConverter:
     """一般的なDiscordモデルの情報を整形するクラス。
     """    
@@ -69,44 +155,7 @@ class GeneralConverter:
         Returns:
             str: 対応する日本語訳。もし見つからなければperm_nameがそのまま返ります。
         """        
-        perm_name_meaning_dict = {
-            "create_instant_invite": "招待の作成",
-            "kick_members": "メンバーをキック",
-            "ban_members": "メンバーをBAN",
-            "administrator": "管理者",
-            "manage_channels": "チャンネルの管理",
-            "manage_guild": "サーバー管理",
-            "add_reactions": "リアクションの追加",
-            "view_audit_log": "監査ログを表示",
-            "priority_speaker": "優先スピーカー",
-            "stream": "動画（通話内）",
-            "read_messages": "メッセージを読む",
-            "view_channel": "メッセージを読む",
-            "send_messages": "メッセージを送信",
-            "send_tts_messages": "TTSメッセージを送信",
-            "manage_messages": "メッセージの管理",
-            "embed_links": "埋め込みリンク",
-            "attach_files": "ファイルを送信",
-            "read_message_history": "メッセージ履歴を読む",
-            "mention_everyone": "@everyone、@here、全てのロールにメンション",
-            "external_emojis": "外部の絵文字の使用",
-            "use_external_emojis": "外部の絵文字の使用",
-            "view_guild_insights": "サーバーインサイトの閲覧",
-            "connect": "接続",
-            "speak": "発言（通話内）",
-            "mute_members": "メンバーをミュート",
-            "deafen_members": "メンバーのスピーカーをミュート",
-            "move_members": "メンバーを移動",
-            "use_voice_activation": "音声検出を使用",
-            "change_nickname": "ニックネームの変更",
-            "manage_nicknames": "ニックネームの管理",
-            "manage_roles": "ロールの管理",
-            "manage_permissions": "ロールの管理",
-            "manage_webhooks": "ウェブフックの管理",
-            "manage_emojis": "絵文字の管理"
-        }
-
-        return perm_name_meaning_dict.get(perm_name,perm_name)
+        return _permission_names.get(perm_name,perm_name)
 
     @staticmethod
     def region_name(region: VoiceRegion) -> str:
@@ -118,31 +167,7 @@ class GeneralConverter:
         Returns:
             str: 対応する日本語訳。もし見つからなければregionがそのまま返ります。
         """      
-        region_name_meaning_dict = {
-            VoiceRegion.amsterdam: "アムステルダム",
-            VoiceRegion.brazil: "ブラジル",
-            VoiceRegion.dubai: "ドバイ",
-            VoiceRegion.eu_central: "中央ヨーロッパ",
-            VoiceRegion.eu_west: "東ヨーロッパ",
-            VoiceRegion.europe: "ヨーロッパ",
-            VoiceRegion.frankfurt: "フランクフルト",
-            VoiceRegion.hongkong: "香港",
-            VoiceRegion.india: "インド",
-            VoiceRegion.japan: "日本",
-            VoiceRegion.london: "ロンドン",
-            VoiceRegion.russia: "ロシア",
-            VoiceRegion.singapore: "シンガポール",
-            VoiceRegion.southafrica: "南アフリカ",
-            VoiceRegion.sydney: "シドニー",
-            VoiceRegion.us_central: "中央アメリカ",
-            VoiceRegion.us_west: "アメリカ西部",
-            VoiceRegion.us_east: "アメリカ東部",
-            VoiceRegion.us_south: "アメリカ南部",
-            VoiceRegion.vip_us_east: "VIP用アメリカ東部サーバー",
-            VoiceRegion.vip_us_west: "VIP用アメリカ西部サーバー",
-            VoiceRegion.amsterdam: "VIP用アムステルダムサーバー",
-        }
-        return region_name_meaning_dict.get(region, region)
+        return _region_names.get(region, region)
 
     @staticmethod
     def verification_level(level: VerificationLevel) -> str:
@@ -154,16 +179,7 @@ class GeneralConverter:
         Returns:
             str: 対応する日本語訳。もし見つからなければlevelがそのまま返ります。
         """      
-        verification_level_meaning_dict = {
-            VerificationLevel.low: "低：メール認証がされているアカウントのみ",
-            VerificationLevel.medium: "中：Discordに登録してから5分以上経過したアカウントのみ",
-            VerificationLevel.high: "高：このサーバーのメンバーとなってから10分以上経過したメンバーのみ",
-            VerificationLevel.very_high: "最高：電話認証がされているアカウントのみ",
-            VerificationLevel.table_flip: "高：このサーバーのメンバーとなってから10分以上経過したメンバーのみ",
-            VerificationLevel.extreme: "最高：電話認証がされているアカウントのみ",
-            VerificationLevel.double_table_flip: "最高：電話認証がされているアカウントのみ"
-        }
-        return verification_level_meaning_dict.get(level,level)
+        return _verification_levels.get(level,level)
 
     @staticmethod
     def explicit_content_filter(filter_: ContentFilter) -> str:
@@ -175,12 +191,7 @@ class GeneralConverter:
         Returns:
             str: 対応する日本語訳。もし見つからなければfilter_がそのまま返ります。
         """      
-        content_fileter_meaning_dict = {
-            ContentFilter.disabled: "いかなるメディアコンテンツもスキャンしない",
-            ContentFilter.no_role: "ロールのないメンバーのメディアコンテンツをスキャン",
-            ContentFilter.all_members: "全てのメンバーのメディアコンテンツをスキャン"
-        }
-        return content_fileter_meaning_dict.get(filter_, filter_)
+        return _content_filters.get(filter_, filter_)
 
     @staticmethod
     def notification_level(level: NotificationLevel) -> str:
@@ -192,11 +203,12 @@ class GeneralConverter:
         Returns:
             str: 対応する日本語訳。もし見つからなければlevelがそのまま返ります。
         """      
-        notification_levl_meaning_dict = {
-            NotificationLevel.all_messages: "すべてのメッセージ",
-            NotificationLevel.only_mentions: "@mentionsのみ"
-        }
-        return notification_levl_meaning_dict.get(level, level)
+        return _notification_levels.get(level, level)
+
+_yes_no = ("いいえ", "はい")
+_has_permission = ("不可", "可")
+_do = ("しない", "する")
+_valid = ("無効", "有効")
 
 class BooleanConverter:
     """一部のBool値を日本語に変換するクラス。
@@ -211,7 +223,7 @@ class BooleanConverter:
         Returns:
             str: 対応する いいえ, または はい。
         """        
-        return ["いいえ", "はい"][value]
+        return _yes_no[value]
 
     @staticmethod
     def has_permission(value: bool) -> str:
@@ -223,7 +235,7 @@ class BooleanConverter:
         Returns:
             str: 対応する 不可, または 可。
         """    
-        return ["不可","可"][value]
+        return _has_permission[value]
 
     @staticmethod
     def do(value: bool) -> str:
@@ -235,7 +247,7 @@ class BooleanConverter:
         Returns:
             str: 対応する しない, または する。
         """    
-        return ["しない","する"][value]
+        return _do[value]
 
     @staticmethod
     def valid(value: bool) -> str:
@@ -247,4 +259,287 @@ class BooleanConverter:
         Returns:
             str: 対応する 無効, または 有効。
         """    
-        return ["無効","有効"][value]
+        return _valid[value]
+
+class EnglishPermissionTargets:
+    """PermissionTargets に対応する英語訳。
+    """
+    Role = "Roles"
+    Member = "Members"
+
+class EnglishChannel:
+    """Channel に対応する英語訳。
+    """
+    Name = "Name"
+    ID = "ID"
+    Position = "Position"
+    Type = "Type"
+    Overwrites = "Permission Overwrites"
+    Topic = "Topic"
+    SlowModeDelay = "Slowmode"
+    Nsfw = "NSFW Channel"
+    News = "Announcement Channel"
+    BitRate = "Bitrate"
+    UserLimit = "User Limit"
+
+class EnglishRole:
+    """Role に対応する英語訳。
+    """
+    Name = "Name"
+    Hoist = "Display role members separately from online members"
+    Position = "Position"
+    Mentionable = "Allow anyone to @mention this role"
+    Permission = "Permissions"
+    Color = "Color (RGB)"
+
+class EnglishMember:
+    """Member に対応する英語訳。
+    """
+    Nick = "Nickname"
+    Roles = "Role IDs"
+
+class EnglishGuild:
+    """Guild に対応する英語訳。
+    """
+    Name = "Name"
+    Region = "Server Region"
+    AfkTimeout = "Inactive Timeout"
+    AfkChannelID = "Inactive Channel ID"
+    IconURL = "Icon URL"
+    OwnerID = "Owner ID"
+    BannerURL = "Banner URL"
+    Description = "Description"
+    MfaLevel = "Two-Factor Authentication"
+    VerificationLevel = "Verification Level"
+    ExplicitContentFilter = "Explicit Media Content Filter"
+    DefaultNotifications = "Default Notification Settings"
+    SplashURL = "Invite Splash URL"
+    PermiumTier = "Server Boost Level"
+    PremiumSubscriptionCount = "Server Boost Count"
+
+_english_permission_names = {
+    "create_instant_invite": "Create Invite",
+    "kick_members": "Kick Members",
+    "ban_members": "Ban Members",
+    "administrator": "Administrator",
+    "manage_channels": "Manage Channels",
+    "manage_guild": "Manage Server",
+    "add_reactions": "Add Reactions",
+    "view_audit_log": "View Audit Log",
+    "priority_speaker": "Priority Speaker",
+    "stream": "Video",
+    "read_messages": "Read Messages",
+    "view_channel": "Read Messages",
+    "send_messages": "Send Messages",
+    "send_tts_messages": "Send TTS Messages",
+    "manage_messages": "Manage Messages",
+    "embed_links": "Embed Links",
+    "attach_files": "Attach Files",
+    "read_message_history": "Read Message History",
+    "mention_everyone": "Mention @everyone, @here, and All Roles",
+    "external_emojis": "Use External Emoji",
+    "use_external_emojis": "Use External Emoji",
+    "view_guild_insights": "View Server Insights",
+    "connect": "Connect",
+    "speak": "Speak",
+    "mute_members": "Mute Members",
+    "deafen_members": "Deafen Members",
+    "move_members": "Move Members",
+    "use_voice_activation": "Use Voice Activity",
+    "change_nickname": "Change Nickname",
+    "manage_nicknames": "Manage Nicknames",
+    "manage_roles": "Manage Roles",
+    "manage_permissions": "Manage Roles",
+    "manage_webhooks": "Manage Webhooks",
+    "manage_emojis": "Manage Emojis"
+}
+
+_english_region_names = {
+    VoiceRegion.amsterdam: "Amsterdam",
+    VoiceRegion.brazil: "Brazil",
+    VoiceRegion.dubai: "Dubai",
+    VoiceRegion.eu_central: "Central Europe",
+    VoiceRegion.eu_west: "Western Europe",
+    VoiceRegion.europe: "Europe",
+    VoiceRegion.frankfurt: "Frankfurt",
+    VoiceRegion.hongkong: "Hong Kong",
+    VoiceRegion.india: "India",
+    VoiceRegion.japan: "Japan",
+    VoiceRegion.london: "London",
+    VoiceRegion.russia: "Russia",
+    VoiceRegion.singapore: "Singapore",
+    VoiceRegion.southafrica: "South Africa",
+    VoiceRegion.sydney: "Sydney",
+    VoiceRegion.us_central: "US Central",
+    VoiceRegion.us_west: "US West",
+    VoiceRegion.us_east: "US East",
+    VoiceRegion.us_south: "US South",
+    VoiceRegion.vip_us_east: "VIP US East",
+    VoiceRegion.vip_us_west: "VIP US West",
+    VoiceRegion.vip_amsterdam: "VIP Amsterdam"
+}
+
+_english_verification_levels = {
+    VerificationLevel.low: "Low: must have a verified email on their Discord account",
+    VerificationLevel.medium: "Medium: must be registered on Discord for longer than 5 minutes",
+    VerificationLevel.high: "High: must be a member of this server for longer than 10 minutes",
+    VerificationLevel.very_high: "Highest: must have a verified phone on their Discord account"
+}
+
+_english_content_filters = {
+    ContentFilter.disabled: "Don't scan any media content",
+    ContentFilter.no_role: "Scan media content from members without a role",
+    ContentFilter.all_members: "Scan media content from all members"
+}
+
+_english_notification_levels = {
+    NotificationLevel.all_messages: "All Messages",
+    NotificationLevel.only_mentions: "Only @mentions"
+}
+
+_index_template = """
+# $GUILD_NAME
+このページは各データにアクセスするための目次ページです。
+オブジェクトに対する変更をGitHub側の差分機能で正確に検知するため、デフォルトの実装では各ファイルは該当オブジェクトのIDを名前としているため、このようなページを自動生成しています。
+また、デフォルトの実装では各オブジェクトを JSON 形式で保存しています。
+
+## チャンネル一覧
+
+$CHANNEL_LIST
+
+## ロール一覧
+
+$ROLE_LIST
+
+## メンバー一覧
+
+$MEMBER_LIST
+"""
+
+_english_index_template = """
+# $GUILD_NAME
+This page is an index for accessing each record.
+To let GitHub's diff track changes to each object precisely, the default implementation names every file after the object's ID, so this page is generated automatically.
+The default implementation also stores each object as JSON.
+
+## Channels
+
+$CHANNEL_LIST
+
+## Roles
+
+$ROLE_LIST
+
+## Members
+
+$MEMBER_LIST
+"""
+
+_index_page_template = """
+# $GUILD_NAME $TITLE
+
+$LIST
+"""
+
+_index_titles = {"channels": "チャンネル一覧", "roles": "ロール一覧", "members": "メンバー一覧"}
+
+_english_index_titles = {"channels": "Channels", "roles": "Roles", "members": "Members"}
+
+class Catalog:
+    """1つの言語の翻訳をまとめたもの。
+    対応表は作成時に一度だけ渡され、各メソッドは辞書やリストを作らずに参照のみを行います。
+
+    Attributes:
+        locale (str): 言語コード。
+        permission_targets, channel, role, member, guild: 各属性の訳を持つ PermissionTargets 等と同じ形式のクラス。
+        index_template (str): 目次ページのテンプレート。
+        index_page_template (str): 目次を分割する場合の、各ページのテンプレート。 $GUILD_NAME, $TITLE, $LIST を置き換えます。
+        index_titles (Dict[str, str]): 分割した目次の "channels", "roles", "members" の各ページの見出し。
+    """
+
+    def __init__(self, locale: str, permission_targets: type, channel: type, role: type, member: type, guild: type,
+        permission_names: Dict[str, str], region_names: Dict[Any, str], verification_levels: Dict[Any, str],
+        content_filters: Dict[Any, str], notification_levels: Dict[Any, str],
+        yes_no: Tuple[str, str], has_permission: Tuple[str, str], do: Tuple[str, str], valid: Tuple[str, str],
+        index_template: str, index_page_template: str, index_titles: Dict[str, str]):
+        self.locale = locale
+        self.permission_targets = permission_targets
+        self.channel = channel
+        self.role = role
+        self.member = member
+        self.guild = guild
+        self.permission_names = permission_names
+        self.region_names = region_names
+        self.verification_levels = verification_levels
+        self.content_filters = content_filters
+        self.notification_levels = notification_levels
+        self.yes_no_words = yes_no
+        self.has_permission_words = has_permission
+        self.do_words = do
+        self.valid_words = valid
+        self.index_template = index_template
+        self.index_page_template = index_page_template
+        self.index_titles = index_titles
+
+    def permission_name(self, perm_name: str) -> str:
+        """GeneralConverter.permission_name と同様に、権限名の訳を返します。見つからなければ perm_name をそのまま返します。
+        """
+        return self.permission_names.get(perm_name, perm_name)
+
+    def region_name(self, region: VoiceRegion) -> str:
+        return self.region_names.get(region, region)
+
+    def verification_level(self, level: VerificationLevel) -> str:
+        return self.verification_levels.get(level, level)
+
+    def explicit_content_filter(self, filter_: ContentFilter) -> str:
+        return self.content_filters.get(filter_, filter_)
+
+    def notification_level(self, level: NotificationLevel) -> str:
+        return self.notification_levels.get(level, level)
+
+    def yes_no(self, value: bool) -> str:
+        return self.yes_no_words[value]
+
+    def has_permission(self, value: bool) -> str:
+        return self.has_permission_words[value]
+
+    def do(self, value: bool) -> str:
+        return self.do_words[value]
+
+    def valid(self, value: bool) -> str:
+        return self.valid_words[value]
+
+JAPANESE = Catalog(
+    "ja", PermissionTargets, Channel, Role, Member, Guild,
+    _permission_names, _region_names, _verification_levels, _content_filters, _notification_levels,
+    _yes_no, _has_permission, _do, _valid,
+    _index_template, _index_page_template, _index_titles
+)
+
+ENGLISH = Catalog(
+    "en", EnglishPermissionTargets, EnglishChannel, EnglishRole, EnglishMember, EnglishGuild,
+    _english_permission_names, _english_region_names, _english_verification_levels,
+    _english_content_filters, _english_notification_levels,
+    ("No", "Yes"), ("Denied", "Allowed"), ("No", "Yes"), ("Disabled", "Enabled"),
+    _english_index_template, _index_page_template, _english_index_titles
+)
+
+catalogs: Dict[str, Catalog] = {
+    JAPANESE.locale: JAPANESE,
+    ENGLISH.locale: ENGLISH
+}
+
+def get_catalog(locale: str) -> Catalog:
+    """言語コードに対応する Catalog を返します。
+
+    Args:
+        locale (str): "ja" または "en"。
+
+    Raises:
+        ValueError: 対応していない言語コードが渡されました。
+    """
+    try:
+        return catalogs[locale]
+    except KeyError:
+        raise ValueError(f"対応していない言語です: {locale} （利用可能: {', '.join(catalogs)}）") from None
@@ -1,5 +1,9 @@
-from typing import List
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Set, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import logging
 import sys
+import time
 from string import Template
 import os
 
@@ -8,151 +12,906 @@ import discord
 
 from . import util
 from . import create_elements
+from . import format_model
+from . import storage
+from . import i18n
+from . import records
+from . import snapshot
+from . import diff
+from . import manifest
+from . import metrics
+from . import clients
+from . import restore
+from . import history
+from . import checkpoint
 
-index_template = """
-# $GUILD_NAME
-このページは各データにアクセスするための目次ページです。
-オブジェクトに対する変更をGitHub側の差分機能で正確に検知するため、デフォルトの実装では各ファイルは該当オブジェクトのIDを名前としているため、このようなページを自動生成しています。
-また、デフォルトの実装では各オブジェクトを JSON 形式で保存しています。
+index_template = i18n.JAPANESE.index_template
 
-## チャンネル一覧
+logger = logging.getLogger(__name__)
 
-$CHANNEL_LIST
+class BaseReporter:
+    """Reporter と AsyncReporter に共通する、GitTreeの要素を生成する処理をまとめた基底クラス。
+    """
 
-## ロール一覧
-
-$ROLE_LIST
-
-## メンバー一覧
-
-$MEMBER_LIST
-"""
-
-class Reporter:
-    """Discordサーバーの情報をGitHubに記録する起点。
-    """    
-    
-    def __init__(self, guild: discord.Guild, github_token: str, repository_name:str, 
-        branch_name:str="main", element_creator:create_elements.GitTreeElementCreator=None, allow_new_repository=False):
-        """[summary]
+    def __init__(self, guild: discord.Guild, branch_name:str="main", 
+        element_creator:create_elements.GitTreeElementCreator=None, incremental=False, locale="ja", index_page_digits=0,
+        manifest: Optional[manifest.Manifest]=None, history: Optional[history.History]=None):
+        """
         Args:
             guild (discord.Guild): 記録を行うサーバー。
-            github_token (str): GitHubアカウントのアクセストークン。
-            repository_name (str): リポジトリ名。
             branch_name (str, optional): 記録を行うブランチ名. Defaults to "main".
             element_creator (create_elements.GitTreeElementCreator, optional): GitTreeの生成を行うオブジェクト。 Defaults to None.
-            allow_new_repository (str, optional): もし repository_name に該当するリポジトリが見つからなかったとき、Trueなら新規作成します。
+            incremental (bool, optional): Trueなら、ブランチの先頭のツリーと比較して追加・変更・削除されたファイルのみを送信します。 Defaults to False.
+            locale (str, optional): 目次と、element_creator を省略した場合の各ファイルに利用する言語（"ja" または "en"）。 Defaults to "ja".
+            index_page_digits (int, optional): 0より大きければ、目次をチャンネル・ロール・メンバー（IDの末尾 index_page_digits 桁ごと）のページに分け、
+                index.md にはそれらへのリンクのみを載せます。メンバーの参加・脱退で差分が出るのは該当するページのみになります。 Defaults to 0.
+            manifest (Optional[manifest.Manifest], optional): 記録したツリーのファイルの対応を保存する先。
+                ブランチの先頭が保存したコミットと一致すれば、 incremental の差分の計算にリモートのツリーの取得を省略します。 Defaults to None.
+            history (Optional[history.History], optional): push() で記録した変更をオブジェクトのID・属性ごとに保存する先。 Defaults to None.
 
         Raises:
             NotImplementedError: element_creator は create_elements.GitTreeElementCreator を実装している必要があります。
-        """        
+            ValueError: 対応していない言語が指定されました。
+        """
         self.branch_name = branch_name
+        self.manifest = manifest
+        self.history = history
+        self.catalog = i18n.get_catalog(locale)
         if not isinstance(element_creator, create_elements.GitTreeElementCreator):
             if element_creator is None:
-                self.element_creator = create_elements.DefaultTreeCreator()
+                element_creator = create_elements.DefaultTreeCreator(
+                    formatter=format_model.DefaultFormatter(locale=locale)
+                    )
             else:
                 raise NotImplementedError(
                     "element_creator は create_elements.GitTreeElementCreatorを実装している必要があります。"
                     )
+        self.element_creator = element_creator
         self.ref_name = "heads/" + self.branch_name
-
+        self.incremental = incremental
         self.guild = guild
-        self.github_client = github.Github(github_token)
-        try:
-            self.repository: github.Repository = self.github_client.get_user().get_repo(repository_name)
-        except github.UnknownObjectException:
-            if not allow_new_repository:
-                raise ValueError(f"{repository_name} という名前のリポジトリは見つかりませんでした。")
-            else:
-                self.repository: github.Repository = self.github_client.get_user().create_repo(repository_name,auto_init=True)
+        self.index_page_digits = index_page_digits
+        self._index_template = Template(self.catalog.index_template)
+        self._page_template = Template(self.catalog.index_page_template)
+        self._template_files: Dict[str, Tuple[int, Template]] = {}
+        self._index_pages: Dict[str, Tuple[tuple, github.InputGitTreeElement]] = {}
+        # 最後に push() で記録したサーバーの状態。 diff() の比較対象です。 history があれば、最初の比較時にその最後の状態を読み込みます。
+        self.last_snapshot: Optional[snapshot.GuildSnapshot] = None
+        # 最後の push() の計測結果と、 push() の完了ごとに計測結果を受け取る関数。
+        self.last_metrics: Optional[metrics.PushMetrics] = None
+        self.metrics_hooks: List[Callable[[metrics.PushMetrics], None]] = []
+
+    @property
+    def html_url(self) -> str:
+        """記録先のリポジトリのGitHub上のURL。
+        """
+        raise NotImplementedError
 
+    def _get_template(self, template_path: str="") -> Template:
+        """目次のテンプレートを返します。一度読み込んだテンプレートは、ファイルが更新されるまで使い回します。
+        """
+        if not template_path:
+            return self._index_template
 
-    def create_index_content(self, by_category, members, roles, template_path=""):
+        modified_time = os.stat(template_path).st_mtime_ns
+        cached = self._template_files.get(template_path)
+        if cached is not None and cached[0] == modified_time:
+            return cached[1]
+        with open(template_path, "r",encoding="utf-8") as f:
+            lines = f.readlines()
+        template = Template("\n".join(lines))
+        self._template_files[template_path] = (modified_time, template)
+        return template
+
+    @staticmethod
+    def _channel_type_name(channel: Union[discord.abc.GuildChannel, records.ChannelRecord]) -> str:
+        if isinstance(channel, records.ChannelRecord):
+            return channel.type_name
+        return channel.type[0]
+
+    def _channel_index_lines(self, by_category, url_base: str) -> List[str]:
         channel_text_list = []
-        channel_url_base = f"{self.repository.html_url}/blob/{self.branch_name}/channels"
         for category, channels in by_category:
             if category is not None:
-                channel_url = f"{channel_url_base}/{category.id}.json"
-                channel_text_list.append(f"- [{category.name}]({channel_url}) *[{category.type[0]}]*")
+                channel_url = f"{url_base}/{self.element_creator.channel_path(category)}"
+                channel_text_list.append(f"- [{category.name}]({channel_url}) *[{self._channel_type_name(category)}]*")
             
             for channel in channels:
+                channel_url = f"{url_base}/{self.element_creator.channel_path(channel)}"
                 if category is None:
-                    channel_url = f"{channel_url_base}/{channel.id}.json"
-                    channel_text_list.append(f"- [{channel.name}]({channel_url}) *[{channel.type[0]}]*")
+                    channel_text_list.append(f"- [{channel.name}]({channel_url}) *[{self._channel_type_name(channel)}]*")
                 else:
-                    channel_url = f"{channel_url_base}/{category.id}/{channel.id}.json"
-                    channel_text_list.append(f"\t- [{channel.name}]({channel_url}) *[{channel.type[0]}]*")
-                
+                    channel_text_list.append(f"\t- [{channel.name}]({channel_url}) *[{self._channel_type_name(channel)}]*")
+        return channel_text_list
 
-        member_text_list = []
-        for member in members:
-            member_url = f"{self.repository.html_url}/blob/{self.branch_name}/members/{member.id}.json"
-            member_text_list.append(f"- [{member.name}]({member_url})")
+    def _role_index_lines(self, roles: Iterable[discord.Role], url_base: str) -> List[str]:
+        return [f"- [{role.name}]({url_base}/{self.element_creator.role_path(role)})" for role in roles]
 
-        role_text_list = []
-        for role in roles:
-            role_url = f"{self.repository.html_url}/blob/{self.branch_name}/roles/{role.id}.json"
-            role_text_list.append(f"- [{role.name}]({role_url})")
-            
-        if template_path:
-            with open(template_path, "r",encoding="utf-8") as f:
-                lines = f.readlines()
-            template = Template("\n".join(lines))
-        else:
-            template = Template(index_template)
+    def _member_index_lines(self, members: Iterable[discord.Member], url_base: str) -> List[str]:
+        return [f"- [{member.name}]({url_base}/{self.element_creator.member_path(member)})" for member in members]
 
+    def create_index_content(self, by_category, members, roles, template_path="", guild_name: Optional[str]=None):
+        url_base = f"{self.html_url}/blob/{self.branch_name}"
+        template = self._get_template(template_path)
         return template.substitute(
-            GUILD_NAME=self.guild.name, CHANNEL_LIST="\n".join(channel_text_list), 
-            ROLE_LIST="\n".join(role_text_list), MEMBER_LIST="\n".join(member_text_list)
+            GUILD_NAME=self.guild.name if guild_name is None else guild_name, CHANNEL_LIST="\n".join(self._channel_index_lines(by_category, url_base)), 
+            ROLE_LIST="\n".join(self._role_index_lines(roles, url_base)),
+            MEMBER_LIST="\n".join(self._member_index_lines(members, url_base))
         )
 
-    def create_git_tree(self) -> github.GitTree:
-        """element_creatorを利用してgithub.GitTreeを作成し返します。
+    def member_index_page(self, member_id: Union[int, str]) -> str:
+        """目次を分割する場合に、メンバーが載るページの名前（IDの末尾 index_page_digits 桁）を返します。
+        """
+        return str(member_id)[-self.index_page_digits:]
+
+    def member_index_page_path(self, page: str) -> str:
+        return f"index/members/{page}.md"
+
+    def _iter_index_elements(self, sorted_by_category, channels_page=True, roles_page=True,
+        member_pages: Optional[Set[str]]=None, source: Union[discord.Guild, snapshot.GuildSnapshot, None]=None
+        ) -> Iterator[github.InputGitTreeElement]:
+        """目次の要素を作成します。 index_page_digits が0なら index.md のみを、そうでなければ
+        チャンネル・ロール・メンバー（IDの末尾の桁ごと）に分けたページと、それらへのリンクを載せた index.md を作成します。
+
+        Args:
+            source (Union[discord.Guild, snapshot.GuildSnapshot, None], optional): サーバー名・ロール・メンバーを読み取る対象。
+                Noneなら self.guild を利用します。
+            channels_page (bool, optional): Falseならチャンネル一覧のページを作成しません。
+            roles_page (bool, optional): Falseならロール一覧のページを作成しません。
+            member_pages (Optional[Set[str]], optional): 作成するメンバー一覧のページの名前。Noneなら全てのページを作成します。
+                メンバーがいなくなったページは削除する要素になります。
+        """
+        if source is None:
+            source = self.guild
+        if not self.index_page_digits:
+            yield self.element_creator.create_index_element(
+                self.create_index_content(sorted_by_category, source.members, source.roles, guild_name=source.name)
+                )
+            return
+
+        url_base = f"{self.html_url}/blob/{self.branch_name}"
+        titles = self.catalog.index_titles
+        if channels_page:
+            yield self._create_index_page("index/channels.md", titles["channels"],
+                self._channel_index_lines(sorted_by_category, url_base), source.name)
+        if roles_page:
+            yield self._create_index_page("index/roles.md", titles["roles"],
+                self._role_index_lines(source.roles, url_base), source.name)
+
+        members_by_page: Dict[str, List[discord.Member]] = {}
+        existing_pages = set()
+        for member in source.members:
+            page = self.member_index_page(member.id)
+            existing_pages.add(page)
+            if member_pages is None or page in member_pages:
+                members_by_page.setdefault(page, []).append(member)
+
+        for page in sorted(existing_pages if member_pages is None else member_pages):
+            path = self.member_index_page_path(page)
+            if page in members_by_page:
+                yield self._create_index_page(path, f"{titles['members']} ({page})",
+                    self._member_index_lines(members_by_page[page], url_base), source.name)
+            else:
+                self._index_pages.pop(path, None)
+                yield github.InputGitTreeElement(path, "100644", "blob", sha=None)
+
+        template = self._index_template
+        member_links = [
+            f"- [{titles['members']} ({page})]({url_base}/{self.member_index_page_path(page)})"
+            for page in sorted(existing_pages)
+        ]
+        yield self.element_creator.create_index_element(template.substitute(
+            GUILD_NAME=source.name,
+            CHANNEL_LIST=f"- [{titles['channels']}]({url_base}/index/channels.md)",
+            ROLE_LIST=f"- [{titles['roles']}]({url_base}/index/roles.md)",
+            MEMBER_LIST="\n".join(member_links)
+        ))
+
+    def _create_index_page(self, path: str, title: str, lines: List[str], guild_name: str) -> github.InputGitTreeElement:
+        """分割した目次の1ページの要素を作成します。載せる内容が前回と同じページは、前回の要素をそのまま返します。
+        """
+        key = (guild_name, title, lines)
+        cached = self._index_pages.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        content = self._page_template.substitute(
+            GUILD_NAME=guild_name, TITLE=title, LIST="\n".join(lines)
+        )
+        element = self.element_creator.create_index_page_element(path, content)
+        self._index_pages[path] = (key, element)
+        return element
+
+    def capture_snapshot(self) -> snapshot.GuildSnapshot:
+        """サーバーの現在の状態を snapshot.GuildSnapshot に写し取ります。
+        """
+        return snapshot.GuildSnapshot.capture(self.guild)
+
+    def diff(self, guild_snapshot: Optional[snapshot.GuildSnapshot]=None) -> diff.Changeset:
+        """最後に push() で記録した状態と現在のサーバーを比較し、追加・削除・変更されたオブジェクトを返します。
+        このプロセスでまだ記録していなければ、 history に保存した最後の状態と比較します。
+        ローカルの状態のみを比較するため、APIへのリクエストは行いません。まだ記録していなければ全てのオブジェクトが追加として返されます。
+        比較するのはレコードに写し取る属性のみのため、それ以外の属性を出力する独自のフォーマッターでは変更を検出できないことがあります。
+
+        Args:
+            guild_snapshot (Optional[snapshot.GuildSnapshot], optional): 比較する状態。省略した場合は capture_snapshot() の結果を利用します。
+        """
+        if guild_snapshot is None:
+            guild_snapshot = self.capture_snapshot()
+        return diff.Changeset.between(self._previous_snapshot(guild_snapshot.id), guild_snapshot)
+
+    def _previous_snapshot(self, guild_id: int) -> Optional[snapshot.GuildSnapshot]:
+        """最後に記録した状態を返します。このプロセスでまだ記録していなければ、 history に保存した最後の状態を読み込みます。
+        """
+        if self.last_snapshot is None and self.history is not None:
+            self.last_snapshot = self.history.last_snapshot(guild_id)
+        return self.last_snapshot
+
+    def _partial_snapshot(self, guild_snapshot: snapshot.GuildSnapshot, object_ids: Optional[Iterable[int]],
+        include_guild: bool) -> snapshot.GuildSnapshot:
+        """push_elements() で記録した状態を返します。 object_ids を省略した場合は guild_snapshot の全体を記録したものとします。
+        """
+        previous = self._previous_snapshot(guild_snapshot.id)
+        if object_ids is None or previous is None:
+            return guild_snapshot
+        return previous.updated(guild_snapshot, set(object_ids), include_guild)
+
+    def _snapshot_for_elements(self, guild_snapshot: snapshot.GuildSnapshot) -> Optional[snapshot.GuildSnapshot]:
+        # レコードに対応していない element_creator では、スナップショットは比較のみに利用し、要素は現在の self.guild から作成します。
+        return guild_snapshot if self.element_creator.supports_records else None
+
+    def add_metrics_hook(self, hook: Callable[[metrics.PushMetrics], None]):
+        """push() が完了するごとに、その計測結果を渡して hook を呼び出します。
+        hook で発生した例外はログに記録し、 push() の結果には影響しません。
+
+        Examples:
+            >>> reporter.add_metrics_hook(lambda m: print(m.samples()))
+        """
+        self.metrics_hooks.append(hook)
+
+    def _finish_metrics(self, push_metrics: metrics.PushMetrics, request_count: int, rate_limit_remaining: Optional[int],
+        bytes_uploaded: int=0):
+        push_metrics.increment("requests", request_count)
+        # リモートに存在し送信を省略したblobを含めないよう、送信したバイト数は記録先から受け取ります。
+        push_metrics.increment("bytes_uploaded", bytes_uploaded)
+        push_metrics.rate_limit_remaining = rate_limit_remaining
+        self.last_metrics = push_metrics
+        for hook in self.metrics_hooks:
+            try:
+                hook(push_metrics)
+            except Exception:
+                logger.exception("計測結果のフック %r の実行に失敗しました。", hook)
+
+    def _record_history(self, commit_sha: str, guild_snapshot: snapshot.GuildSnapshot, push_metrics: metrics.PushMetrics):
+        """history に、前回の push() から guild_snapshot までの変更を保存します。
+        前回の状態を保持していなければ、 history に保存した最後の状態と比較します。
+        """
+        if self.history is None:
+            return
+        with push_metrics.phase("history"):
+            self.history.record(commit_sha, guild_snapshot, self._previous_snapshot(guild_snapshot.id))
+
+    @staticmethod
+    def _count_files(push_metrics: metrics.PushMetrics, counter: str, elements: List[github.InputGitTreeElement]):
+        push_metrics.increment(f"files_{counter}", len(elements))
+        if counter == "total":
+            push_metrics.increment("bytes_serialized", sum(util.element_content_size(element) for element in elements))
+
+    @staticmethod
+    def _iter_counted(push_metrics: metrics.PushMetrics, counter: str, elements: Iterable[github.InputGitTreeElement],
+        blobs: Optional[Dict[str, Optional[str]]]=None) -> Iterator[github.InputGitTreeElement]:
+        """elements を1つずつ返しながら、 _count_files と同じ値を数えます。
+        blobs を渡すと、 _element_blobs と同じパスとblobのSHAの対応を書き込みます。
+        """
+        count = size = 0
+        try:
+            for element in elements:
+                count += 1
+                if counter == "total":
+                    size += util.element_content_size(element)
+                if blobs is not None:
+                    blobs[util.tree_element_identity(element)["path"]] = util.element_blob_sha(element)
+                yield element
+        finally:
+            push_metrics.increment(f"files_{counter}", count)
+            if counter == "total":
+                push_metrics.increment("bytes_serialized", size)
+
+    def create_tree_elements(self, guild_snapshot: Optional[snapshot.GuildSnapshot]=None,
+        push_metrics: Optional[metrics.PushMetrics]=None) -> List[github.InputGitTreeElement]:
+        """element_creatorを利用して、サーバー全体を表すGitTreeの要素を作成し返します。
+
+        Args:
+            guild_snapshot (Optional[snapshot.GuildSnapshot], optional): 記録する状態。省略した場合、element_creator が
+                レコードに対応していれば capture_snapshot() で写し取った状態を、そうでなければ現在の self.guild を記録します。
+            push_metrics (Optional[metrics.PushMetrics], optional): 指定した場合、整形と目次の作成の時間・オブジェクト数を記録します。
 
         Returns:
-            github.GitTree: 作成されたGitTree。
-        """        
-        channel_elements = []
-        sorted_by_category = util.sort_category_position(self.guild.by_category())
+            List[github.InputGitTreeElement]: チャンネル、ロール、メンバー、目次、サーバー設定の順に並んだ要素。
+
+        Raises:
+            ValueError: element_creator がレコードに対応していないため、 guild_snapshot を記録できません。
+        """
+        return list(self._iter_tree_elements(guild_snapshot, push_metrics))
+
+    def _iter_tree_elements(self, guild_snapshot: Optional[snapshot.GuildSnapshot]=None,
+        push_metrics: Optional[metrics.PushMetrics]=None) -> Iterator[github.InputGitTreeElement]:
+        """create_tree_elements と同じ順番で、GitTreeの要素を1つずつ作成します。
+        """
+        if push_metrics is None:
+            push_metrics = metrics.PushMetrics()
+        if guild_snapshot is None and self.element_creator.supports_records:
+            # 一度の走査で写し取ることで、記録中にゲートウェイから届いた変更が一部のファイルにだけ混ざることを防ぎます。
+            guild_snapshot = self.capture_snapshot()
+
+        if guild_snapshot is not None:
+            if not self.element_creator.supports_records:
+                raise ValueError("element_creator がレコードに対応していないため、GuildSnapshot を記録できません。")
+            source = guild_snapshot
+            sorted_by_category = guild_snapshot.by_category
+            guild_model = guild_snapshot.guild
+        else:
+            source = self.guild
+            sorted_by_category = util.sort_category_position(self.guild.by_category())
+            guild_model = self.guild
+
+        sorted_channels = []
         for category, channels in sorted_by_category:
             if category is not None:
-                channel_elements.append(self.element_creator.create_channel_element(category))
+                sorted_channels.append(category)
+            sorted_channels.extend(channels)
 
-            for channel in channels:
-                channel_elements.append(self.element_creator.create_channel_element(channel))
+        render_cache = getattr(self.element_creator, "render_cache", None)
+        hits_before = render_cache.hits if render_cache is not None else 0
+
+        yield from push_metrics.timed("render", self.element_creator.create_channel_elements(sorted_channels))
+        yield from push_metrics.timed("render", self.element_creator.create_role_elements(source.roles))
+        yield from push_metrics.timed("render", self.element_creator.create_member_elements(source.members))
+
+        yield from push_metrics.timed("index", self._iter_index_elements(sorted_by_category, source=source))
+
+        with push_metrics.phase("render"):
+            guild_element = self.element_creator.create_guild_element(guild_model)
+        yield guild_element
+
+        reused = render_cache.hits - hits_before if render_cache is not None else 0
+        push_metrics.increment("objects_rendered", len(sorted_channels) + len(source.roles) + len(source.members) + 1 - reused)
+        push_metrics.increment("objects_reused", reused)
+
+    def create_partial_tree_elements(self, channels: Iterable[discord.abc.GuildChannel]=(), roles: Iterable[discord.Role]=(),
+        members: Iterable[discord.Member]=(), removed_paths: Iterable[str]=(), include_guild=False) -> List[github.InputGitTreeElement]:
+        """変更があったオブジェクトのみについてGitTreeの要素を作成します。
+        名前の変更を反映するため、目次は常に作成し直します。目次を分割している場合は、変更があったオブジェクトが載るページのみを作成します。
+
+        Args:
+            channels (Iterable[discord.abc.GuildChannel], optional): 作成・変更されたチャンネル。
+            roles (Iterable[discord.Role], optional): 作成・変更されたロール。
+            members (Iterable[discord.Member], optional): 参加・変更されたメンバー。
+            removed_paths (Iterable[str], optional): 削除されたオブジェクトのファイルのパス。
+            include_guild (bool, optional): Trueならサーバー設定の要素も作成します。 Defaults to False.
+
+        Returns:
+            List[github.InputGitTreeElement]: ブランチの先頭のツリーを base_tree として適用する要素。
+        """
+        channels, roles, members, removed_paths = list(channels), list(roles), list(members), list(removed_paths)
+        elements = []
+        for channel in channels:
+            elements.append(self.element_creator.create_channel_element(channel))
+        for role in roles:
+            elements.append(self.element_creator.create_role_element(role))
+        for member in members:
+            elements.append(self.element_creator.create_member_element(member))
+
+        written_paths = {util.tree_element_identity(element)["path"] for element in elements}
+        for path in removed_paths:
+            if path not in written_paths:
+                elements.append(github.InputGitTreeElement(path, "100644", "blob", sha=None))
+
+        if include_guild:
+            # サーバー名は全てのページの見出しに含まれます。
+            index_pages = {}
+        else:
+            member_pages = {self.member_index_page(member.id) for member in members}
+            for path in removed_paths:
+                if path.startswith("members/"):
+                    # ファイル名はメンバーのIDです。
+                    member_pages.add(self.member_index_page(os.path.splitext(os.path.basename(path))[0]))
+            index_pages = {
+                "channels_page": bool(channels) or any(path.startswith("channels/") for path in removed_paths),
+                "roles_page": bool(roles) or any(path.startswith("roles/") for path in removed_paths),
+                "member_pages": member_pages
+            }
+        elements.extend(self._iter_index_elements(util.sort_category_position(self.guild.by_category()), **index_pages))
+        if include_guild:
+            elements.append(self.element_creator.create_guild_element(self.guild))
+        return elements
+
+    @staticmethod
+    def _element_blobs(elements: Iterable[github.InputGitTreeElement]) -> Dict[str, Optional[str]]:
+        """要素のパスとblobのSHAの対応を返します。削除を表す要素のSHAはNoneです。
+        """
+        return {util.tree_element_identity(element)["path"]: util.element_blob_sha(element) for element in elements}
+
+    def _filter_changed_elements(self, elements: List[github.InputGitTreeElement], 
+        remote_blobs: Dict[str, str]) -> List[github.InputGitTreeElement]:
+        """ローカルで計算したblobのSHAをリモートと比較し、追加・変更されたファイルと削除されたファイルの要素のみを返します。
+        """
+        return list(self._iter_changed_elements(elements, remote_blobs))
+
+    def _iter_changed_elements(self, elements: Iterable[github.InputGitTreeElement], remote_blobs: Dict[str, str],
+        push_metrics: Optional[metrics.PushMetrics]=None) -> Iterator[github.InputGitTreeElement]:
+        """_filter_changed_elements と同じ要素を、 elements から1つずつ取り出しながら返します。
+        削除されたファイルの要素は、 elements を全て取り出した後に返します。
+        push_metrics を渡すと、比較にかかった時間のみを compare の段階に加算します。
+        """
+        local_paths = set()
+        elapsed = 0.0
+        try:
+            for element in elements:
+                start = time.perf_counter()
+                path = util.tree_element_identity(element)["path"]
+                local_paths.add(path)
+                changed = remote_blobs.get(path) != util.element_blob_sha(element)
+                elapsed += time.perf_counter() - start
+                if changed:
+                    yield element
 
-        member_elements = []
-        for member in self.guild.members:
-            member_elements.append(self.element_creator.create_member_element(member))
+            for path in remote_blobs:
+                if path not in local_paths:
+                    # shaにNoneを指定するとbase_treeからファイルが削除されます。
+                    yield github.InputGitTreeElement(path, "100644", "blob", sha=None)
+        finally:
+            if push_metrics is not None:
+                push_metrics.add_time("compare", elapsed)
 
-        role_elements = []
-        for role in self.guild.roles:
-            role_elements.append(self.element_creator.create_role_element(role))
-        
-        guild_element = self.element_creator.create_guild_element(self.guild)
+class Reporter(BaseReporter):
+    """Discordサーバーの情報をGitHubに記録する起点。
+    """    
+    
+    def __init__(self, guild: discord.Guild, github_token: str, repository_name:str, 
+        branch_name:str="main", element_creator:create_elements.GitTreeElementCreator=None, allow_new_repository=False,
+        incremental=False, github_client:github.Github=None, backend:storage.StorageBackend=None, locale="ja",
+        index_page_digits=0, manifest: Optional[manifest.Manifest]=None, client_cache: Optional[clients.ClientCache]=None,
+        history: Optional[history.History]=None, checkpoint: Optional[checkpoint.Checkpoint]=None):
+        """コンストラクタではHTTPリクエストを行いません。リポジトリは最初に記録先を利用する際に解決されます。
+
+        Args:
+            guild (discord.Guild): 記録を行うサーバー。
+            github_token (str): GitHubアカウントのアクセストークン。 github_client または backend を渡す場合はNoneで構いません。
+            repository_name (str): リポジトリ名。 backend を渡す場合はNoneで構いません。
+            branch_name (str, optional): 記録を行うブランチ名. Defaults to "main".
+            element_creator (create_elements.GitTreeElementCreator, optional): GitTreeの生成を行うオブジェクト。 Defaults to None.
+            allow_new_repository (str, optional): もし repository_name に該当するリポジトリが見つからなかったとき、Trueなら新規作成します。
+            incremental (bool, optional): Trueなら、ブランチの先頭のツリーと比較して追加・変更・削除されたファイルのみを送信します。 Defaults to False.
+            github_client (github.Github, optional): 複数の Reporter で共有する認証済みのクライアント。
+                省略した場合は client_cache から github_token のクライアントを取得します。
+            backend (storage.StorageBackend, optional): 記録先。省略した場合は repository_name のGitHubリポジトリに記録します。
+            locale (str, optional): 目次と、element_creator を省略した場合の各ファイルに利用する言語（"ja" または "en"）。 Defaults to "ja".
+            index_page_digits (int, optional): 0より大きければ、目次をチャンネル・ロール・メンバー（IDの末尾 index_page_digits 桁ごと）のページに分け、
+                index.md にはそれらへのリンクのみを載せます。メンバーの参加・脱退で差分が出るのは該当するページのみになります。 Defaults to 0.
+            manifest (Optional[manifest.Manifest], optional): 記録したツリーのファイルの対応を保存する先。
+                ブランチの先頭が保存したコミットと一致すれば、 incremental の差分の計算にリモートのツリーの取得を省略します。 Defaults to None.
+            client_cache (Optional[clients.ClientCache], optional): クライアントと解決済みのリポジトリを保持するキャッシュ。
+                省略した場合はプロセス全体で共有する clients.default_cache を利用します。
+            history (Optional[history.History], optional): push() で記録した変更をオブジェクトのID・属性ごとに保存する先。 Defaults to None.
+            checkpoint (Optional[checkpoint.Checkpoint], optional): push() の途中経過を保存する先。
+                中断した push() は、次の push() で完了した手順を省略して再開します。 Defaults to None.
+
+        Raises:
+            NotImplementedError: element_creator は create_elements.GitTreeElementCreator を実装している必要があります。
+            ValueError: github_token と github_client のどちらも渡されなかったか、対応していない言語が指定されました。
+                repository_name のリポジトリが見つからない場合の ValueError は、最初に記録先を利用する際に送出されます。
+        """        
+        super().__init__(guild, branch_name=branch_name, element_creator=element_creator, incremental=incremental,
+            locale=locale, index_page_digits=index_page_digits, manifest=manifest, history=history)
+        self.checkpoint = checkpoint
+
+        if backend is not None:
+            if not isinstance(backend, storage.StorageBackend):
+                raise NotImplementedError(
+                    "backend は storage.StorageBackend を実装している必要があります。"
+                    )
+            self._backend = backend
+            return
+
+        self.client_cache = client_cache if client_cache is not None else clients.default_cache
+        if github_client is None:
+            if github_token is None:
+                raise ValueError("github_token または github_client のいずれかを指定する必要があります。")
+            github_client = self.client_cache.get_client(github_token)
+        self.github_client = github_client
+        self.repository_name = repository_name
+        self.allow_new_repository = allow_new_repository
+        self._backend: Optional[storage.StorageBackend] = None
+
+    @property
+    def backend(self) -> storage.StorageBackend:
+        """記録先。 backend を渡さなかった場合は、最初の参照時にリポジトリを解決して GitHubBackend を作成します。
 
-        index_element = self.element_creator.create_index_element(
-            self.create_index_content(sorted_by_category, self.guild.members, self.guild.roles)
+        Raises:
+            ValueError: repository_name のリポジトリが見つからず、 allow_new_repository がFalseです。
+        """
+        if self._backend is None:
+            self._backend = storage.GitHubBackend(self.client_cache.get_repository(
+                self.github_client, self.repository_name, self.allow_new_repository
+            ))
+        return self._backend
+
+    @property
+    def repository(self) -> github.Repository:
+        """記録先のGitHubリポジトリ。 GitHubBackend 以外の backend を渡した場合はNoneです。
+        """
+        return getattr(self.backend, "repository", None)
+
+    @property
+    def html_url(self) -> str:
+        return self.backend.html_url
+
+    def create_git_tree(self) -> str:
+        """element_creatorを利用してツリーを作成し、そのSHAを返します。
+        incremental が有効な場合は、ブランチの先頭のツリーを base_tree として変更があったファイルのみを送信します。
+
+        Returns:
+            str: 作成されたツリーのSHA。
+        """        
+        head_sha = self.backend.get_head(self.branch_name) if self.incremental else None
+        return self._create_git_tree(head_sha)
+
+    def _create_git_tree(self, head_sha: Optional[str], guild_snapshot: Optional[snapshot.GuildSnapshot]=None) -> str:
+        """create_git_tree の本体です。差分の基準とするコミットを呼び出し側で解決済みの場合に利用します。
+
+        Args:
+            head_sha (Optional[str]): ブランチの先頭のコミットのSHA。ブランチが存在しなければNone。
+            guild_snapshot (Optional[snapshot.GuildSnapshot], optional): 記録する状態。
+        """
+        return self._create_tree_from_elements(self._iter_tree_elements(guild_snapshot), head_sha)
+
+    def _create_tree_from_elements(self, elements: Iterable[github.InputGitTreeElement], head_sha: Optional[str],
+        push_metrics: Optional[metrics.PushMetrics]=None, backend: Optional[storage.StorageBackend]=None,
+        branch_name: Optional[str]=None, job: Optional[checkpoint.PushJob]=None) -> str:
+        """elements のツリーを作成します。 backend と branch_name を省略した場合は、この Reporter の記録先とブランチです。
+        elements はジェネレーターでも構いません。要素はバッチごとに送信され、送信後は保持しません。
+        job を渡すと、完了したバッチを job に記録し、前回完了したバッチは作成を省略します。
+        """
+        if push_metrics is None:
+            push_metrics = metrics.PushMetrics()
+        if backend is None:
+            backend = self.backend
+        streaming = {}
+        if job is not None:
+            # レコードに対応していない element_creator では要素が現在のサーバーから作られ、前回と同じになるとは限りません。
+            if self.element_creator.supports_records:
+                streaming["completed"] = job.batch_trees
+                push_metrics.increment("batches_resumed", len(job.batch_trees))
+            streaming["on_batch"] = job.batch_done
+        remote_blobs = None
+        if self.incremental and head_sha is not None:
+            with push_metrics.phase("base_tree"):
+                base_tree_sha, remote_blobs = self._get_base_tree(head_sha, backend, branch_name)
+
+        # 要素を受け取りながら送信するため、整形・目次の作成・比較の時間は tree の段階から除きます。
+        streamed_phases = ("render", "index", "compare")
+        if remote_blobs is None:
+            with push_metrics.phase("tree", exclude=streamed_phases):
+                return backend.create_tree_streaming(self._iter_counted(push_metrics, "changed", elements), **streaming)
+
+        changed_elements = self._iter_changed_elements(elements, remote_blobs, push_metrics)
+        with push_metrics.phase("tree", exclude=streamed_phases):
+            first_element = next(changed_elements, None)
+            if first_element is None:
+                return base_tree_sha
+            return backend.create_tree_streaming(
+                self._iter_counted(push_metrics, "changed", itertools.chain((first_element,), changed_elements)),
+                base_tree_sha, **streaming
             )
 
-        tree = self.repository.create_git_tree(channel_elements + role_elements + member_elements + [index_element, guild_element])
-        return tree
+    def _get_base_tree(self, head_sha: str, backend: Optional[storage.StorageBackend]=None,
+        branch_name: Optional[str]=None) -> Tuple[str, Optional[Dict[str, str]]]:
+        """head_sha のコミットのツリーのSHAと、そのファイルのパスとblobのSHAの対応を返します。
+        manifest に head_sha の内容が保存されていればそれを利用し、なければリモートのツリーを取得します。
+        """
+        if backend is None:
+            backend = self.backend
+        if branch_name is None:
+            branch_name = self.branch_name
+        if self.manifest is not None:
+            entry = self.manifest.get(backend.html_url, branch_name, head_sha)
+            if entry is not None:
+                return entry.tree_sha, entry.blobs
+        base_tree_sha = backend.get_commit_tree(head_sha)
+        return base_tree_sha, backend.get_tree_blobs(base_tree_sha)
 
-    def push(self,commit_title="commit") -> str:
-        """GitHubに実際にサーバー情報を保存します。
+    def push(self,commit_title="commit", skip_unchanged=False) -> str:
+        """記録先に実際にサーバー情報を保存します。
+        作成したツリーが親コミットのツリーと同じであれば、空のコミットは作成せずに終了します。
 
         Args:
             commit_title (str, optional): コミットのタイトルです。 Defaults to "commit".
+            skip_unchanged (bool, optional): Trueなら、前回の push() から diff() で検出できる変更がない場合に、
+                APIへのリクエストを行わずに終了します。 Defaults to False.
 
         Returns:
-            str: 編集を行ったリポジトリのGitHub上のURL。
+            str: 編集を行ったリポジトリのURL。計測結果は last_metrics から参照できます。
         """        
-        tree = self.create_git_tree()
-
-        repo = self.repository
-        ref = repo.get_git_ref(self.ref_name)
-        
-        parents = [repo.get_git_commit(c.sha) for c in repo.get_commits()]
-        commit = repo.create_git_commit(commit_title,tree,parents)
-        ref.edit(commit.sha,force=True)
-        return repo.html_url
+        push_metrics = metrics.PushMetrics()
+        requests_before, bytes_before = self.backend.request_count, self.backend.bytes_uploaded
+        with push_metrics.phase("snapshot"):
+            guild_snapshot = self.capture_snapshot()
+        if skip_unchanged and self._previous_snapshot(guild_snapshot.id) is not None and not self.diff(guild_snapshot):
+            push_metrics.increment("skipped")
+            self._finish_metrics(push_metrics, 0, self.backend.rate_limit_remaining)
+            return self.backend.html_url
+
+        # 履歴の長さに関わらず、親コミットはブランチの参照から一定回数のリクエストで解決します。
+        with push_metrics.phase("head"):
+            head_sha = self.backend.get_head(self.branch_name)
+        job = None
+        if self.checkpoint is not None:
+            job = self._start_job(head_sha, guild_snapshot, push_metrics)
+            # 再開する場合は、前回と同じ要素を作るため保存した状態と親コミットを利用します。
+            guild_snapshot, head_sha = job.guild_snapshot, job.head_sha
+            self.backend.upload_hook = job.blobs_uploaded
+        try:
+            # 要素は作成しながらバッチごとに送信し、 manifest にはパスとblobのSHAのみを残します。
+            element_blobs = {} if self.manifest is not None else None
+            elements = self._iter_counted(push_metrics, "total",
+                self._iter_tree_elements(self._snapshot_for_elements(guild_snapshot), push_metrics), element_blobs)
+            if job is not None and job.tree_sha is not None:
+                tree_sha = job.tree_sha
+                if element_blobs is not None:
+                    for _ in elements:
+                        pass
+            else:
+                tree_sha = self._create_tree_from_elements(elements, head_sha, push_metrics, job=job)
+                if job is not None:
+                    job.tree_done(tree_sha)
+            if head_sha is not None and (job is None or job.commit_sha is None) and tree_sha == self._head_tree_sha(head_sha):
+                # 内容が親コミットと同じであれば、空のコミットを作成しません。
+                if job is not None:
+                    job.finish()
+                push_metrics.increment("skipped")
+                self._finish_metrics(push_metrics, self.backend.request_count - requests_before, self.backend.rate_limit_remaining,
+                    self.backend.bytes_uploaded - bytes_before)
+                return self.backend.html_url
+            commit_sha = self._create_commit(commit_title, tree_sha, head_sha, push_metrics, job=job)
+        finally:
+            if job is not None:
+                self.backend.upload_hook = None
+        if job is not None:
+            job.finish()
+        self._record_history(commit_sha, guild_snapshot, push_metrics)
+        self.last_snapshot = guild_snapshot
+        if self.manifest is not None:
+            with push_metrics.phase("manifest"):
+                self.manifest.save(self.backend.html_url, self.branch_name, commit_sha, tree_sha, element_blobs)
+        self._finish_metrics(push_metrics, self.backend.request_count - requests_before, self.backend.rate_limit_remaining,
+            self.backend.bytes_uploaded - bytes_before)
+        return self.backend.html_url
+
+    def _head_tree_sha(self, head_sha: str) -> str:
+        """head_sha のコミットのツリーのSHAを返します。 manifest に保存した先頭と一致すれば、リクエストを行いません。
+        """
+        if self.manifest is not None:
+            saved_head = self.manifest.head(self.backend.html_url, self.branch_name)
+            if saved_head is not None and saved_head[0] == head_sha:
+                return saved_head[1]
+        return self.backend.get_commit_tree(head_sha)
+
+    def _start_job(self, head_sha: Optional[str], guild_snapshot: snapshot.GuildSnapshot,
+        push_metrics: metrics.PushMetrics) -> checkpoint.PushJob:
+        """checkpoint に中断した push() があり、ブランチの先頭がその開始時から変わっていなければそれを返します。
+        なければ guild_snapshot を記録する新しい push() を始めます。
+        """
+        backend = self.backend
+        job = self.checkpoint.get(backend.html_url, self.branch_name)
+        if job is not None and (head_sha == job.head_sha or (job.commit_sha is not None and head_sha == job.commit_sha)):
+            if job.batch_size != backend.stream_batch_size:
+                # バッチの区切りが変わると、完了したバッチのツリーは同じ要素を表しません。
+                job.batch_trees.clear()
+            push_metrics.increment("resumed")
+            logger.info("中断した記録を再開します: %r", job)
+            backend.remember_blobs(self.checkpoint.blobs(backend.html_url, self.branch_name))
+            return job
+        if job is not None:
+            logger.warning("ブランチの先頭が変わったため、中断した記録を破棄します: %r", job)
+        return self.checkpoint.begin(backend.html_url, self.branch_name, head_sha, guild_snapshot, backend.stream_batch_size)
+
+    def push_with_retry(self, commit_title="commit", skip_unchanged=False, retries=5, base_delay=1.0, max_delay=60.0) -> str:
+        """push() を行い、GitHubの5xx・通信の失敗であれば指数関数的に間隔を空けて、レート制限であればリセットまで待機して再試行します。
+        checkpoint を渡していれば、再試行は完了した手順を省略して途中から再開します。
+
+        Args:
+            retries (int, optional): 再試行の最大回数。 Defaults to 5.
+            base_delay (float, optional): 最初の再試行の前に待機する最大秒数。再試行ごとに2倍になります。 Defaults to 1.0.
+            max_delay (float, optional): 1回の待機の最大秒数。 Defaults to 60.0.
+
+        Returns:
+            str: 編集を行ったリポジトリのURL。
+        """
+        return checkpoint.retry(lambda: self.push(commit_title, skip_unchanged), retries, base_delay, max_delay)
+
+    def push_elements(self, elements: List[github.InputGitTreeElement], commit_title="commit",
+        guild_snapshot: Optional[snapshot.GuildSnapshot]=None, object_ids: Optional[Iterable[int]]=None,
+        include_guild=False) -> str:
+        """ブランチの先頭のツリーに elements のみを適用したコミットを作成します。
+        create_partial_tree_elements と組み合わせることで、変更があったオブジェクトだけを記録できます。
+        ブランチが存在しない場合は、サーバー全体を push() で記録します。
+
+        object_ids を渡した場合、そのオブジェクトの変更のみをこのコミットの変更として history に保存し、 last_snapshot を更新します。
+        それ以外のオブジェクトの変更は、次の push() の変更として保存されます。
+
+        Args:
+            elements (List[github.InputGitTreeElement]): 追加・変更・削除するファイルの要素。
+            commit_title (str, optional): コミットのタイトルです。 Defaults to "commit".
+            guild_snapshot (Optional[snapshot.GuildSnapshot], optional): elements を作成した時点のサーバーの状態。
+                省略した場合は capture_snapshot() の結果を利用します。
+            object_ids (Optional[Iterable[int]], optional): elements に反映したチャンネル・ロール・メンバーのID。削除したオブジェクトも含めます。
+                省略した場合は guild_snapshot の全体を記録したものとします。
+            include_guild (bool, optional): Trueなら elements にサーバー設定の変更も反映したものとします。 Defaults to False.
+
+        Returns:
+            str: 編集を行ったリポジトリのURL。計測結果は last_metrics から参照できます。
+        """
+        push_metrics = metrics.PushMetrics()
+        requests_before, bytes_before = self.backend.request_count, self.backend.bytes_uploaded
+        with push_metrics.phase("head"):
+            head_sha = self.backend.get_head(self.branch_name)
+        if head_sha is None:
+            return self.push(commit_title)
+        if guild_snapshot is None:
+            with push_metrics.phase("snapshot"):
+                guild_snapshot = self.capture_snapshot()
+
+        with push_metrics.phase("base_tree"):
+            base_tree_sha = self._head_tree_sha(head_sha)
+
+        self._count_files(push_metrics, "changed", elements)
+        with push_metrics.phase("tree"):
+            tree_sha = self.backend.create_tree(elements, base_tree_sha)
+        commit_sha = self._create_commit(commit_title, tree_sha, head_sha, push_metrics)
+        if self.manifest is not None:
+            with push_metrics.phase("manifest"):
+                self.manifest.update(self.backend.html_url, self.branch_name, head_sha, commit_sha, tree_sha,
+                    self._element_blobs(elements))
+        recorded_snapshot = self._partial_snapshot(guild_snapshot, object_ids, include_guild)
+        self._record_history(commit_sha, recorded_snapshot, push_metrics)
+        self.last_snapshot = recorded_snapshot
+        self._finish_metrics(push_metrics, self.backend.request_count - requests_before, self.backend.rate_limit_remaining,
+            self.backend.bytes_uploaded - bytes_before)
+        return self.backend.html_url
+
+    def push_mirrors(self, mirrors: Iterable[Tuple[storage.StorageBackend, str]], commit_title="commit",
+        max_workers: int=4) -> List[str]:
+        """サーバーを一度だけ整形し、この Reporter の記録先と mirrors の各記録先・ブランチに並行して記録します。
+
+        ツリーは全てのファイルの内容のみで決まるため、同じリポジトリ（html_url が同じ記録先）のブランチには
+        最初に作成したツリーをそのまま利用し、2つ目以降のブランチではコミットの作成と参照の更新のみを行います。
+        別のリポジトリには、 incremental であればその記録先の先頭のツリーと比較して変更されたファイルのみを送信します。
+        manifest は記録先・ブランチごとに保存し、 history には この Reporter の記録先のコミットを保存します。
+
+        Args:
+            mirrors (Iterable[Tuple[storage.StorageBackend, str]]): 追加の記録先とブランチ名の組。
+            commit_title (str, optional): コミットのタイトルです。 Defaults to "commit".
+            max_workers (int, optional): 同時に記録するリポジトリの数。 Defaults to 4.
+
+        Returns:
+            List[str]: この Reporter の記録先、 mirrors の順に並んだ、記録したリポジトリのURL。
+                計測結果は last_metrics から参照でき、 fan_out の段階に全ての記録先への記録にかかった時間が入ります。
+
+        Raises:
+            NotImplementedError: mirrors の記録先は storage.StorageBackend を実装している必要があります。
+        """
+        targets = [(self.backend, self.branch_name)] + list(mirrors)
+        groups: Dict[str, List[Tuple[storage.StorageBackend, str]]] = {}
+        for backend, branch_name in targets:
+            if not isinstance(backend, storage.StorageBackend):
+                raise NotImplementedError("記録先は storage.StorageBackend を実装している必要があります。")
+            groups.setdefault(backend.html_url, []).append((backend, branch_name))
+        backends = list({id(backend): backend for backend, _ in targets}.values())
+        requests_before = [backend.request_count for backend in backends]
+        bytes_before = [backend.bytes_uploaded for backend in backends]
+
+        push_metrics = metrics.PushMetrics()
+        with push_metrics.phase("snapshot"):
+            guild_snapshot = self.capture_snapshot()
+        elements = self.create_tree_elements(self._snapshot_for_elements(guild_snapshot), push_metrics)
+        self._count_files(push_metrics, "total", elements)
+        element_blobs = self._element_blobs(elements) if self.manifest is not None else None
+
+        def push_group(group: List[Tuple[storage.StorageBackend, str]]) -> Tuple[metrics.PushMetrics, List[str]]:
+            # 同じリポジトリのブランチは、最初の記録先のオブジェクトでまとめて記録します。
+            backend = group[0][0]
+            group_metrics = metrics.PushMetrics()
+            tree_sha = None
+            commit_shas = []
+            for _, branch_name in group:
+                head_sha = backend.get_head(branch_name)
+                if tree_sha is None:
+                    tree_sha = self._create_tree_from_elements(elements, head_sha, group_metrics, backend, branch_name)
+                commit_sha = self._create_commit(commit_title, tree_sha, head_sha, group_metrics, backend, branch_name)
+                if self.manifest is not None:
+                    self.manifest.save(backend.html_url, branch_name, commit_sha, tree_sha, element_blobs)
+                commit_shas.append(commit_sha)
+            return group_metrics, commit_shas
+
+        with push_metrics.phase("fan_out"):
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                group_results = list(executor.map(push_group, groups.values()))
+
+        for group_metrics, _ in group_results:
+            for counter, value in group_metrics.counters.items():
+                push_metrics.increment(counter, value)
+        # targets の先頭はこの Reporter の記録先のため、最初のリポジトリの最初のコミットです。
+        self._record_history(group_results[0][1][0], guild_snapshot, push_metrics)
+        self.last_snapshot = guild_snapshot
+        request_count = sum(backend.request_count - before for backend, before in zip(backends, requests_before))
+        bytes_uploaded = sum(backend.bytes_uploaded - before for backend, before in zip(backends, bytes_before))
+        self._finish_metrics(push_metrics, request_count, self.backend.rate_limit_remaining, bytes_uploaded)
+        return [backend.html_url for backend, _ in targets]
+
+    def plan_restore(self, commit_sha: Optional[str]=None, guild_snapshot: Optional[snapshot.GuildSnapshot]=None,
+        delete_extra=False, fetch_workers: int=8) -> restore.RestorePlan:
+        """記録したコミットの状態にサーバーを戻すための編集を計算します。サーバーの編集は行いません。
+        現在のサーバーから作成したファイルとblobのSHAが異なるファイルのみを記録先から読み込むため、
+        変更の少ないサーバーでは読み込むファイルも少なくなります。
+        結果は restore.RestoreExecutor で適用するか、 as_dict() で確認してください。
+
+        Args:
+            commit_sha (Optional[str], optional): 復元元のコミットのSHA。省略した場合はブランチの先頭のコミットです。
+            guild_snapshot (Optional[snapshot.GuildSnapshot], optional): 現在のサーバーの状態。
+                省略した場合は capture_snapshot() の結果を利用します。
+            delete_extra (bool, optional): Trueなら、記録されていないチャンネル・ロールを削除する編集を含めます。 Defaults to False.
+            fetch_workers (int, optional): ファイルを並行して読み込むスレッド数。 Defaults to 8.
+
+        Raises:
+            ValueError: ブランチが存在しないか、復元元のツリーを取得できませんでした。
+
+        Examples:
+            >>> plan = await loop.run_in_executor(None, reporter.plan_restore, commit_sha, reporter.capture_snapshot())
+            >>> print(json.dumps(plan.as_dict(), ensure_ascii=False, indent=4))
+            >>> results = await restore.RestoreExecutor(guild).run(plan)
+        """
+        if guild_snapshot is None:
+            guild_snapshot = self.capture_snapshot()
+        if commit_sha is None:
+            commit_sha = self.backend.get_head(self.branch_name)
+            if commit_sha is None:
+                raise ValueError(f"{self.branch_name} ブランチが存在しません。")
+
+        recorded_blobs = None
+        if self.manifest is not None:
+            entry = self.manifest.get(self.backend.html_url, self.branch_name, commit_sha)
+            if entry is not None:
+                recorded_blobs = entry.blobs
+        if recorded_blobs is None:
+            recorded_blobs = self.backend.get_tree_blobs(self.backend.get_commit_tree(commit_sha))
+            if recorded_blobs is None:
+                raise ValueError(f"{commit_sha} のツリーが大きすぎるため取得できませんでした。")
+
+        current_blobs = self._element_blobs(self.create_tree_elements(self._snapshot_for_elements(guild_snapshot)))
+        recorded, extra = restore.load_recorded(
+            self.backend, self.catalog, guild_snapshot, recorded_blobs, current_blobs, fetch_workers
+        )
+        return restore.RestorePlan.build(guild_snapshot, recorded, extra if delete_extra else (), commit_sha)
+
+    def _create_commit(self, commit_title: str, tree_sha: str, head_sha: Optional[str],
+        push_metrics: Optional[metrics.PushMetrics]=None, backend: Optional[storage.StorageBackend]=None,
+        branch_name: Optional[str]=None, job: Optional[checkpoint.PushJob]=None) -> str:
+        """tree_sha を指すコミットを作成し、ブランチの参照を更新します。ブランチが存在しなければ作成します。
+        backend と branch_name を省略した場合は、この Reporter の記録先とブランチです。
+        job を渡すと、作成したコミットを job に記録し、前回作成したコミットがあればそれを利用します。
+        """
+        if push_metrics is None:
+            push_metrics = metrics.PushMetrics()
+        if backend is None:
+            backend = self.backend
+        if job is not None and job.commit_sha is not None:
+            commit_sha = job.commit_sha
+        else:
+            parents = [head_sha] if head_sha is not None else []
+            with push_metrics.phase("commit"):
+                commit_sha = backend.create_commit(commit_title, tree_sha, parents)
+            if job is not None:
+                job.commit_done(commit_sha)
+        with push_metrics.phase("ref_update"):
+            backend.set_head(branch_name if branch_name is not None else self.branch_name, commit_sha)
+        return commit_sha
@@ -0,0 +1,145 @@
+from typing import Dict, Optional, Tuple
+import sqlite3
+import threading
+
+class ManifestEntry:
+    """
+    Attributes:
+        commit_sha (str): 記録したブランチの先頭のコミットのSHA。
+        tree_sha (str): そのコミットが指すツリーのSHA。
+        blobs (Dict[str, str]): ツリーに含まれる全てのファイルのパスとblobのSHAの対応。
+    """
+    __slots__ = ("commit_sha", "tree_sha", "blobs")
+
+    def __init__(self, commit_sha: str, tree_sha: str, blobs: Dict[str, str]):
+        self.commit_sha = commit_sha
+        self.tree_sha = tree_sha
+        self.blobs = blobs
+
+class Manifest:
+    """
+    リポジトリ・ブランチごとに、最後に記録したコミットとツリーのファイルのパスとblobのSHAの対応を保存するSQLiteのファイル。
+    ブランチの先頭が保存したコミットと一致する間は、再起動後もツリーを再帰的に取得せずに差分を計算できます。
+    書き込みは1つのトランザクションで行うため、途中で停止しても前回の内容が残ります。
+    """
+
+    # 保存形式を変更した場合は値を増やし、古い内容を読み込まないようにします。
+    schema_version = 1
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): SQLiteのファイルのパス。存在しなければ作成します。 ":memory:" も指定できます。
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # Reporter はイベントループ外のスレッドからも利用されるため、接続を共有しロックで保護します。
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            if self._connection.execute("PRAGMA user_version").fetchone()[0] != self.schema_version:
+                self._connection.execute("DROP TABLE IF EXISTS heads")
+                self._connection.execute("DROP TABLE IF EXISTS blobs")
+                self._connection.execute(f"PRAGMA user_version = {self.schema_version}")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS heads ("
+                "repository TEXT NOT NULL, branch TEXT NOT NULL, commit_sha TEXT NOT NULL, tree_sha TEXT NOT NULL, "
+                "PRIMARY KEY (repository, branch))"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                "repository TEXT NOT NULL, branch TEXT NOT NULL, path TEXT NOT NULL, sha TEXT NOT NULL, "
+                "PRIMARY KEY (repository, branch, path)) WITHOUT ROWID"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def head(self, repository: str, branch: str) -> Optional[Tuple[str, str]]:
+        """保存した (コミットのSHA, ツリーのSHA) を返します。保存していなければNoneを返します。
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT commit_sha, tree_sha FROM heads WHERE repository = ? AND branch = ?", (repository, branch)
+            ).fetchone()
+        return tuple(row) if row is not None else None
+
+    def get(self, repository: str, branch: str, commit_sha: Optional[str]=None) -> Optional[ManifestEntry]:
+        """保存した内容を返します。保存していないか、 commit_sha を指定してそれと一致しなければNoneを返します。
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT commit_sha, tree_sha FROM heads WHERE repository = ? AND branch = ?", (repository, branch)
+            ).fetchone()
+            if row is None or (commit_sha is not None and row[0] != commit_sha):
+                return None
+            blobs = dict(self._connection.execute(
+                "SELECT path, sha FROM blobs WHERE repository = ? AND branch = ?", (repository, branch)
+            ))
+        return ManifestEntry(row[0], row[1], blobs)
+
+    def save(self, repository: str, branch: str, commit_sha: str, tree_sha: str, blobs: Dict[str, str]):
+        """ブランチの先頭を commit_sha として、ツリーのファイルの対応を blobs に置き換えます。
+        前回の内容と異なる行のみを書き込みます。
+        """
+        with self._lock, self._connection:
+            previous = dict(self._connection.execute(
+                "SELECT path, sha FROM blobs WHERE repository = ? AND branch = ?", (repository, branch)
+            ))
+            self._connection.executemany(
+                "DELETE FROM blobs WHERE repository = ? AND branch = ? AND path = ?",
+                ((repository, branch, path) for path in previous if path not in blobs)
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO blobs (repository, branch, path, sha) VALUES (?, ?, ?, ?)",
+                ((repository, branch, path, sha) for path, sha in blobs.items() if previous.get(path) != sha)
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO heads (repository, branch, commit_sha, tree_sha) VALUES (?, ?, ?, ?)",
+                (repository, branch, commit_sha, tree_sha)
+            )
+
+    def update(self, repository: str, branch: str, parent_sha: str, commit_sha: str, tree_sha: str,
+        changes: Dict[str, Optional[str]]) -> bool:
+        """保存したコミットが parent_sha の場合のみ、 changes （パスとblobのSHA、削除はNone）を適用して先頭を commit_sha にします。
+        一致しなければ、古い内容を使わないよう保存した内容を破棄します。
+
+        Returns:
+            bool: 適用できればTrue。
+        """
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT commit_sha FROM heads WHERE repository = ? AND branch = ?", (repository, branch)
+            ).fetchone()
+            if row is None or row[0] != parent_sha:
+                self._discard(repository, branch)
+                return False
+            self._connection.executemany(
+                "DELETE FROM blobs WHERE repository = ? AND branch = ? AND path = ?",
+                ((repository, branch, path) for path, sha in changes.items() if sha is None)
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO blobs (repository, branch, path, sha) VALUES (?, ?, ?, ?)",
+                ((repository, branch, path, sha) for path, sha in changes.items() if sha is not None)
+            )
+            self._connection.execute(
+                "UPDATE heads SET commit_sha = ?, tree_sha = ? WHERE repository = ? AND branch = ?",
+                (commit_sha, tree_sha, repository, branch)
+            )
+        return True
+
+    def discard(self, repository: str, branch: str):
+        """保存した内容を削除します。
+        """
+        with self._lock, self._connection:
+            self._discard(repository, branch)
+
+    def _discard(self, repository: str, branch: str):
+        self._connection.execute("DELETE FROM heads WHERE repository = ? AND branch = ?", (repository, branch))
+        self._connection.execute("DELETE FROM blobs WHERE repository = ? AND branch = ?", (repository, branch))
@@ -0,0 +1,108 @@
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional, TypeVar
+import time
+
+T = TypeVar("T")
+
+class PushMetrics:
+    """
+    1回の記録の計測結果。 Reporter.push() の後に reporter.last_metrics から参照でき、登録したフックにも渡されます。
+
+    Attributes:
+        phases (Dict[str, float]): 段階ごとの経過秒数。段階は実行された順番に並びます。
+            snapshot: サーバーの状態の写し取り。 head: ブランチの先頭の取得。 render: チャンネル・ロール・メンバー・サーバー設定の整形。
+            index: 目次の作成。 base_tree: 差分の基準となるツリーの取得。 compare: 変更されたファイルの抽出。
+            tree: blobのアップロードとツリーの作成。 commit: コミットの作成。 ref_update: ブランチの参照の更新。
+            history: history への変更の保存。 manifest: manifest への保存。
+            fan_out: Reporter.push_mirrors() での、全ての記録先へのツリー・コミットの作成。
+        counters (Dict[str, int]): 整形・送信したオブジェクト数やバイト数。
+            objects_rendered / objects_reused: 整形したオブジェクト数と、整形結果のキャッシュを利用したオブジェクト数。
+            files_total / files_changed: ツリーの全ファイル数と、追加・変更・削除として送信したファイル数。
+            bytes_serialized / bytes_uploaded: 全ファイルの内容のバイト数と、記録先に実際に送信した内容のバイト数。
+                bytes_uploaded は、リモートに存在するか同じ内容を既に送信したためアップロードを省略したblobを含みません。
+            requests: 記録先へのリクエスト数。 skipped: 変更がなく記録を省略した場合（作成したツリーが親コミットと同じ場合を含む）は1。
+            resumed: checkpoint から中断した記録を再開した場合は1。 batches_resumed: 再開で作成を省略したツリーのバッチ数。
+        rate_limit_remaining (Optional[int]): 記録後のGitHubのレート制限の残り回数。分からなければNone。
+        started_at (float): 記録を始めた時刻（time.time()）。
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.rate_limit_remaining: Optional[int] = None
+        self.started_at = time.time()
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.phases.values())
+
+    def add_time(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def increment(self, counter: str, value: int=1):
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    @contextmanager
+    def phase(self, name: str, exclude: Iterable[str]=()):
+        """with 文の中の経過時間を name の段階に加算します。
+
+        Args:
+            exclude (Iterable[str], optional): with 文の中でこれらの段階に加算された時間を除きます。
+                ジェネレーターから要素を受け取りながら送信する場合に、整形の時間を送信の時間に含めないよう指定します。
+        """
+        exclude = tuple(exclude)
+        excluded_before = sum(self.phases.get(phase, 0.0) for phase in exclude)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            excluded = sum(self.phases.get(phase, 0.0) for phase in exclude) - excluded_before
+            self.add_time(name, time.perf_counter() - start - excluded)
+
+    def timed(self, phase: str, iterable: Iterable[T]) -> Iterator[T]:
+        """iterable の要素を返しながら、要素の作成にかかった時間のみを phase の段階に加算します。
+        受け取った側の処理時間は含みません。
+        """
+        iterator = iter(iterable)
+        elapsed = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    elapsed += time.perf_counter() - start
+                    return
+                elapsed += time.perf_counter() - start
+                yield item
+        finally:
+            self.add_time(phase, elapsed)
+
+    def as_dict(self) -> dict:
+        """JSONに変換できる辞書を返します。
+        """
+        return {
+            "phases": dict(self.phases),
+            "total_seconds": self.total_seconds,
+            "counters": dict(self.counters),
+            "rate_limit_remaining": self.rate_limit_remaining,
+            "started_at": self.started_at
+        }
+
+    def samples(self, prefix: str="dpy_github") -> Dict[str, float]:
+        """Prometheus や StatsD にそのまま送信できる、 "{prefix}_{名前}" 形式の平坦な辞書を返します。
+
+        Examples:
+            >>> for name, value in metrics.samples().items():
+            ...     statsd.gauge(name, value)
+        """
+        samples = {f"{prefix}_{name}_seconds": seconds for name, seconds in self.phases.items()}
+        samples[f"{prefix}_push_seconds"] = self.total_seconds
+        samples.update((f"{prefix}_{name}", value) for name, value in self.counters.items())
+        if self.rate_limit_remaining is not None:
+            samples[f"{prefix}_rate_limit_remaining"] = self.rate_limit_remaining
+        return samples
+
+    def __repr__(self) -> str:
+        phases = " ".join(f"{name}={seconds:.3f}s" for name, seconds in self.phases.items())
+        return f"<PushMetrics {phases} counters={self.counters} rate_limit_remaining={self.rate_limit_remaining}>"
@@ -0,0 +1,85 @@
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Iterator, List, Optional, Sequence, Tuple
+import collections
+import os
+
+from . import format_model
+from . import records
+from . import util
+
+def render_records(formatter: format_model.DefaultFormatter, kind: str,
+    chunk: Sequence[records.Record]) -> List[Tuple[bytes, str]]:
+    """ワーカープロセスで実行され、レコードを整形して (UTF-8のバイト列, blobのSHA) のリストを返します。
+
+    Args:
+        kind (str): "channel", "role", "member" のいずれか。
+    """
+    format_record = getattr(formatter, f"format_{kind}_record")
+    rendered = []
+    for record in chunk:
+        content = format_record(record).encode("utf-8")
+        rendered.append((content, util.git_blob_sha(content)))
+    return rendered
+
+class ParallelRenderer:
+    """
+    レコードをチャンクに分けてプロセスプールで整形し、blobのSHAまで計算します。結果は渡した順番で返されます。
+    """
+
+    def __init__(self, max_workers: Optional[int]=None, chunk_size: int=2000, executor: Optional[Executor]=None,
+        max_pending_chunks: Optional[int]=None):
+        """
+        Args:
+            max_workers (int, optional): ワーカープロセス数。省略した場合はCPUのコア数になります。
+            chunk_size (int, optional): 1回のタスクで整形するレコード数。 Defaults to 2000.
+            executor (Executor, optional): 利用する Executor。省略した場合は最初の整形時に ProcessPoolExecutor を作成します。
+            max_pending_chunks (int, optional): 結果を受け取る前に投入しておくチャンクの数の上限。
+                整形済みで受け取られていない内容はこの数のチャンク分までになります。省略した場合はワーカープロセス数の2倍です。
+        """
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.max_pending_chunks = max_pending_chunks or 2 * (max_workers or os.cpu_count() or 1)
+        self._executor = executor
+        self._owns_executor = executor is None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def render(self, formatter: format_model.DefaultFormatter, kind: str,
+        record_list: Sequence[records.Record]) -> Iterator[Tuple[bytes, str]]:
+        """record_list を整形した (UTF-8のバイト列, blobのSHA) を、 record_list と同じ順番で返します。
+        max_pending_chunks 個のチャンクを先に投入するため、最初の結果を待つ間も他のチャンクの整形が進みます。
+        チャンクの結果を受け取るごとに次のチャンクを投入するため、受け取る側が遅くても結果が溜まり続けることはありません。
+        """
+        starts = iter(range(0, len(record_list), self.chunk_size))
+        futures = collections.deque()
+
+        def submit_next():
+            start = next(starts, None)
+            if start is not None:
+                futures.append(self.executor.submit(
+                    render_records, formatter, kind, record_list[start:start + self.chunk_size]
+                ))
+
+        for _ in range(self.max_pending_chunks):
+            submit_next()
+        while futures:
+            rendered = futures.popleft().result()
+            submit_next()
+            yield from rendered
+
+    def shutdown(self, wait=True):
+        """自身で作成したプロセスプールを終了します。
+        """
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
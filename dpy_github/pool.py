@@ -0,0 +1,143 @@
+from typing import Iterable, List
+from concurrent.futures import Future
+import itertools
+import queue
+import threading
+import time
+
+import github
+import discord
+
+from .main import Reporter
+
+class ReporterPool:
+    """複数のサーバーの記録を、1つの認証済みGitHubクライアントを共有して行うプール。
+
+    記録は優先度付きキューに積まれ、max_workers 個のスレッドで順番に実行されます。
+    各記録を始める前に、その記録で消費すると見込む job_cost 回分をレート制限の残り回数から予約します。
+    実行中の記録の予約を除いた残り回数が min_remaining を下回る場合は、実行中の記録が終わるか、制限がリセットされるまで待機します。
+    """
+
+    def __init__(self, github_token: str, max_workers=4, min_remaining=500, job_cost=100, **reporter_options):
+        """
+        Args:
+            github_token (str): GitHubアカウントのアクセストークン。
+            max_workers (int, optional): 同時に記録を行うスレッド数。 Defaults to 4.
+            min_remaining (int, optional): 記録を終えた後にも残しておくレート制限の残り回数。 Defaults to 500.
+            job_cost (int, optional): 1回の記録で消費すると見込むリクエスト数。
+                並行して実行する記録の途中で制限に達しないよう、記録を始める前にこの回数を予約します。 Defaults to 100.
+            **reporter_options: 各 Reporter に渡す既定のキーワード引数（branch_name, incremental 等）。
+        """
+        self.github_client = github.Github(github_token, pool_size=max_workers)
+        self.max_workers = max_workers
+        self.min_remaining = min_remaining
+        self.job_cost = job_cost
+        self.reporter_options = reporter_options
+
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._quota_lock = threading.Condition()
+        # 実行中の記録が予約したリクエスト数の合計。
+        self._reserved = 0
+        self._workers: List[threading.Thread] = []
+
+    def _start_workers(self):
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._work, daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, guild: discord.Guild, repository_name: str, commit_title="commit", priority=0, **reporter_options) -> Future:
+        """サーバーの記録をキューに追加します。
+
+        Args:
+            guild (discord.Guild): 記録を行うサーバー。
+            repository_name (str): リポジトリ名。
+            commit_title (str, optional): コミットのタイトルです。 Defaults to "commit".
+            priority (int, optional): 優先度。値が小さいものから先に記録します。 Defaults to 0.
+            **reporter_options: このサーバーの Reporter にのみ渡すキーワード引数。
+
+        Returns:
+            Future: 記録が完了するとリポジトリのURLを結果に持つFuture。asyncio からは asyncio.wrap_future で待機できます。
+        """
+        future = Future()
+        options = dict(self.reporter_options, **reporter_options)
+        self._queue.put((priority, next(self._counter), (future, guild, repository_name, commit_title, options)))
+        self._start_workers()
+        return future
+
+    def push_all(self, guilds: Iterable[discord.Guild], repository_name_format="log-{guild.id}",
+        commit_title="commit", priority=0) -> List[Future]:
+        """複数のサーバーの記録をまとめてキューに追加します。
+
+        Args:
+            guilds (Iterable[discord.Guild]): 記録を行うサーバー。
+            repository_name_format (str, optional): サーバーからリポジトリ名を作るための書式。 Defaults to "log-{guild.id}".
+            commit_title (str, optional): コミットのタイトルです。 Defaults to "commit".
+            priority (int, optional): 優先度。 Defaults to 0.
+
+        Returns:
+            List[Future]: guilds と同じ順番に並んだ、各記録のFuture。
+        """
+        return [
+            self.submit(guild, repository_name_format.format(guild=guild), commit_title=commit_title, priority=priority)
+            for guild in guilds
+        ]
+
+    def shutdown(self, wait=True):
+        """キューに残っている記録を終えた後、ワーカーを停止します。
+
+        Args:
+            wait (bool, optional): Trueなら全てのワーカーが停止するまで待機します。 Defaults to True.
+        """
+        for _ in self._workers:
+            # 優先度を無限大にすることで、残っている記録の後に取り出されます。
+            self._queue.put((float("inf"), next(self._counter), None))
+        if wait:
+            for worker in self._workers:
+                worker.join()
+        self._workers = []
+
+    def _wait_for_quota(self):
+        """レート制限の残り回数から job_cost 回分を予約します。
+        実行中の記録の予約を除いて足りなければ、それらの記録が終わるのを待ち、実行中の記録がなければリセットされるまで待機します。
+        """
+        with self._quota_lock:
+            while True:
+                remaining, _ = self.github_client.rate_limiting
+                if remaining - self._reserved - self.job_cost >= self.min_remaining:
+                    self._reserved += self.job_cost
+                    return
+                if self._reserved:
+                    self._quota_lock.wait()
+                else:
+                    reset_time = self.github_client.rate_limiting_resettime
+                    time.sleep(max(reset_time - time.time(), 0) + 1)
+                    # 待機中にリクエストを行っていないため、リセット後の残り回数を取得し直します。
+                    self.github_client.get_rate_limit()
+
+    def _release_quota(self):
+        with self._quota_lock:
+            self._reserved -= self.job_cost
+            self._quota_lock.notify_all()
+
+    def _work(self):
+        while True:
+            _, _, job = self._queue.get()
+            if job is None:
+                return
+            future, guild, repository_name, commit_title, options = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                self._wait_for_quota()
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            try:
+                reporter = Reporter(guild, None, repository_name, github_client=self.github_client, **options)
+                future.set_result(reporter.push(commit_title))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self._release_quota()
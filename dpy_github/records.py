@@ -0,0 +1,219 @@
+"""フォーマッターが読む属性のみを写し取った、pickle可能な軽量なレコード。
+
+discord.py のモデルはクライアントの状態への参照を持つため、別のプロセスへ送ることができません。
+レコードは組み込み型の値のみを持つため、プロセスプールで整形する場合や、後で整形するために状態を保存する場合に利用します。
+"""
+from typing import Dict, Iterator, Optional, Tuple
+import operator
+
+import discord
+
+class Record:
+    """__slots__ の値で比較・表示を行うレコードの基底クラス。
+    """
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # 差分の計算では全てのレコードを比較するため、属性の取り出しを1回の呼び出しで行います。
+        cls._astuple = operator.attrgetter(*cls.__slots__)
+
+    def astuple(self) -> tuple:
+        return self._astuple(self)
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self.astuple() == other.astuple()
+
+    def __hash__(self) -> int:
+        return hash(self.astuple())
+
+    def __repr__(self) -> str:
+        values = " ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"<{type(self).__name__} {values}>"
+
+    # __slots__ のみを持つクラスは、古いプロトコルでも pickle できるよう状態を明示します。
+    def __getstate__(self) -> tuple:
+        return self.astuple()
+
+    def __setstate__(self, state: tuple):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+def iter_overwrite_pairs(channel: discord.abc.GuildChannel) -> Iterator[Tuple[bool, int, int, int]]:
+    """チャンネルの権限上書きを、PermissionOverwrite を作成せずに (ロールであるか, 対象のID, allow, deny) の組で列挙します。
+    channel.overwrites と同様に、キャッシュに存在しないロール・メンバーへの上書きは含みません。
+    """
+    raw_overwrites = getattr(channel, "_overwrites", None)
+    if raw_overwrites is None:
+        for target, overwrite in channel.overwrites.items():
+            allow, deny = overwrite.pair()
+            yield isinstance(target, discord.Role), target.id, allow.value, deny.value
+        return
+
+    guild = channel.guild
+    for overwrite in raw_overwrites:
+        # discord.py 1.x では "role"/"member"、2.x では 0/1 で種類を表します。
+        if overwrite.type in ("role", 0):
+            if guild.get_role(overwrite.id) is not None:
+                yield True, overwrite.id, overwrite.allow, overwrite.deny
+        elif guild.get_member(overwrite.id) is not None:
+            yield False, overwrite.id, overwrite.allow, overwrite.deny
+
+class ChannelRecord(Record):
+    """
+    Attributes:
+        kind (Optional[str]): "text", "voice", "category" のいずれか。それ以外のチャンネルはNone。
+        type_name (str): channel.type[0] の値。
+        overwrites (Tuple[Tuple[bool, int, int, int], ...]): iter_overwrite_pairs の結果。
+        topic, slowmode_delay, nsfw, news, bitrate, user_limit: kind に該当しない属性はNone。
+    """
+    __slots__ = (
+        "id", "name", "position", "type_name", "category_id", "kind", "overwrites",
+        "topic", "slowmode_delay", "nsfw", "news", "bitrate", "user_limit"
+    )
+
+    def __init__(self, id: int, name: str, position: int, type_name: str, category_id: Optional[int], kind: Optional[str],
+        overwrites: tuple, topic: Optional[str]=None, slowmode_delay: Optional[int]=None, nsfw: Optional[bool]=None,
+        news: Optional[bool]=None, bitrate: Optional[int]=None, user_limit: Optional[int]=None):
+        self.id = id
+        self.name = name
+        self.position = position
+        self.type_name = type_name
+        self.category_id = category_id
+        self.kind = kind
+        self.overwrites = overwrites
+        self.topic = topic
+        self.slowmode_delay = slowmode_delay
+        self.nsfw = nsfw
+        self.news = news
+        self.bitrate = bitrate
+        self.user_limit = user_limit
+
+    @classmethod
+    def from_channel(cls, channel: discord.abc.GuildChannel) -> "ChannelRecord":
+        record = cls(
+            channel.id, channel.name, channel.position, channel.type[0], channel.category_id, None,
+            tuple(iter_overwrite_pairs(channel))
+        )
+        if isinstance(channel, discord.TextChannel):
+            record.kind = "text"
+            record.topic = channel.topic
+            record.slowmode_delay = channel.slowmode_delay
+            record.nsfw = channel.is_nsfw()
+            record.news = channel.is_news()
+        elif isinstance(channel, discord.VoiceChannel):
+            record.kind = "voice"
+            record.bitrate = channel.bitrate
+            record.user_limit = channel.user_limit
+        elif isinstance(channel, discord.CategoryChannel):
+            record.kind = "category"
+            record.nsfw = channel.is_nsfw()
+        return record
+
+class RoleRecord(Record):
+    """
+    Attributes:
+        permissions (int): role.permissions.value
+        color (Tuple[int, int, int]): role.color.to_rgb()
+    """
+    __slots__ = ("id", "name", "hoist", "position", "mentionable", "permissions", "color")
+
+    def __init__(self, id: int, name: str, hoist: bool, position: int, mentionable: bool, permissions: int,
+        color: Tuple[int, int, int]):
+        self.id = id
+        self.name = name
+        self.hoist = hoist
+        self.position = position
+        self.mentionable = mentionable
+        self.permissions = permissions
+        self.color = color
+
+    @classmethod
+    def from_role(cls, role: discord.Role) -> "RoleRecord":
+        return cls(role.id, role.name, role.hoist, role.position, role.mentionable, role.permissions.value,
+            role.color.to_rgb())
+
+class MemberRecord(Record):
+    """
+    Attributes:
+        role_ids (Tuple[int, ...]): @everyone を除く、ロールの順番に並んだロールのID。
+        name (str): 目次に載せるユーザー名。
+    """
+    __slots__ = ("id", "nick", "role_ids", "name")
+
+    def __init__(self, id: int, nick: Optional[str], role_ids: Tuple[int, ...], name: str=""):
+        self.id = id
+        self.nick = nick
+        self.role_ids = role_ids
+        self.name = name
+
+    @classmethod
+    def from_member(cls, member: discord.Member, role_order: Optional[Dict[int, Tuple[int, int]]]=None) -> "MemberRecord":
+        """
+        Args:
+            role_order (Optional[Dict[int, Tuple[int, int]]], optional): role_order(member.guild) の結果。
+                多数のメンバーを写し取る場合に渡すと、 member.roles による Role の作成と並べ替えを省略します。
+        """
+        if role_order is None:
+            # member.roles の先頭は常に @everyone です。
+            return cls(member.id, member.nick, tuple(role.id for role in member.roles[1:]), member.name)
+        role_ids = sorted((role_id for role_id in member._roles if role_id in role_order), key=role_order.__getitem__)
+        return cls(member.id, member.nick, tuple(role_ids), member.name)
+
+class GuildRecord(Record):
+    """
+    Attributes:
+        region, verification_level, explicit_content_filter, default_notifications: 列挙型の値（pickle可能な組み込み型）。
+            整形時に enum_value で列挙型に戻します。
+        icon_url, banner_url, splash_url (str): 各URLを str() で文字列にしたもの。
+    """
+    __slots__ = (
+        "id", "name", "region", "afk_timeout", "afk_channel_id", "icon_url", "owner_id", "banner_url", "description",
+        "mfa_level", "verification_level", "explicit_content_filter", "default_notifications", "splash_url",
+        "premium_tier", "premium_subscription_count"
+    )
+
+    def __init__(self, id: int, name: str, region, afk_timeout: int, afk_channel_id: Optional[int], icon_url: str,
+        owner_id: Optional[int], banner_url: str, description: Optional[str], mfa_level: int, verification_level,
+        explicit_content_filter, default_notifications, splash_url: str, premium_tier: int, premium_subscription_count: int):
+        self.id = id
+        self.name = name
+        self.region = region
+        self.afk_timeout = afk_timeout
+        self.afk_channel_id = afk_channel_id
+        self.icon_url = icon_url
+        self.owner_id = owner_id
+        self.banner_url = banner_url
+        self.description = description
+        self.mfa_level = mfa_level
+        self.verification_level = verification_level
+        self.explicit_content_filter = explicit_content_filter
+        self.default_notifications = default_notifications
+        self.splash_url = splash_url
+        self.premium_tier = premium_tier
+        self.premium_subscription_count = premium_subscription_count
+
+    @classmethod
+    def from_guild(cls, guild: discord.Guild) -> "GuildRecord":
+        return cls(
+            guild.id, guild.name, _plain_value(guild.region), guild.afk_timeout,
+            guild.afk_channel.id if guild.afk_channel is not None else None, str(guild.icon_url), guild.owner_id,
+            str(guild.banner_url), guild.description, guild.mfa_level, _plain_value(guild.verification_level),
+            _plain_value(guild.explicit_content_filter), _plain_value(guild.default_notifications),
+            str(guild.splash_url), guild.premium_tier, guild.premium_subscription_count
+        )
+
+def role_order(guild: discord.Guild) -> Dict[int, Tuple[int, int]]:
+    """@everyone を除くロールのIDと、 Role の比較と同じ順番に並べるためのキーの対応を返します。
+    """
+    # Role.__lt__ は position が同じ場合、IDが大きい方を下位とします。
+    return {role.id: (role.position, -role.id) for role in guild.roles if role.id != guild.id}
+
+def _plain_value(value):
+    # discord.py の列挙型の値は value 属性を持ちます。未知の値は文字列・整数のまま渡されます。
+    return getattr(value, "value", value)
+
+def enum_value(enum_class: type, value):
+    """GuildRecord 等に保存した値を列挙型に戻します。該当する値がなければ value をそのまま返します。
+    """
+    return discord.enums.try_enum(enum_class, value)
@@ -0,0 +1,95 @@
+from typing import Hashable, Optional, Tuple
+import os
+import pickle
+import tempfile
+
+from . import util
+
+class RenderCache:
+    """
+    整形済みのファイルの内容とblobのSHAを、オブジェクトの種類・IDと指紋（フォーマッターが読む属性の組）ごとに保持するキャッシュ。
+    指紋が前回と同じオブジェクトは整形・シリアライズ・SHAの計算を省略できます。
+    """
+
+    # 保存形式を変更した場合は値を増やし、古いファイルを読み込まないようにします。
+    file_version = 2
+
+    def __init__(self, max_entries: int=200000, max_bytes: Optional[int]=256 * 2 ** 20, path: Optional[str]=None):
+        """
+        Args:
+            max_entries (int, optional): 保持するオブジェクト数の上限。 Defaults to 200000.
+            max_bytes (int, optional): 保持する内容のバイト数の合計の上限。Noneなら制限しません。 Defaults to 256MiB.
+            path (str, optional): 指定した場合、存在すればこのファイルから読み込み、 save() で書き込みます。
+                pickle 形式のため、信頼できるファイルのみを指定してください。
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = util.LRUCache(max_entries, max_weight=max_bytes)
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, kind: str, object_id: int, fingerprint: Hashable) -> Optional[Tuple[bytes, str]]:
+        """指紋が一致する場合のみ、保持している (内容のバイト列, blobのSHA) を返します。
+        """
+        entry = self._entries.get((kind, object_id))
+        if entry is None or entry[0] != fingerprint:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1], entry[2]
+
+    def put(self, kind: str, object_id: int, fingerprint: Hashable, content_bytes: bytes, blob_sha: str):
+        self._entries.set((kind, object_id), (fingerprint, content_bytes, blob_sha), weight=len(content_bytes))
+
+    def discard(self, kind: str, object_id: int):
+        """削除されたオブジェクトの項目を取り除きます。存在しなければ何もしません。
+        """
+        self._entries.pop((kind, object_id))
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def save(self, path: Optional[str]=None):
+        """保持している項目をファイルに書き込みます。書き込みは一時ファイルを経由するため、途中で失敗しても元のファイルは壊れません。
+
+        Raises:
+            ValueError: path がコンストラクタでもこのメソッドでも指定されていません。
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError("保存先の path を指定する必要があります。")
+        data = {"version": self.file_version, "entries": self._entries.items()}
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".render_cache-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def load(self, path: Optional[str]=None):
+        """save() で書き込んだファイルを読み込み、現在の項目を置き換えます。
+        形式が異なるファイルや壊れたファイルは、キャッシュが空の状態と同じとして無視します。
+        """
+        path = path or self.path
+        try:
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != self.file_version:
+            return
+        self._replace(data["entries"])
+
+    def _replace(self, items):
+        self._entries.clear()
+        for key, entry in items:
+            self._entries.set(key, entry, weight=len(entry[1]))
@@ -0,0 +1,582 @@
+"""記録したコミットの状態をサーバーに書き戻す機能。
+
+記録したファイルと現在のサーバーから作成したファイルのblobのSHAを比較し、異なるファイルのみを読み込みます。
+読み込んだファイルをレコードに戻して現在の状態と比較し、必要な編集のみを段階ごとに並べた RestorePlan を作成します。
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import json
+import logging
+
+import discord
+
+from . import format_model
+from . import i18n
+from . import records
+from . import snapshot
+from . import storage
+
+logger = logging.getLogger(__name__)
+
+# 権限上書き・ロールの権限として記録される権限のビット。これ以外のビットは現在の値を残します。
+_recorded_permissions = 0
+for _flag, _ in format_model._permission_flags:
+    _recorded_permissions |= _flag
+
+# RestoreOperation.stage の値。小さい段階から順に、段階ごとに全ての操作が終わってから次の段階を実行します。
+# 作成したロール・チャンネルは後の段階の権限上書きやメンバーのロールから参照されるため、先に作成します。
+STAGE_CREATE_ROLE = 0
+STAGE_EDIT_ROLE = 1
+STAGE_ROLE_POSITIONS = 2
+STAGE_CREATE_CATEGORY = 3
+STAGE_CREATE_CHANNEL = 4
+STAGE_EDIT_CHANNEL = 5
+STAGE_CHANNEL_POSITIONS = 6
+STAGE_EDIT_MEMBER = 7
+STAGE_EDIT_GUILD = 8
+STAGE_DELETE = 9
+
+def parse_path(file_path: str) -> Optional[Tuple[str, Optional[int]]]:
+    """リポジトリ内のパスから、 ("channel" | "role" | "member" | "guild", ID) を返します。
+    目次等のそれ以外のファイルではNoneを返します。サーバー設定のIDはNoneです。
+    """
+    if file_path == "guild_config.json":
+        return "guild", None
+    directory, _, file_name = file_path.partition("/")
+    if not file_name.endswith(".json"):
+        return None
+    kind = {"channels": "channel", "roles": "role", "members": "member"}.get(directory)
+    stem = file_name.rsplit("/", 1)[-1][:-len(".json")]
+    if kind is None or not stem.isdigit():
+        return None
+    return kind, int(stem)
+
+class RecordParser:
+    """DefaultFormatter が出力したJSONを、その言語の Catalog を利用してレコードに戻します。
+    ファイルに記録されない属性（メンバーのユーザー名、サーバーのアイコン等）は現在の値を引き継ぎます。
+    """
+
+    def __init__(self, catalog: i18n.Catalog):
+        self.catalog = catalog
+        self._permission_flags = {
+            catalog.permission_name(name): flag for flag, name in format_model._permission_flags
+        }
+        self._regions = {name: region for region, name in catalog.region_names.items()}
+        self._verification_levels = {name: level for level, name in catalog.verification_levels.items()}
+        self._content_filters = {name: filter_ for filter_, name in catalog.content_filters.items()}
+        self._notification_levels = {name: level for level, name in catalog.notification_levels.items()}
+
+    def _yes(self, value: str) -> bool:
+        return value == self.catalog.yes_no(True)
+
+    def parse_permission_pair(self, permission_data: Dict[str, str]) -> Tuple[int, int]:
+        """format_permission_pair の結果から (allow, deny) を返します。
+        """
+        allow = deny = 0
+        allowed = self.catalog.has_permission(True)
+        for name, value in permission_data.items():
+            flag = self._permission_flags.get(name, 0)
+            if value == allowed:
+                allow |= flag
+            else:
+                deny |= flag
+        return allow, deny
+
+    def parse_channel(self, file_path: str, data: dict) -> records.ChannelRecord:
+        catalog = self.catalog
+        parts = file_path.split("/")
+        category_id = int(parts[-2]) if len(parts) > 2 and parts[-2].isdigit() else None
+        overwrites = []
+        for target, is_role in ((catalog.permission_targets.Role, True), (catalog.permission_targets.Member, False)):
+            for target_id, permission_data in data[catalog.channel.Overwrites].get(target, {}).items():
+                overwrites.append((is_role, int(target_id)) + self.parse_permission_pair(permission_data))
+
+        record = records.ChannelRecord(
+            data[catalog.channel.ID], data[catalog.channel.Name], data[catalog.channel.Position],
+            data[catalog.channel.Type], category_id, None, tuple(overwrites)
+        )
+        if catalog.channel.Topic in data:
+            record.kind = "text"
+            record.topic = data[catalog.channel.Topic]
+            record.slowmode_delay = data[catalog.channel.SlowModeDelay]
+            record.nsfw = self._yes(data[catalog.channel.Nsfw])
+            record.news = self._yes(data[catalog.channel.News])
+        elif catalog.channel.BitRate in data:
+            record.kind = "voice"
+            record.bitrate = data[catalog.channel.BitRate]
+            record.user_limit = data[catalog.channel.UserLimit]
+        elif catalog.channel.Nsfw in data:
+            record.kind = "category"
+            record.nsfw = self._yes(data[catalog.channel.Nsfw])
+        return record
+
+    def parse_role(self, role_id: int, data: dict, current: Optional[records.RoleRecord]=None) -> records.RoleRecord:
+        catalog = self.catalog
+        permissions, _ = self.parse_permission_pair(data[catalog.role.Permission])
+        if current is not None:
+            permissions |= current.permissions & ~_recorded_permissions
+        color = tuple(int(value) for value in data[catalog.role.Color].strip("()").split(","))
+        return records.RoleRecord(
+            role_id, data[catalog.role.Name], self._yes(data[catalog.role.Hoist]), data[catalog.role.Position],
+            data[catalog.role.Mentionable] == catalog.has_permission(True), permissions, color
+        )
+
+    def parse_member(self, member_id: int, data: dict, current: records.MemberRecord) -> records.MemberRecord:
+        catalog = self.catalog
+        return records.MemberRecord(
+            member_id, data[catalog.member.Nick], tuple(int(role_id) for role_id in data[catalog.member.Roles]),
+            current.name
+        )
+
+    def parse_guild(self, data: dict, current: records.GuildRecord) -> records.GuildRecord:
+        """サーバー設定のうち、地域・非アクティブタイムアウト・休止チャンネル・説明・認証レベル・
+        不適切なメディアコンテンツフィルター・標準の通知設定を読み込みます。
+        """
+        catalog = self.catalog
+        afk_channel_id = data[catalog.guild.AfkChannelID]
+
+        def plain(table: dict, name: str):
+            return records._plain_value(table.get(name, name))
+
+        return records.GuildRecord(
+            current.id, current.name, plain(self._regions, data[catalog.guild.Region]),
+            data[catalog.guild.AfkTimeout], int(afk_channel_id) if afk_channel_id != "" else None, current.icon_url,
+            current.owner_id, current.banner_url, data[catalog.guild.Description], current.mfa_level,
+            plain(self._verification_levels, data[catalog.guild.VerificationLevel]),
+            plain(self._content_filters, data[catalog.guild.ExplicitContentFilter]),
+            plain(self._notification_levels, data[catalog.guild.DefaultNotifications]),
+            current.splash_url, current.premium_tier, current.premium_subscription_count
+        )
+
+class RestoreOperation:
+    """
+    サーバーに対する1回の編集。
+
+    Attributes:
+        stage (int): 実行する段階。 STAGE_CREATE_ROLE 等のいずれか。
+        kind (str): "channel", "role", "member", "guild" のいずれか。
+        action (str): "create", "edit", "positions", "delete" のいずれか。
+        target_id (Optional[int]): 記録した時点のオブジェクトのID。 "positions" ではNone。
+        fields (dict): 作成・変更する属性名と値。 "positions" では記録した時点のIDと位置の対応。
+    """
+    __slots__ = ("stage", "kind", "action", "target_id", "fields")
+
+    def __init__(self, stage: int, kind: str, action: str, target_id: Optional[int], fields: dict):
+        self.stage = stage
+        self.kind = kind
+        self.action = action
+        self.target_id = target_id
+        self.fields = fields
+
+    def as_dict(self) -> dict:
+        return {
+            "stage": self.stage,
+            "kind": self.kind,
+            "action": self.action,
+            "id": self.target_id,
+            "fields": {str(name): value for name, value in self.fields.items()}
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"<RestoreOperation stage={self.stage} kind={self.kind} action={self.action} "
+            f"id={self.target_id} fields={list(self.fields)}>"
+        )
+
+class RestorePlan:
+    """
+    現在のサーバーを記録した状態に戻すための、段階順に並んだ編集の一覧。編集が不要なら偽と評価されます。
+
+    Attributes:
+        operations (List[RestoreOperation]): 段階の順に並んだ編集。
+        skipped (List[str]): 記録されているが復元できないオブジェクトの説明（サーバーにいないメンバー等）。
+        commit_sha (Optional[str]): 復元元のコミットのSHA。
+    """
+
+    def __init__(self, operations: List[RestoreOperation], skipped: List[str], commit_sha: Optional[str]=None):
+        self.operations = sorted(operations, key=lambda operation: operation.stage)
+        self.skipped = skipped
+        self.commit_sha = commit_sha
+
+    @classmethod
+    def build(cls, current: snapshot.GuildSnapshot, recorded: Dict[Tuple[str, Optional[int]], records.Record],
+        extra: Iterable[Tuple[str, int]]=(), commit_sha: Optional[str]=None) -> "RestorePlan":
+        """current を recorded の状態にするための編集を計算します。APIへのリクエストは行いません。
+
+        Args:
+            current (snapshot.GuildSnapshot): 現在のサーバーの状態。
+            recorded (Dict[Tuple[str, Optional[int]], records.Record]): parse_path の結果と、記録したファイルから読み込んだレコード。
+                現在と異なる可能性のあるオブジェクトのみを含めれば十分です。
+            extra (Iterable[Tuple[str, int]], optional): 記録されておらず、削除するチャンネル・ロール。
+        """
+        operations: List[RestoreOperation] = []
+        skipped: List[str] = []
+        channels = {record.id: record for record in current.channels}
+        roles = {record.id: record for record in current.roles}
+        members = {record.id: record for record in current.members}
+        role_positions: Dict[int, int] = {}
+        channel_positions: Dict[int, Tuple[int, Optional[int]]] = {}
+
+        for (kind, object_id), record in recorded.items():
+            if kind == "role":
+                old = roles.get(object_id)
+                if old is None:
+                    operations.append(RestoreOperation(STAGE_CREATE_ROLE, "role", "create", object_id, {
+                        "name": record.name, "hoist": record.hoist, "mentionable": record.mentionable,
+                        "permissions": record.permissions, "color": record.color
+                    }))
+                    role_positions[object_id] = record.position
+                    continue
+                fields = _changed_fields(old, record)
+                if object_id != current.id and fields.pop("position", None) is not None:
+                    role_positions[object_id] = record.position
+                fields.pop("position", None)
+                if fields:
+                    operations.append(RestoreOperation(STAGE_EDIT_ROLE, "role", "edit", object_id, fields))
+
+            elif kind == "channel":
+                old = channels.get(object_id)
+                if old is None:
+                    if record.kind is None:
+                        skipped.append(f"channel {object_id} ({record.name}): 種類 {record.type_name} のチャンネルは作成できません。")
+                        continue
+                    stage = STAGE_CREATE_CATEGORY if record.kind == "category" else STAGE_CREATE_CHANNEL
+                    fields = {
+                        name: value for name, value in zip(record.__slots__, record.astuple())
+                        if value is not None and name not in ("id", "type_name")
+                    }
+                    operations.append(RestoreOperation(stage, "channel", "create", object_id, fields))
+                    continue
+                if sorted(old.overwrites) == sorted(record.overwrites):
+                    record.overwrites = old.overwrites
+                fields = _changed_fields(old, record)
+                position = fields.pop("position", None)
+                category = fields.pop("category_id", None)
+                if position is not None or category is not None:
+                    channel_positions[object_id] = (record.position, record.category_id)
+                if "type_name" in fields or "kind" in fields:
+                    fields.pop("type_name", None)
+                    if fields.pop("kind", None) is not None:
+                        skipped.append(f"channel {object_id} ({record.name}): チャンネルの種類は変更できません。")
+                if fields:
+                    operations.append(RestoreOperation(STAGE_EDIT_CHANNEL, "channel", "edit", object_id, fields))
+
+            elif kind == "member":
+                old = members.get(object_id)
+                if old is None:
+                    skipped.append(f"member {object_id}: サーバーにいないため復元できません。")
+                    continue
+                if set(old.role_ids) == set(record.role_ids):
+                    record.role_ids = old.role_ids
+                fields = _changed_fields(old, record)
+                if fields:
+                    operations.append(RestoreOperation(STAGE_EDIT_MEMBER, "member", "edit", object_id, fields))
+
+            elif kind == "guild":
+                fields = _changed_fields(current.guild, record)
+                if fields:
+                    operations.append(RestoreOperation(STAGE_EDIT_GUILD, "guild", "edit", current.id, fields))
+
+        # 位置の変更は1回のリクエストでまとめて送信します。
+        if role_positions:
+            operations.append(RestoreOperation(STAGE_ROLE_POSITIONS, "role", "positions", None, role_positions))
+        if channel_positions:
+            operations.append(RestoreOperation(STAGE_CHANNEL_POSITIONS, "channel", "positions", None, channel_positions))
+        for kind, object_id in extra:
+            if kind in ("channel", "role") and object_id != current.id:
+                operations.append(RestoreOperation(STAGE_DELETE, kind, "delete", object_id, {}))
+        return cls(operations, skipped, commit_sha)
+
+    def __bool__(self) -> bool:
+        return bool(self.operations)
+
+    def __len__(self) -> int:
+        return len(self.operations)
+
+    def __iter__(self):
+        return iter(self.operations)
+
+    def stages(self) -> List[List[RestoreOperation]]:
+        """同じ段階の編集ごとにまとめた一覧を、実行する順番で返します。
+        """
+        stages: List[List[RestoreOperation]] = []
+        for operation in self.operations:
+            if not stages or stages[-1][0].stage != operation.stage:
+                stages.append([])
+            stages[-1].append(operation)
+        return stages
+
+    def as_dict(self) -> dict:
+        """JSONに変換できる辞書を返します。
+        """
+        return {
+            "commit_sha": self.commit_sha,
+            "operations": [operation.as_dict() for operation in self.operations],
+            "skipped": list(self.skipped)
+        }
+
+    def __repr__(self) -> str:
+        return f"<RestorePlan commit_sha={self.commit_sha} operations={len(self.operations)} skipped={len(self.skipped)}>"
+
+def _changed_fields(old: records.Record, new: records.Record) -> dict:
+    return {
+        name: new_value for name, old_value, new_value in zip(old.__slots__, old.astuple(), new.astuple())
+        if old_value != new_value
+    }
+
+def load_recorded(backend: storage.StorageBackend, catalog: i18n.Catalog, current: snapshot.GuildSnapshot,
+    recorded_blobs: Dict[str, str], current_blobs: Dict[str, Optional[str]],
+    fetch_workers: int=8) -> Tuple[Dict[Tuple[str, Optional[int]], records.Record], List[Tuple[str, int]]]:
+    """記録したファイルのうち、現在のサーバーから作成したファイルとblobのSHAが異なるものだけを読み込み、レコードに戻します。
+
+    Args:
+        backend (storage.StorageBackend): 記録先。
+        catalog (i18n.Catalog): ファイルの出力に利用した言語。
+        current (snapshot.GuildSnapshot): 現在のサーバーの状態。
+        recorded_blobs (Dict[str, str]): 復元元のツリーのファイルのパスとblobのSHAの対応。
+        current_blobs (Dict[str, Optional[str]]): 現在のサーバーから作成したファイルのパスとblobのSHAの対応。
+        fetch_workers (int, optional): blobを並行して読み込むスレッド数。 Defaults to 8.
+
+    Returns:
+        Tuple[Dict[Tuple[str, Optional[int]], records.Record], List[Tuple[str, int]]]:
+            RestorePlan.build に渡す、読み込んだレコードと、記録されていないチャンネル・ロール・メンバー。
+    """
+    pending: Dict[str, Tuple[str, Optional[int]]] = {}
+    for path, blob_sha in recorded_blobs.items():
+        parsed = parse_path(path)
+        if parsed is not None and current_blobs.get(path) != blob_sha:
+            pending[path] = parsed
+    # チャンネルのパスにはカテゴリーが含まれるため、カテゴリーを移動しただけのチャンネルを記録されていないと扱わないよう、
+    # パスではなく種類とIDで比較します。
+    recorded_objects = {parse_path(path) for path in recorded_blobs}
+    extra = []
+    for path in current_blobs:
+        parsed = parse_path(path)
+        if parsed is not None and parsed not in recorded_objects:
+            extra.append(parsed)
+
+    # 同じ内容のファイル（ロールが同じメンバー等）は1回だけ読み込みます。
+    blob_shas = list({recorded_blobs[path] for path in pending})
+    with ThreadPoolExecutor(max_workers=fetch_workers) as executor:
+        contents = dict(zip(blob_shas, executor.map(backend.get_blob, blob_shas)))
+
+    parser = RecordParser(catalog)
+    roles = {record.id: record for record in current.roles}
+    members = {record.id: record for record in current.members}
+    recorded: Dict[Tuple[str, Optional[int]], records.Record] = {}
+    for path, (kind, object_id) in pending.items():
+        data = json.loads(contents[recorded_blobs[path]].decode("utf-8"))
+        if kind == "channel":
+            record = parser.parse_channel(path, data)
+        elif kind == "role":
+            record = parser.parse_role(object_id, data, roles.get(object_id))
+        elif kind == "member":
+            if object_id not in members:
+                # ユーザー名を引き継げないため、IDとニックネームのみのレコードにします。
+                record = records.MemberRecord(object_id, data[catalog.member.Nick], ())
+            else:
+                record = parser.parse_member(object_id, data, members[object_id])
+        else:
+            record = parser.parse_guild(data, current.guild)
+        recorded[(kind, object_id)] = record
+    return recorded, extra
+
+class RestoreExecutor:
+    """RestorePlan の編集をサーバーに適用します。
+
+    段階ごとに、その段階の編集を最大 max_concurrency 個ずつ並行して送信します。
+    レート制限に達した場合は discord.py が制限の解除を待って再送するため、同時に送信する数のみを制限します。
+    失敗した編集はログに記録して残りの編集を続け、結果に含めます。
+    """
+
+    def __init__(self, guild: discord.Guild, max_concurrency: int=4, reason: Optional[str]=None):
+        """
+        Args:
+            guild (discord.Guild): 編集するサーバー。
+            max_concurrency (int, optional): 同時に送信する編集の数。 Defaults to 4.
+            reason (Optional[str], optional): 監査ログに記録する理由。
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency は1以上である必要があります。")
+        self.guild = guild
+        self.max_concurrency = max_concurrency
+        self.reason = reason
+        # 記録した時点のIDと、作成し直したロール・チャンネルの対応。
+        self._created_roles: Dict[int, discord.Role] = {}
+        self._created_channels: Dict[int, discord.abc.GuildChannel] = {}
+
+    async def run(self, plan: RestorePlan, dry_run: bool=False) -> List[dict]:
+        """plan の編集を段階の順に実行します。
+
+        Args:
+            plan (RestorePlan): 実行する編集。
+            dry_run (bool, optional): Trueなら編集を送信せず、実行する予定の編集のみを返します。 Defaults to False.
+
+        Returns:
+            List[dict]: RestoreOperation.as_dict() に、 "status" （"planned", "done", "failed"）と "error" を加えた辞書。
+        """
+        if dry_run:
+            return [dict(operation.as_dict(), status="planned", error=None) for operation in plan.operations]
+
+        results = []
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def apply(operation: RestoreOperation) -> dict:
+            if operation.action in ("edit", "delete") and self._target(operation) is None:
+                # 計画の作成後に削除されたオブジェクトは、残りの編集を止めずに失敗として記録します。
+                error = f"{operation.kind} {operation.target_id} が見つかりません。"
+                logger.warning("%r の実行に失敗しました: %s", operation, error)
+                return dict(operation.as_dict(), status="failed", error=error)
+            async with semaphore:
+                try:
+                    await self._apply(operation)
+                except discord.DiscordException as e:
+                    logger.warning("%r の実行に失敗しました: %s", operation, e)
+                    return dict(operation.as_dict(), status="failed", error=str(e))
+            return dict(operation.as_dict(), status="done", error=None)
+
+        for stage in plan.stages():
+            results.extend(await asyncio.gather(*(apply(operation) for operation in stage)))
+        return results
+
+    def _role(self, role_id: int) -> Optional[discord.Role]:
+        return self._created_roles.get(role_id) or self.guild.get_role(role_id)
+
+    def _channel(self, channel_id: Optional[int]) -> Optional[discord.abc.GuildChannel]:
+        if channel_id is None:
+            return None
+        return self._created_channels.get(channel_id) or self.guild.get_channel(channel_id)
+
+    def _target(self, operation: RestoreOperation):
+        if operation.kind == "role":
+            return self._role(operation.target_id)
+        if operation.kind == "channel":
+            return self._channel(operation.target_id)
+        if operation.kind == "member":
+            return self.guild.get_member(operation.target_id)
+        return self.guild
+
+    def _overwrites(self, pairs: Iterable[Tuple[bool, int, int, int]]) -> dict:
+        overwrites = {}
+        for is_role, target_id, allow, deny in pairs:
+            if is_role:
+                target = self._role(target_id)
+            else:
+                # discord.py はロール以外の対象をメンバーとして送信するため、キャッシュになくてもIDのみで指定できます。
+                target = self.guild.get_member(target_id) or discord.Object(target_id)
+            if target is not None:
+                overwrites[target] = discord.PermissionOverwrite.from_pair(
+                    discord.Permissions(allow), discord.Permissions(deny)
+                )
+        return overwrites
+
+    async def _apply(self, operation: RestoreOperation):
+        handler = getattr(self, f"_{operation.action}_{operation.kind}")
+        await handler(operation)
+
+    async def _create_role(self, operation: RestoreOperation):
+        fields = operation.fields
+        self._created_roles[operation.target_id] = await self.guild.create_role(
+            name=fields["name"], permissions=discord.Permissions(fields["permissions"]),
+            colour=discord.Colour.from_rgb(*fields["color"]), hoist=fields["hoist"],
+            mentionable=fields["mentionable"], reason=self.reason
+        )
+
+    async def _edit_role(self, operation: RestoreOperation):
+        options = {}
+        for name, value in operation.fields.items():
+            if name == "permissions":
+                options["permissions"] = discord.Permissions(value)
+            elif name == "color":
+                options["colour"] = discord.Colour.from_rgb(*value)
+            else:
+                options[name] = value
+        await self._role(operation.target_id).edit(reason=self.reason, **options)
+
+    async def _positions_role(self, operation: RestoreOperation):
+        positions = {}
+        for role_id, position in operation.fields.items():
+            role = self._role(role_id)
+            if role is not None:
+                positions[role] = position
+        await self.guild.edit_role_positions(positions, reason=self.reason)
+
+    async def _create_channel(self, operation: RestoreOperation):
+        fields = dict(operation.fields)
+        kind = fields.pop("kind")
+        options = {
+            "overwrites": self._overwrites(fields.pop("overwrites")),
+            "position": fields.pop("position"),
+            "reason": self.reason
+        }
+        name = fields.pop("name")
+        category = self._channel(fields.pop("category_id", None))
+        if kind == "category":
+            channel = await self.guild.create_category(name, **options)
+        elif kind == "voice":
+            channel = await self.guild.create_voice_channel(name, category=category, **options, **fields)
+        else:
+            # ニュースチャンネルへの変換はコミュニティサーバーのみ可能なため、テキストチャンネルとして作成します。
+            fields.pop("news", None)
+            channel = await self.guild.create_text_channel(name, category=category, **options, **fields)
+        self._created_channels[operation.target_id] = channel
+
+    async def _edit_channel(self, operation: RestoreOperation):
+        options = dict(operation.fields)
+        if "overwrites" in options:
+            options["overwrites"] = self._overwrites(options["overwrites"])
+        if "news" in options:
+            options["type"] = discord.ChannelType.news if options.pop("news") else discord.ChannelType.text
+        await self._channel(operation.target_id).edit(reason=self.reason, **options)
+
+    async def _positions_channel(self, operation: RestoreOperation):
+        payload = []
+        for channel_id, (position, category_id) in operation.fields.items():
+            channel = self._channel(channel_id)
+            if channel is None:
+                continue
+            category = self._channel(category_id)
+            payload.append({
+                "id": channel.id, "position": position, "parent_id": category.id if category is not None else None
+            })
+        # Guild.edit_role_positions に相当するチャンネルのメソッドがないため、一括更新のエンドポイントを直接利用します。
+        await self.guild._state.http.bulk_channel_update(self.guild.id, payload, reason=self.reason)
+
+    async def _edit_member(self, operation: RestoreOperation):
+        member = self.guild.get_member(operation.target_id)
+        options = {}
+        if "nick" in operation.fields:
+            options["nick"] = operation.fields["nick"]
+        if "role_ids" in operation.fields:
+            # 連携サービスが管理するロールは付け外しできないため、現在の状態を残します。
+            roles = [role for role in member.roles[1:] if role.managed]
+            for role_id in operation.fields["role_ids"]:
+                role = self._role(role_id)
+                if role is not None and not role.managed:
+                    roles.append(role)
+            options["roles"] = roles
+        await member.edit(reason=self.reason, **options)
+
+    async def _edit_guild(self, operation: RestoreOperation):
+        options = {}
+        for name, value in operation.fields.items():
+            if name == "afk_channel_id":
+                options["afk_channel"] = self._channel(value)
+            elif name == "region":
+                options["region"] = records.enum_value(discord.VoiceRegion, value)
+            elif name == "verification_level":
+                options["verification_level"] = records.enum_value(discord.VerificationLevel, value)
+            elif name == "explicit_content_filter":
+                options["explicit_content_filter"] = records.enum_value(discord.ContentFilter, value)
+            elif name == "default_notifications":
+                options["default_notifications"] = records.enum_value(discord.NotificationLevel, value)
+            else:
+                options[name] = value
+        await self.guild.edit(reason=self.reason, **options)
+
+    async def _delete_role(self, operation: RestoreOperation):
+        await self._role(operation.target_id).delete(reason=self.reason)
+
+    async def _delete_channel(self, operation: RestoreOperation):
+        await self._channel(operation.target_id).delete(reason=self.reason)
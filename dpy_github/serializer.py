@@ -0,0 +1,128 @@
+from typing import Dict, List, Tuple
+from json.encoder import encode_basestring
+
+class IndentedJSONEncoder:
+    """json.dumps(data, sort_keys=True, indent=4, ensure_ascii=False) と1バイトも違わない文字列を生成するエンコーダー。
+
+    標準ライブラリの json はインデントを指定するとC実装を利用できず、呼び出しごとにエンコーダーも作り直します。
+    このクラスは辞書・リスト・文字列・数値・bool・None のみを扱う代わりに、インデント文字列と
+    キーの並び順（同じ種類のモデルでは毎回同じになります）を再利用することで高速に動作します。
+    """
+
+    def __init__(self, indent=4, key_order_cache_size=1024):
+        """
+        Args:
+            indent (int, optional): インデントの空白数。 Defaults to 4.
+            key_order_cache_size (int, optional): 並び替え済みのキーの順番を保持する、キーの組み合わせの最大数。 Defaults to 1024.
+        """
+        self.indent = indent
+        self.key_order_cache_size = key_order_cache_size
+        self._newline_indents: List[str] = ["\n"]
+        self._key_orders: Dict[Tuple[str, ...], List[str]] = {}
+
+    def encode(self, value) -> str:
+        parts: List[str] = []
+        self._encode(value, 0, parts)
+        return "".join(parts)
+
+    def _newline_indent(self, level: int) -> str:
+        indents = self._newline_indents
+        while len(indents) <= level:
+            indents.append("\n" + " " * (self.indent * len(indents)))
+        return indents[level]
+
+    def _key_order(self, value: dict) -> List:
+        keys = tuple(value)
+        order = self._key_orders.get(keys)
+        if order is not None:
+            return order
+        order = sorted(keys)
+        # IDをキーとする辞書（権限上書き等）は組み合わせが毎回異なるため、文字列のキーのみ保持します。
+        if len(self._key_orders) < self.key_order_cache_size and all(key.__class__ is str for key in keys):
+            self._key_orders[keys] = order
+        return order
+
+    def _encode_key(self, key) -> str:
+        if isinstance(key, str):
+            return encode_basestring(key)
+        if key is True:
+            return '"true"'
+        if key is False:
+            return '"false"'
+        if key is None:
+            return '"null"'
+        if isinstance(key, int):
+            return '"' + int.__repr__(key) + '"'
+        if isinstance(key, float):
+            return '"' + self._encode_float(key) + '"'
+        raise TypeError(f"keys must be str, int, float, bool or None, not {key.__class__.__name__}")
+
+    @staticmethod
+    def _encode_float(value: float) -> str:
+        if value != value:
+            return "NaN"
+        if value == float("inf"):
+            return "Infinity"
+        if value == -float("inf"):
+            return "-Infinity"
+        return float.__repr__(value)
+
+    def _encode(self, value, level: int, parts: List[str]):
+        value_class = value.__class__
+        if value_class is str:
+            parts.append(encode_basestring(value))
+        elif value is None:
+            parts.append("null")
+        elif value is True:
+            parts.append("true")
+        elif value is False:
+            parts.append("false")
+        elif value_class is dict:
+            self._encode_dict(value, level, parts)
+        elif value_class is list or value_class is tuple:
+            self._encode_list(value, level, parts)
+        elif isinstance(value, str):
+            parts.append(encode_basestring(value))
+        elif isinstance(value, int):
+            parts.append(int.__repr__(value))
+        elif isinstance(value, float):
+            parts.append(self._encode_float(value))
+        elif isinstance(value, dict):
+            self._encode_dict(value, level, parts)
+        elif isinstance(value, (list, tuple)):
+            self._encode_list(value, level, parts)
+        else:
+            raise TypeError(f"Object of type {value_class.__name__} is not JSON serializable")
+
+    def _encode_dict(self, value: dict, level: int, parts: List[str]):
+        if not value:
+            parts.append("{}")
+            return
+        inner = self._newline_indent(level + 1)
+        separator = "," + inner
+        parts.append("{" + inner)
+        first = True
+        for key in self._key_order(value):
+            if first:
+                first = False
+            else:
+                parts.append(separator)
+            parts.append(self._encode_key(key) + ": ")
+            self._encode(value[key], level + 1, parts)
+        parts.append(self._newline_indent(level) + "}")
+
+    def _encode_list(self, value: list, level: int, parts: List[str]):
+        if not value:
+            parts.append("[]")
+            return
+        inner = self._newline_indent(level + 1)
+        separator = "," + inner
+        parts.append("[" + inner)
+        first = True
+        for item in value:
+            if first:
+                first = False
+            else:
+                parts.append(separator)
+            self._encode(item, level + 1, parts)
+        parts.append(self._newline_indent(level) + "]")
@@ -0,0 +1,132 @@
+from typing import List, Optional, Set, Tuple
+import datetime
+
+import discord
+
+from . import records
+from . import util
+
+class GuildSnapshot:
+    """
+    サーバーのある時点の状態を、フォーマッター・目次・ツリーの作成に必要な属性のみのレコードとして保持します。
+
+    capture() は一度の走査で全てのレコードを作成し、途中でイベントループに制御を返しません。
+    イベントループのスレッドで呼び出せば、ゲートウェイからのイベントによる変更が混ざらない一貫した状態になります。
+    作成後は discord.py のオブジェクトを参照しないため、別のスレッドやプロセスで整形したり、pickle で保存したりできます。
+
+    Attributes:
+        guild (records.GuildRecord): サーバー設定。
+        by_category (List[Tuple[Optional[records.ChannelRecord], List[records.ChannelRecord]]]):
+            util.sort_category_position(guild.by_category()) と同じ順番に並んだチャンネル。
+        roles (List[records.RoleRecord]): guild.roles と同じ順番のロール。
+        members (List[records.MemberRecord]): guild.members と同じ順番のメンバー。
+        captured_at (datetime.datetime): 作成した日時（UTC）。
+    """
+    __slots__ = ("guild", "by_category", "roles", "members", "captured_at")
+
+    def __init__(self, guild: records.GuildRecord,
+        by_category: List[Tuple[Optional[records.ChannelRecord], List[records.ChannelRecord]]],
+        roles: List[records.RoleRecord], members: List[records.MemberRecord], captured_at: datetime.datetime):
+        self.guild = guild
+        self.by_category = by_category
+        self.roles = roles
+        self.members = members
+        self.captured_at = captured_at
+
+    @classmethod
+    def capture(cls, guild: discord.Guild) -> "GuildSnapshot":
+        """guild の現在の状態を写し取ります。
+        """
+        captured_at = datetime.datetime.now(datetime.timezone.utc)
+        role_order = records.role_order(guild)
+        by_category = [
+            (
+                records.ChannelRecord.from_channel(category) if category is not None else None,
+                [records.ChannelRecord.from_channel(channel) for channel in channels]
+            )
+            for category, channels in util.sort_category_position(guild.by_category())
+        ]
+        return cls(
+            records.GuildRecord.from_guild(guild),
+            by_category,
+            [records.RoleRecord.from_role(role) for role in guild.roles],
+            [records.MemberRecord.from_member(member, role_order) for member in guild.members],
+            captured_at
+        )
+
+    @property
+    def id(self) -> int:
+        return self.guild.id
+
+    @property
+    def name(self) -> str:
+        return self.guild.name
+
+    @property
+    def channels(self) -> List[records.ChannelRecord]:
+        """カテゴリー、その中のチャンネルの順に並んだ全てのチャンネル。
+        """
+        channels = []
+        for category, category_channels in self.by_category:
+            if category is not None:
+                channels.append(category)
+            channels.extend(category_channels)
+        return channels
+
+    def updated(self, current: "GuildSnapshot", object_ids: Set[int], include_guild=False) -> "GuildSnapshot":
+        """object_ids のチャンネル・ロール・メンバーと、 include_guild ならサーバー設定のみを current の状態にしたスナップショットを返します。
+        current に存在しない object_ids のオブジェクトは削除されたものとして除き、それ以外のオブジェクトはこの状態のまま残します。
+
+        Args:
+            current (GuildSnapshot): 現在のサーバーの状態。
+            object_ids (Set[int]): 更新するオブジェクトのID。
+            include_guild (bool, optional): Trueならサーバー設定も更新します。 Defaults to False.
+        """
+        def merge(old_records: list, new_records: list) -> list:
+            old_by_id = {record.id: record for record in old_records}
+            present = {record.id for record in new_records}
+            merged = [
+                record if record.id in object_ids else old_by_id[record.id]
+                for record in new_records if record.id in object_ids or record.id in old_by_id
+            ]
+            merged.extend(record for record in old_records if record.id not in object_ids and record.id not in present)
+            return merged
+
+        old_channels = {channel.id: channel for channel in self.channels}
+        new_channels = {channel.id for channel in current.channels}
+
+        def pick(record: Optional[records.ChannelRecord]) -> Optional[records.ChannelRecord]:
+            if record is None or record.id in object_ids:
+                return record
+            return old_channels.get(record.id)
+
+        by_category = []
+        for category, channels in current.by_category:
+            by_category.append((pick(category), [channel for channel in map(pick, channels) if channel is not None]))
+        # 更新しないオブジェクトのうち current に存在しないものは、カテゴリーなしのチャンネルとして残します。
+        remaining = [
+            channel for channel in self.channels if channel.id not in object_ids and channel.id not in new_channels
+        ]
+        if remaining:
+            by_category.append((None, remaining))
+
+        return GuildSnapshot(
+            current.guild if include_guild else self.guild,
+            by_category,
+            merge(self.roles, current.roles),
+            merge(self.members, current.members),
+            current.captured_at
+        )
+
+    def __getstate__(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state: tuple):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    def __repr__(self) -> str:
+        return (
+            f"<GuildSnapshot id={self.id} name={self.name!r} channels={len(self.channels)} "
+            f"roles={len(self.roles)} members={len(self.members)} captured_at={self.captured_at.isoformat()}>"
+        )
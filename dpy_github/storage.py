@@ -0,0 +1,521 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import os
+import pathlib
+import subprocess
+import tempfile
+import time
+import zlib
+import base64
+import hashlib
+
+import github
+
+from . import util
+
+class StorageBackend(ABC):
+    """Reporter が作成したツリー・コミット・ブランチの参照を保存する先の抽象基底クラス。
+    各オブジェクトはGitと同じSHA-1で識別されます。
+    """
+
+    # 送信したリクエストの累計。リクエストを行わないバックエンドでは0のままです。
+    request_count = 0
+    # 送信・書き込みしたファイルの内容のバイト数の累計。既に存在し送信を省略したblobは含みません。
+    bytes_uploaded = 0
+    # blobをアップロードするごとに、アップロードしたblobのSHAのリストを渡して呼び出す関数。
+    # checkpoint.PushJob が、中断後の再開でアップロードを省略するために設定します。
+    upload_hook: Optional[Callable[[List[str]], None]] = None
+
+    @property
+    def stream_batch_size(self) -> int:
+        """create_tree_streaming で batch_size を省略した場合のバッチの大きさ。0であれば全体を1つのバッチとして扱います。
+        """
+        return 2000
+
+    @property
+    def rate_limit_remaining(self) -> Optional[int]:
+        """最後に分かったレート制限の残り回数。制限がないか分からなければNoneを返します。
+        """
+        return None
+
+    @property
+    @abstractmethod
+    def html_url(self) -> str:
+        """目次のリンクに利用する、リポジトリのURL。
+        """
+        pass
+
+    @abstractmethod
+    def get_head(self, branch_name: str) -> Optional[str]:
+        """ブランチの先頭のコミットのSHAを返します。ブランチが存在しなければNoneを返します。
+        """
+        pass
+
+    @abstractmethod
+    def get_commit_tree(self, commit_sha: str) -> str:
+        """コミットが指すツリーのSHAを返します。
+        """
+        pass
+
+    @abstractmethod
+    def get_tree_blobs(self, tree_sha: str) -> Optional[Dict[str, str]]:
+        """ツリーに含まれる全てのファイルのパスとblobのSHAの対応を返します。取得できなければNoneを返します。
+        """
+        pass
+
+    def get_blob(self, blob_sha: str) -> bytes:
+        """blobの内容を返します。記録した状態の復元に利用します。
+
+        Raises:
+            NotImplementedError: このバックエンドはblobの読み込みに対応していません。
+        """
+        raise NotImplementedError(f"{type(self).__name__} はblobの読み込みに対応していません。")
+
+    def remember_blobs(self, blob_shas: Iterable[str]):
+        """リモートに存在することが分かっているblobを追加し、以後のアップロードを省略します。
+        blobをアップロードしないバックエンドでは何もしません。
+        """
+        pass
+
+    @abstractmethod
+    def create_tree(self, elements: List[github.InputGitTreeElement], base_tree_sha: Optional[str]=None) -> str:
+        """elements を base_tree_sha のツリーに適用した新しいツリーを作成し、そのSHAを返します。
+        sha が None の要素はファイルの削除を表します。
+        """
+        pass
+
+    def create_tree_streaming(self, elements: Iterable[github.InputGitTreeElement], base_tree_sha: Optional[str]=None,
+        batch_size: Optional[int]=None, completed: Sequence[str]=(),
+        on_batch: Optional[Callable[[int, str], None]]=None) -> str:
+        """create_tree(list(elements), base_tree_sha) と同じツリーを、 elements を batch_size 個ずつ取り出して作成します。
+        elements にはジェネレーターを渡せます。各バッチは前のバッチのツリーを base_tree として作成し、作成後は要素を保持しないため、
+        サーバー全体の内容を一度にメモリに載せずに済みます。
+
+        Args:
+            batch_size (Optional[int], optional): 1回の create_tree に渡す要素数。省略した場合は stream_batch_size です。
+            completed (Sequence[str], optional): 中断した前回の呼び出しで on_batch に渡された、完了したバッチのツリーのSHA。
+                同じ elements と batch_size を渡した場合に限り、これらのバッチは要素を読み飛ばすのみで作成しません。
+            on_batch (Optional[Callable[[int, str], None]], optional): バッチのツリーを作成するごとに、
+                バッチの番号とそのツリーのSHAを渡して呼び出す関数。
+        """
+        tree_sha = base_tree_sha
+        created = False
+        for index, batch in enumerate(util.iter_batches(elements, batch_size or self.stream_batch_size)):
+            created = True
+            if index < len(completed):
+                tree_sha = completed[index]
+                continue
+            tree_sha = self.create_tree(batch, tree_sha)
+            if on_batch is not None:
+                on_batch(index, tree_sha)
+        if not created:
+            return self.create_tree([], base_tree_sha)
+        return tree_sha
+
+    @abstractmethod
+    def create_commit(self, message: str, tree_sha: str, parent_shas: List[str]) -> str:
+        """コミットを作成し、そのSHAを返します。
+        """
+        pass
+
+    @abstractmethod
+    def set_head(self, branch_name: str, commit_sha: str):
+        """ブランチの参照を commit_sha に更新します。ブランチが存在しなければ作成します。
+        """
+        pass
+
+class GitHubBackend(StorageBackend):
+    """GitHubのGit Data APIに保存するバックエンド。
+
+    1回のツリー作成リクエストに収まる要素は、ファイルの内容を含めてそのまま送信します。
+    収まらない場合は、リモートに存在しないblobのみを並行してアップロードし、
+    ツリーを max_tree_entries 個ずつ、前のツリーを base_tree として順に作成します。
+    """
+
+    def __init__(self, repository: github.Repository, upload_workers: int=4, max_tree_entries: int=2000,
+        max_tree_bytes: int=2 * 2 ** 20):
+        """
+        Args:
+            repository (github.Repository): 保存先のリポジトリ。
+            upload_workers (int, optional): blobを並行してアップロードするスレッド数。 Defaults to 4.
+                PyGithub の github.Github は既定で書き込みのリクエストの間隔を1秒空けるため、並行して送信するには
+                seconds_between_writes を小さくしたクライアントから取得したリポジトリを渡してください。
+            max_tree_entries (int, optional): 1回のツリー作成リクエストに含める要素数の上限。 Defaults to 2000.
+            max_tree_bytes (int, optional): ファイルの内容を含めてツリーを作成する場合の、リクエスト1回あたりの内容のバイト数の上限。
+                Defaults to 2MiB.
+        """
+        self.repository = repository
+        self.upload_workers = upload_workers
+        self.max_tree_entries = max_tree_entries
+        self.max_tree_bytes = max_tree_bytes
+        # リモートに存在することが分かっているblobのSHA。これらはアップロードを省略します。
+        self._known_blobs: Set[str] = set()
+        # PyGithubのAPIはSHAではなくオブジェクトを受け取るため、取得・作成したツリーとコミットを保持しておきます。
+        self._trees: Dict[str, github.GitTree] = {}
+        self._commits: Dict[str, github.GitCommit] = {}
+        self._refs: Dict[str, Optional[github.GitRef]] = {}
+
+    @property
+    def html_url(self) -> str:
+        return self.repository.html_url
+
+    @property
+    def rate_limit_remaining(self) -> Optional[int]:
+        # PyGithub はレスポンスヘッダーの値を保持しているため、リクエストを行わずに参照できます。
+        requester = getattr(self.repository, "requester", None)
+        if requester is None or requester.rate_limiting[0] < 0:
+            return None
+        return requester.rate_limiting[0]
+
+    def _get_ref(self, branch_name: str) -> Optional[github.GitRef]:
+        """ブランチの参照を返します。リポジトリが空の場合は、Git Data APIを利用できるよう最初のコミットを作成してから参照を返します。
+        """
+        ref_name = "heads/" + branch_name
+        self.request_count += 1
+        try:
+            return self.repository.get_git_ref(ref_name)
+        except github.UnknownObjectException:
+            return None
+        except github.GithubException as e:
+            # 空のリポジトリに対しては 409 Conflict が返されます。
+            if e.status != 409:
+                raise
+        self.request_count += 2
+        self.repository.create_file("README.md", "initial commit", f"# {self.repository.name}\n", branch=branch_name)
+        return self.repository.get_git_ref(ref_name)
+
+    def _get_commit(self, commit_sha: str) -> github.GitCommit:
+        if commit_sha not in self._commits:
+            self.request_count += 1
+            self._commits[commit_sha] = self.repository.get_git_commit(commit_sha)
+        return self._commits[commit_sha]
+
+    def _get_tree(self, tree_sha: str) -> github.GitTree:
+        if tree_sha not in self._trees:
+            self.request_count += 1
+            self._trees[tree_sha] = self.repository.get_git_tree(tree_sha)
+        return self._trees[tree_sha]
+
+    def get_head(self, branch_name: str) -> Optional[str]:
+        ref = self._refs[branch_name] = self._get_ref(branch_name)
+        return ref.object.sha if ref is not None else None
+
+    def get_commit_tree(self, commit_sha: str) -> str:
+        tree = self._get_commit(commit_sha).tree
+        self._trees[tree.sha] = tree
+        return tree.sha
+
+    def get_tree_blobs(self, tree_sha: str) -> Optional[Dict[str, str]]:
+        self.request_count += 1
+        remote_tree = self.repository.get_git_tree(tree_sha, recursive=True)
+        if remote_tree.raw_data.get("truncated"):
+            return None
+        blobs = {
+            element.path: element.sha
+            for element in remote_tree.tree if element.type == "blob"
+        }
+        self._known_blobs.update(blobs.values())
+        return blobs
+
+    def get_blob(self, blob_sha: str) -> bytes:
+        self.request_count += 1
+        blob = self.repository.get_git_blob(blob_sha)
+        if blob.encoding == "base64":
+            return base64.b64decode(blob.content)
+        return blob.content.encode("utf-8")
+
+    def create_tree(self, elements: List[github.InputGitTreeElement], base_tree_sha: Optional[str]=None) -> str:
+        if self._fits_in_one_tree(elements):
+            return self._create_tree_request(elements, base_tree_sha)
+
+        tree_sha = base_tree_sha
+        entries = self.upload_blobs(elements)
+        for start in range(0, len(entries), self.max_tree_entries):
+            tree_sha = self._create_tree_request(entries[start:start + self.max_tree_entries], tree_sha)
+        return tree_sha
+
+    @property
+    def stream_batch_size(self) -> int:
+        # 1回のツリー作成リクエストに収まる数ずつ取り出すため、収まらないバッチのみがblobのアップロードを伴います。
+        return self.max_tree_entries
+
+    def remember_blobs(self, blob_shas: Iterable[str]):
+        self._known_blobs.update(blob_shas)
+
+    def _create_tree_request(self, elements: List[github.InputGitTreeElement], base_tree_sha: Optional[str]) -> str:
+        self.request_count += 1
+        self.bytes_uploaded += sum(util.element_content_size(element) for element in elements)
+        if base_tree_sha is None:
+            tree = self.repository.create_git_tree(elements)
+        else:
+            tree = self.repository.create_git_tree(elements, self._get_tree(base_tree_sha))
+        self._trees[tree.sha] = tree
+        return tree.sha
+
+    def _fits_in_one_tree(self, elements: List[github.InputGitTreeElement]) -> bool:
+        if len(elements) > self.max_tree_entries:
+            return False
+        total = 0
+        for element in elements:
+            total += util.element_content_size(element)
+            if total > self.max_tree_bytes:
+                return False
+        return True
+
+    def upload_blobs(self, elements: List[github.InputGitTreeElement]) -> List[github.InputGitTreeElement]:
+        """内容を持つ要素をblobとしてアップロードし、SHAを参照する要素に置き換えたリストを elements と同じ順番で返します。
+        リモートに存在するblobと、同じ内容の2つ目以降の要素はアップロードしません。
+        """
+        entries = []
+        pending: Dict[str, str] = {}
+        for element in elements:
+            identity = util.tree_element_identity(element)
+            if "content" in identity:
+                blob_sha = util.element_blob_sha(element)
+                if blob_sha not in self._known_blobs:
+                    pending.setdefault(blob_sha, identity["content"])
+                element = github.InputGitTreeElement(identity["path"], identity["mode"], identity["type"], sha=blob_sha)
+            entries.append(element)
+
+        if pending:
+            self.request_count += len(pending)
+            self.bytes_uploaded += sum(len(content.encode("utf-8")) for content in pending.values())
+            uploaded = []
+            try:
+                with ThreadPoolExecutor(max_workers=self.upload_workers) as executor:
+                    # blobのSHAは内容のみで決まるため、ローカルで計算したSHAをそのままツリーの要素に使えます。
+                    for blob in executor.map(lambda content: self.repository.create_git_blob(content, "utf-8"),
+                        pending.values()):
+                        self._known_blobs.add(blob.sha)
+                        uploaded.append(blob.sha)
+            finally:
+                # 途中で失敗した場合も、アップロードできたblobは再試行で省略できるよう報告します。
+                if uploaded and self.upload_hook is not None:
+                    self.upload_hook(uploaded)
+        return entries
+
+    def create_commit(self, message: str, tree_sha: str, parent_shas: List[str]) -> str:
+        parents = [self._get_commit(sha) for sha in parent_shas]
+        self.request_count += 1
+        commit = self.repository.create_git_commit(message, self._get_tree(tree_sha), parents)
+        self._commits[commit.sha] = commit
+        return commit.sha
+
+    def set_head(self, branch_name: str, commit_sha: str):
+        if branch_name not in self._refs:
+            self._refs[branch_name] = self._get_ref(branch_name)
+        ref = self._refs[branch_name]
+        self.request_count += 1
+        if ref is None:
+            self._refs[branch_name] = self.repository.create_git_ref("refs/heads/" + branch_name, commit_sha)
+        else:
+            ref.edit(commit_sha, force=True)
+
+class _TreeNode:
+    """LocalGitBackend がツリーを組み立てる際の、1つのディレクトリを表すノード。
+    変更されたディレクトリのみを読み込み、変更のないサブツリーはSHAのまま保持します。
+    """
+
+    def __init__(self, entries: Dict[str, Tuple[str, str]]):
+        self.entries = entries
+        self.children: Dict[str, "_TreeNode"] = {}
+
+class LocalGitBackend(StorageBackend):
+    """ネットワークを使わずに、ローカルのベアリポジトリへGitのオブジェクトを直接書き込むバックエンド。
+    高頻度の記録をローカルに保存し、git push で GitHub に反映するといった使い方ができます。
+    """
+
+    def __init__(self, path: str, html_url: str=None, author_name="dpy_github", author_email="dpy_github@localhost"):
+        """
+        Args:
+            path (str): ベアリポジトリのディレクトリ。存在しなければ作成します。
+            html_url (str, optional): 目次のリンクに利用するURL。省略した場合は path のファイルURLを利用します。
+            author_name (str, optional): コミットの作成者名。 Defaults to "dpy_github".
+            author_email (str, optional): コミットの作成者のメールアドレス。 Defaults to "dpy_github@localhost".
+        """
+        self.path = pathlib.Path(path).resolve()
+        self._html_url = html_url if html_url is not None else self.path.as_uri()
+        self.author_name = author_name
+        self.author_email = author_email
+        self._init_repository()
+
+    @property
+    def html_url(self) -> str:
+        return self._html_url
+
+    def _init_repository(self):
+        (self.path / "objects").mkdir(parents=True, exist_ok=True)
+        (self.path / "refs" / "heads").mkdir(parents=True, exist_ok=True)
+        (self.path / "refs" / "tags").mkdir(parents=True, exist_ok=True)
+        if not (self.path / "HEAD").exists():
+            (self.path / "HEAD").write_text("ref: refs/heads/main\n")
+        if not (self.path / "config").exists():
+            (self.path / "config").write_text("[core]\n\trepositoryformatversion = 0\n\tbare = true\n")
+
+    def _atomic_write(self, path: pathlib.Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=str(path.parent))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, str(path))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def write_object(self, object_type: str, body: bytes) -> str:
+        """ルーズオブジェクトとして書き込み、そのSHAを返します。既に存在する場合は書き込みません。
+        """
+        header = f"{object_type} {len(body)}\0".encode("ascii")
+        sha = hashlib.sha1(header)
+        sha.update(body)
+        object_sha = sha.hexdigest()
+        object_path = self.path / "objects" / object_sha[:2] / object_sha[2:]
+        if not object_path.exists():
+            self._atomic_write(object_path, zlib.compress(header + body))
+            if object_type == "blob":
+                self.bytes_uploaded += len(body)
+        return object_sha
+
+    def read_object(self, object_sha: str) -> Tuple[str, bytes]:
+        """オブジェクトの種類と内容を返します。git gc 等でパックされたオブジェクトは git コマンドで読み込みます。
+        """
+        object_path = self.path / "objects" / object_sha[:2] / object_sha[2:]
+        if object_path.exists():
+            data = zlib.decompress(object_path.read_bytes())
+            header, _, body = data.partition(b"\0")
+            return header.split(b" ")[0].decode("ascii"), body
+        git_dir = f"--git-dir={self.path}"
+        object_type = subprocess.run(["git", git_dir, "cat-file", "-t", object_sha],
+            check=True, stdout=subprocess.PIPE).stdout.decode("ascii").strip()
+        body = subprocess.run(["git", git_dir, "cat-file", object_type, object_sha],
+            check=True, stdout=subprocess.PIPE).stdout
+        return object_type, body
+
+    def _read_tree(self, tree_sha: str) -> Dict[str, Tuple[str, str]]:
+        _, body = self.read_object(tree_sha)
+        entries = {}
+        position = 0
+        while position < len(body):
+            space = body.index(b" ", position)
+            null = body.index(b"\0", space)
+            mode = body[position:space].decode("ascii")
+            name = body[space + 1:null].decode("utf-8")
+            entries[name] = (mode, body[null + 1:null + 21].hex())
+            position = null + 21
+        return entries
+
+    def _write_tree(self, entries: Dict[str, Tuple[str, str]]) -> str:
+        # Gitはディレクトリ名の末尾に "/" があるものとして並べ替えます。
+        def sort_key(name):
+            return name + "/" if entries[name][0] == "40000" else name
+
+        body = b"".join(
+            f"{entries[name][0]} {name}\0".encode("utf-8") + bytes.fromhex(entries[name][1])
+            for name in sorted(entries, key=sort_key)
+        )
+        return self.write_object("tree", body)
+
+    def _ref_path(self, branch_name: str) -> pathlib.Path:
+        return self.path / "refs" / "heads" / branch_name
+
+    def get_head(self, branch_name: str) -> Optional[str]:
+        ref_path = self._ref_path(branch_name)
+        if ref_path.exists():
+            return ref_path.read_text().strip()
+        packed_refs = self.path / "packed-refs"
+        if packed_refs.exists():
+            for line in packed_refs.read_text().splitlines():
+                if line.endswith(" refs/heads/" + branch_name):
+                    return line.split(" ")[0]
+        return None
+
+    def get_commit_tree(self, commit_sha: str) -> str:
+        _, body = self.read_object(commit_sha)
+        first_line = body.split(b"\n", 1)[0].decode("ascii")
+        return first_line[len("tree "):]
+
+    def get_tree_blobs(self, tree_sha: str) -> Optional[Dict[str, str]]:
+        blobs = {}
+        pending = [("", tree_sha)]
+        while pending:
+            prefix, sha = pending.pop()
+            for name, (mode, entry_sha) in self._read_tree(sha).items():
+                if mode == "40000":
+                    pending.append((prefix + name + "/", entry_sha))
+                else:
+                    blobs[prefix + name] = entry_sha
+        return blobs
+
+    def get_blob(self, blob_sha: str) -> bytes:
+        return self.read_object(blob_sha)[1]
+
+    def create_tree(self, elements: List[github.InputGitTreeElement], base_tree_sha: Optional[str]=None) -> str:
+        root = _TreeNode(self._read_tree(base_tree_sha) if base_tree_sha is not None else {})
+
+        def get_node(directories: List[str]) -> _TreeNode:
+            node = root
+            for name in directories:
+                if name not in node.children:
+                    entry = node.entries.get(name)
+                    node.children[name] = _TreeNode(
+                        self._read_tree(entry[1]) if entry is not None and entry[0] == "40000" else {}
+                    )
+                node = node.children[name]
+            return node
+
+        for element in elements:
+            identity = util.tree_element_identity(element)
+            *directories, name = identity["path"].split("/")
+            node = get_node(directories)
+            if "content" in identity:
+                content = getattr(element, "content_bytes", None)
+                if content is None:
+                    content = identity["content"].encode("utf-8")
+                node.entries[name] = (identity["mode"].lstrip("0"), self.write_object("blob", content))
+            elif identity.get("sha") is None:
+                node.entries.pop(name, None)
+            else:
+                node.entries[name] = (identity["mode"].lstrip("0"), identity["sha"])
+
+        def write_node(node: _TreeNode) -> Optional[str]:
+            for name, child in node.children.items():
+                child_sha = write_node(child)
+                if child_sha is None:
+                    node.entries.pop(name, None)
+                else:
+                    node.entries[name] = ("40000", child_sha)
+            if not node.entries:
+                return None
+            return self._write_tree(node.entries)
+
+        tree_sha = write_node(root)
+        return tree_sha if tree_sha is not None else self._write_tree({})
+
+    @property
+    def stream_batch_size(self) -> int:
+        return 0
+
+    def create_tree_streaming(self, elements: Iterable[github.InputGitTreeElement], base_tree_sha: Optional[str]=None,
+        batch_size: Optional[int]=None, completed: Sequence[str]=(),
+        on_batch: Optional[Callable[[int, str], None]]=None) -> str:
+        # create_tree は要素を1つずつblobとして書き込み、SHAのみを保持するため、分割せずに全体を1つのバッチとして渡します。
+        if completed:
+            return completed[0]
+        tree_sha = self.create_tree(elements, base_tree_sha)
+        if on_batch is not None:
+            on_batch(0, tree_sha)
+        return tree_sha
+
+    def create_commit(self, message: str, tree_sha: str, parent_shas: List[str]) -> str:
+        signature = f"{self.author_name} <{self.author_email}> {int(time.time())} +0000"
+        lines = [f"tree {tree_sha}"]
+        lines.extend(f"parent {sha}" for sha in parent_shas)
+        lines.append(f"author {signature}")
+        lines.append(f"committer {signature}")
+        body = "\n".join(lines) + "\n\n" + message + "\n"
+        return self.write_object("commit", body.encode("utf-8"))
+
+    def set_head(self, branch_name: str, commit_sha: str):
+        self._atomic_write(self._ref_path(branch_name), (commit_sha + "\n").encode("ascii"))
@@ -1,4 +1,7 @@
-from typing import List, Tuple, Optional
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Tuple, Optional, TypeVar, Union
+from collections import OrderedDict
+import hashlib
+import itertools
 import json
 from string import Template
 
@@ -27,3 +30,119 @@ def sort_category_position(by_category:List[Tuple[Optional[discord.CategoryChann
 
     # トップレベルのチャンネルをソート
     return sorted(categories_sorted_children, key=sort_channel_key)
+
+def git_blob_sha(content: Union[str, bytes]) -> str:
+    """
+    ファイルの内容から、Gitがblobオブジェクトに付与するSHA-1を計算します。
+    GitHub上のGitTreeの各要素が持つshaと比較することで、アップロードせずに変更の有無を判定できます。
+
+    Args:
+        content (Union[str, bytes]): ファイルの内容。strの場合はUTF-8でエンコードされます。
+
+    Returns:
+        str: 40文字の16進数で表されたSHA-1。
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    sha = hashlib.sha1(f"blob {len(content)}\0".encode("ascii"))
+    sha.update(content)
+    return sha.hexdigest()
+
+def tree_element_identity(element: github.InputGitTreeElement) -> dict:
+    """
+    InputGitTreeElement が GitHub API に送信される際の辞書表現（path, mode, type, content または sha）を返します。
+    """
+    return element._identity
+
+def element_blob_sha(element: github.InputGitTreeElement) -> Optional[str]:
+    """
+    要素が表すファイルのblobのSHAを返します。計算済みのSHAを保持している要素ではそれを再利用します。
+    削除を表す要素ではNoneを返します。
+    """
+    blob_sha = getattr(element, "blob_sha", None)
+    if blob_sha is not None:
+        return blob_sha
+    identity = tree_element_identity(element)
+    if "sha" in identity:
+        return identity["sha"]
+    return git_blob_sha(identity["content"])
+
+def element_content_size(element: github.InputGitTreeElement) -> int:
+    """
+    要素がツリーの作成時に送信するファイルの内容のUTF-8でのバイト数を返します。SHAのみを参照する要素では0を返します。
+    """
+    content_bytes = getattr(element, "content_bytes", None)
+    if content_bytes is not None:
+        return len(content_bytes)
+    return len(tree_element_identity(element).get("content", "").encode("utf-8"))
+
+T = TypeVar("T")
+
+def iter_batches(iterable: Iterable[T], batch_size: int) -> Iterator[List[T]]:
+    """
+    iterable の要素を batch_size 個ずつのリストにして返します。最後のリストは batch_size 個未満の場合があります。
+    次のリストを作成する前に前のリストへの参照を手放せば、保持する要素は batch_size 個までになります。
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+class LRUCache:
+    """
+    保持する件数が maxsize を超えるか、重みの合計が max_weight を超えると、最も長く利用されていない項目から削除する辞書。
+    """
+
+    def __init__(self, maxsize: int=1024, max_weight: Optional[int]=None):
+        self.maxsize = maxsize
+        self.max_weight = max_weight
+        self.total_weight = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._weights: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default: Any=None) -> Any:
+        try:
+            value = self._data[key]
+        except KeyError:
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, weight: int=1):
+        """
+        Args:
+            weight (int, optional): max_weight と比較する項目の重み（バイト数等）。 Defaults to 1.
+        """
+        self.total_weight += weight - self._weights.get(key, 0)
+        self._weights[key] = weight
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize or (
+            self.max_weight is not None and self.total_weight > self.max_weight and len(self._data) > 1
+        ):
+            old_key, _ = self._data.popitem(last=False)
+            self.total_weight -= self._weights.pop(old_key)
+
+    def pop(self, key: Hashable, default: Any=None) -> Any:
+        if key not in self._data:
+            return default
+        self.total_weight -= self._weights.pop(key)
+        return self._data.pop(key)
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """最も長く利用されていない項目から順に、キーと値の組を返します。
+        """
+        return list(self._data.items())
+
+    def clear(self):
+        self._data.clear()
+        self._weights.clear()
+        self.total_weight = 0
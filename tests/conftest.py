@@ -0,0 +1,28 @@
+import pathlib
+import sys
+
+import pytest
+
+# benchmarks の偽の GitHub と合成サーバーを利用するため、リポジトリのルートから読み込みます。
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from benchmarks import synthetic
+from benchmarks.fake_github import FakeRepository
+from dpy_github import storage
+from dpy_github.main import Reporter
+
+@pytest.fixture
+def guild():
+    return synthetic.create_guild(members=200, channels=40, roles=15, seed=1)
+
+@pytest.fixture
+def repository():
+    return FakeRepository("tests")
+
+def make_reporter(guild, backend, **options) -> Reporter:
+    if isinstance(backend, FakeRepository):
+        backend = storage.GitHubBackend(backend)
+    return Reporter(guild, None, None, backend=backend, **options)
+
+def head_tree(repository: FakeRepository, branch="main") -> str:
+    return repository.commits[repository.refs["heads/" + branch]].tree.sha
@@ -0,0 +1,112 @@
+import time
+
+import github
+import pytest
+
+from benchmarks.fake_github import FakeRepository
+from dpy_github import checkpoint, storage
+from dpy_github.checkpoint import Checkpoint
+
+from conftest import head_tree, make_reporter
+
+class FlakyRepository(FakeRepository):
+    """指定した回数目のツリー作成と、指定した回数のコミット作成に失敗する FakeRepository。
+    """
+
+    def __init__(self, name: str, fail_tree_at=None, fail_commits=0):
+        super().__init__(name)
+        self.fail_tree_at = fail_tree_at
+        self.fail_commits = fail_commits
+        self.created_trees = 0
+
+    def create_git_tree(self, tree, base_tree=None):
+        self.created_trees += 1
+        if self.created_trees == self.fail_tree_at:
+            raise github.GithubException(502, {"message": "Bad Gateway"}, None)
+        return super().create_git_tree(tree, base_tree)
+
+    def create_git_commit(self, message, tree, parents):
+        if self.fail_commits:
+            self.fail_commits -= 1
+            raise ConnectionError("connection reset")
+        return super().create_git_commit(message, tree, parents)
+
+def make_backend(repository: FakeRepository) -> storage.GitHubBackend:
+    # 複数のバッチに分かれるよう、1回のツリー作成の要素数を小さくします。
+    return storage.GitHubBackend(repository, max_tree_entries=50)
+
+@pytest.fixture
+def reference(guild):
+    reference = FakeRepository("tests")
+    make_reporter(guild, make_backend(reference)).push("first")
+    return reference
+
+def test_resume_after_tree_failure(guild, reference, tmp_path):
+    path = str(tmp_path / "checkpoint.db")
+    repository = FlakyRepository("tests", fail_tree_at=3)
+    with Checkpoint(path) as saved:
+        with pytest.raises(github.GithubException):
+            make_reporter(guild, make_backend(repository), checkpoint=saved).push("first")
+        assert len(saved.get(repository.html_url, "main").batch_trees) == 2
+
+    # 中断後に変わったサーバーの状態ではなく、保存した状態を記録します。
+    guild.members[0].nick = "changed after the failure"
+    repository.reset_counters()
+    with Checkpoint(path) as saved:
+        reporter = make_reporter(guild, make_backend(repository), checkpoint=saved)
+        reporter.push("first")
+        assert saved.get(repository.html_url, "main") is None
+
+    assert reporter.last_metrics.counters["resumed"] == 1
+    assert head_tree(repository) == head_tree(reference)
+    assert repository.requests["POST git/trees"] < reference.requests["POST git/trees"]
+
+def test_retry_reuses_created_tree(guild, reference):
+    repository = FlakyRepository("tests", fail_commits=1)
+    reporter = make_reporter(guild, make_backend(repository), checkpoint=Checkpoint(":memory:"))
+    with pytest.raises(ConnectionError):
+        reporter.push("first")
+    created_trees = repository.created_trees
+
+    reporter.push_with_retry("first", base_delay=0)
+    assert repository.created_trees == created_trees
+    assert head_tree(repository) == head_tree(reference)
+
+def test_finish_keeps_other_branches_blobs():
+    saved = Checkpoint(":memory:")
+    saved.add_blobs("repository", "main", ["a", "b"])
+    saved.add_blobs("repository", "backup", ["c"])
+    job = saved.begin("repository", "main", None, None, 50)
+    job.finish()
+
+    assert saved.blobs("repository", "main") == set()
+    assert saved.blobs("repository", "backup") == {"c"}
+
+def test_retry_waits_for_rate_limit_reset(monkeypatch):
+    delays = []
+    monkeypatch.setattr(checkpoint.time, "sleep", delays.append)
+    error = github.RateLimitExceededException(
+        403, {"message": "API rate limit exceeded"}, {"X-RateLimit-Reset": str(int(time.time()) + 600)}
+    )
+    results = iter([error, error, "done"])
+
+    def func():
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    assert checkpoint.retry(func, max_delay=1.0) == "done"
+    assert len(delays) == 2 and all(delay > 590 for delay in delays)
+
+def test_retry_raises_permanent_errors(monkeypatch):
+    monkeypatch.setattr(checkpoint.time, "sleep", lambda delay: None)
+    calls = []
+
+    def func():
+        calls.append(None)
+        raise github.GithubException(404, {"message": "Not Found"}, None)
+
+    with pytest.raises(github.GithubException):
+        checkpoint.retry(func)
+    assert len(calls) == 1
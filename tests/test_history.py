@@ -0,0 +1,43 @@
+import datetime
+
+from dpy_github.history import History
+from dpy_github.snapshot import GuildSnapshot
+
+def capture(guild, captured_at: datetime.datetime) -> GuildSnapshot:
+    guild_snapshot = GuildSnapshot.capture(guild)
+    guild_snapshot.captured_at = captured_at
+    return guild_snapshot
+
+def test_history_of_object_and_field(guild):
+    history = History(":memory:")
+    first = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    history.record("c1", capture(guild, first))
+    member = guild.members[0]
+    recorded_nick = member.nick
+    member.nick = "changed"
+    history.record("c2", capture(guild, first + datetime.timedelta(days=1)))
+
+    entries = history.history(member.id)
+    assert [(entry.commit_sha, entry.action, entry.field) for entry in entries] == [
+        ("c1", "added", None), ("c2", "modified", "nick")
+    ]
+    assert (entries[1].old, entries[1].new) == (recorded_nick, "changed")
+    assert [entry.action for entry in history.history(member.id, "name")] == ["added"]
+
+def test_changes_between_and_last_snapshot(guild):
+    history = History(":memory:")
+    first = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    history.record("c1", capture(guild, first))
+    guild.members[0].nick = "changed"
+    guild.members[1].nick = "changed"
+    second = capture(guild, first + datetime.timedelta(days=1))
+    history.record("c2", second)
+
+    changes = history.changes_between(first + datetime.timedelta(hours=1), first + datetime.timedelta(days=2))
+    assert {(entry.commit_sha, entry.kind, entry.object_id) for entry in changes} == {
+        ("c2", "member", guild.members[0].id), ("c2", "member", guild.members[1].id)
+    }
+    roles = history.changes_between(first, first + datetime.timedelta(hours=1), guild_id=guild.id, kind="role")
+    assert len(roles) == len(guild.roles) and {entry.action for entry in roles} == {"added"}
+    assert history.last_snapshot(guild.id).members == second.members
+    assert history.last_snapshot(0) is None
@@ -0,0 +1,25 @@
+from dpy_github.manifest import Manifest
+
+def test_update_applies_changes_on_matching_parent():
+    manifest = Manifest(":memory:")
+    manifest.save("repository", "main", "c1", "t1", {"a.json": "1", "b.json": "2"})
+
+    assert manifest.update("repository", "main", "c1", "c2", "t2", {"a.json": "3", "b.json": None, "c.json": "4"})
+    entry = manifest.get("repository", "main", "c2")
+    assert (entry.tree_sha, entry.blobs) == ("t2", {"a.json": "3", "c.json": "4"})
+
+def test_update_discards_on_other_parent():
+    manifest = Manifest(":memory:")
+    manifest.save("repository", "main", "c1", "t1", {"a.json": "1"})
+    manifest.save("repository", "backup", "c1", "t1", {"a.json": "1"})
+
+    assert not manifest.update("repository", "main", "other", "c2", "t2", {"a.json": "3"})
+    assert manifest.head("repository", "main") is None
+    assert manifest.head("repository", "backup") == ("c1", "t1")
+
+def test_get_checks_commit():
+    manifest = Manifest(":memory:")
+    manifest.save("repository", "main", "c1", "t1", {"a.json": "1"})
+
+    assert manifest.get("repository", "main", "c0") is None
+    assert manifest.get("repository", "main").commit_sha == "c1"
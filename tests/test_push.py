@@ -0,0 +1,77 @@
+from benchmarks.fake_github import FakeRepository
+from dpy_github import util
+from dpy_github.history import History
+from dpy_github.manifest import Manifest
+
+from conftest import head_tree, make_reporter
+
+def test_push_writes_every_file(guild, repository):
+    reporter = make_reporter(guild, repository)
+    reporter.push("first")
+
+    paths = {util.tree_element_identity(element)["path"] for element in reporter.create_tree_elements()}
+    assert set(repository.trees[head_tree(repository)].blobs) == paths
+    assert reporter.last_metrics.counters["files_total"] == len(paths)
+
+def test_incremental_push_matches_full_push(guild, repository):
+    make_reporter(guild, repository, incremental=True).push("first")
+    for member in guild.members[:5]:
+        member.nick = "changed"
+    repository.reset_counters()
+    reporter = make_reporter(guild, repository, incremental=True)
+    reporter.push("second")
+
+    # 同じ名前のリポジトリに全体を記録したツリーと一致します。
+    reference = FakeRepository(repository.name)
+    make_reporter(guild, reference).push("full")
+    assert head_tree(repository) == head_tree(reference)
+    assert reporter.last_metrics.counters["files_changed"] == 5
+    assert repository.requests["POST git/commits"] == 1
+
+def test_push_without_changes_creates_no_commit(guild, repository):
+    make_reporter(guild, repository, incremental=True).push("first")
+    head = repository.refs["heads/main"]
+    reporter = make_reporter(guild, repository, incremental=True)
+    reporter.push("second")
+
+    assert repository.refs["heads/main"] == head
+    assert reporter.last_metrics.counters["skipped"] == 1
+
+def test_manifest_avoids_reading_the_tree(guild, repository):
+    manifest = Manifest(":memory:")
+    make_reporter(guild, repository, incremental=True, manifest=manifest).push("first")
+    guild.members[0].nick = "changed"
+    repository.reset_counters()
+    make_reporter(guild, repository, incremental=True, manifest=manifest).push("second")
+
+    # 再帰的な取得は行わず、 base_tree に渡すツリーのみを取得します。
+    assert repository.requests["GET git/trees"] == 1
+    assert manifest.head(repository.html_url, "main") == (repository.refs["heads/main"], head_tree(repository))
+
+def test_skip_unchanged_uses_history_after_restart(guild, repository):
+    history = History(":memory:")
+    make_reporter(guild, repository, history=history).push("first")
+    repository.reset_counters()
+    reporter = make_reporter(guild, repository, history=history)
+
+    assert not reporter.diff()
+    reporter.push("second", skip_unchanged=True)
+    assert repository.request_count == 0
+    assert reporter.last_metrics.counters["skipped"] == 1
+
+def test_push_elements_records_only_touched_objects(guild, repository):
+    history = History(":memory:")
+    reporter = make_reporter(guild, repository, history=history)
+    reporter.push("first")
+    touched, untouched = guild.members[0], guild.members[1]
+    touched.nick, untouched.nick = "touched", "untouched"
+
+    elements = reporter.create_partial_tree_elements(members=[touched])
+    reporter.push_elements(elements, "partial", object_ids={touched.id})
+    partial_sha = repository.refs["heads/main"]
+    assert [entry.commit_sha for entry in history.history(touched.id, "nick")][-1] == partial_sha
+    assert len(history.history(untouched.id, "nick")) == 1
+
+    reporter.push("full")
+    entry = history.history(untouched.id, "nick")[-1]
+    assert (entry.commit_sha, entry.new) == (repository.refs["heads/main"], "untouched")
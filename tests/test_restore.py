@@ -0,0 +1,28 @@
+import discord
+
+from dpy_github import storage
+
+from conftest import make_reporter
+
+def test_plan_restore_reverts_changed_fields(guild, tmp_path):
+    backend = storage.LocalGitBackend(str(tmp_path / "repository.git"))
+    reporter = make_reporter(guild, backend)
+    reporter.push("first")
+    head = backend.get_head("main")
+    assert not reporter.plan_restore(head)
+
+    role = [role for role in guild.roles if not role.is_default()][2]
+    channel = [channel for channel in guild.channels if isinstance(channel, discord.TextChannel)][1]
+    member = guild.members[3]
+    recorded = (role.name, channel.topic, member.nick)
+    role.name, channel.topic, member.nick = "renamed", "changed", "changed"
+
+    plan = reporter.plan_restore(head)
+    edits = {(operation.kind, operation.target_id): operation.fields for operation in plan}
+    assert edits == {
+        ("role", role.id): {"name": recorded[0]},
+        ("channel", channel.id): {"topic": recorded[1]},
+        ("member", member.id): {"nick": recorded[2]},
+    }
+    assert [operation.stage for operation in plan.operations] == sorted(operation.stage for operation in plan.operations)
+    assert plan.commit_sha == head
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from dpy_github import util
+from dpy_github.serializer import IndentedJSONEncoder
+
+from conftest import make_reporter
+
+def dumps(value) -> str:
+    return json.dumps(value, sort_keys=True, indent=4, ensure_ascii=False)
+
+@pytest.mark.parametrize("value", [
+    {},
+    [],
+    {"a": {}, "b": [], "c": [{}], "d": [[]]},
+    {"名前": "チャンネル", "topic": "改行\nタブ\t引用符\"バックスラッシュ\\", "nsfw": False, "slowmode": None},
+    {"control": "\x00\x1f\x7f ", "emoji": "😀", "surrogate": "\ud800"},
+    {"int": 0, "negative": -1, "large": 2 ** 70, "float": 1.5, "exponent": 1e-07, "true": True},
+    {"b": 1, "a": 2, "B": 3, "_": 4, "10": 5, "9": 6},
+    [1, "2", [3, [4, {"5": [6]}]], None],
+    "string",
+    42,
+])
+def test_encode_matches_json_dumps(value):
+    assert IndentedJSONEncoder().encode(value) == dumps(value)
+
+def test_key_order_cache_keeps_values_separate():
+    encoder = IndentedJSONEncoder(key_order_cache_size=1)
+    for value in ({"y": 1, "x": 2}, {"x": "a", "y": "b"}, {"z": 0}, {"y": [], "x": {}}):
+        assert encoder.encode(value) == dumps(value)
+
+def test_formatted_files_match_json_dumps(guild, repository):
+    reporter = make_reporter(guild, repository)
+    identities = [util.tree_element_identity(element) for element in reporter.create_tree_elements()]
+    contents = [identity["content"] for identity in identities if identity["path"].endswith(".json")]
+    assert contents
+    for content in contents:
+        assert content == dumps(json.loads(content))
@@ -0,0 +1,44 @@
+import shutil
+import subprocess
+
+import pytest
+
+from dpy_github import storage, util
+
+from conftest import make_reporter
+
+def git(path, *args) -> str:
+    return subprocess.run(["git", "--git-dir", str(path), *args], check=True, capture_output=True, text=True).stdout
+
+def test_local_backend_round_trip(guild, tmp_path):
+    backend = storage.LocalGitBackend(str(tmp_path / "repository.git"))
+    reporter = make_reporter(guild, backend, incremental=True)
+    reporter.push("first")
+    first = backend.get_head("main")
+    guild.members[0].nick = "changed"
+    reporter.push("second")
+    second = backend.get_head("main")
+
+    blobs = backend.get_tree_blobs(backend.get_commit_tree(second))
+    identities = {
+        identity["path"]: identity["content"]
+        for identity in map(util.tree_element_identity, reporter.create_tree_elements())
+    }
+    assert set(blobs) == set(identities)
+    for path, content in identities.items():
+        assert backend.get_blob(blobs[path]) == content.encode("utf-8")
+    assert first != second
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git がインストールされていません。")
+def test_local_backend_writes_valid_repository(guild, tmp_path):
+    path = tmp_path / "repository.git"
+    backend = storage.LocalGitBackend(str(path))
+    reporter = make_reporter(guild, backend)
+    reporter.push("first")
+    guild.members[0].nick = "changed"
+    reporter.push("second")
+
+    git(path, "fsck", "--strict")
+    assert git(path, "log", "--format=%s", "main").split() == ["second", "first"]
+    member_path = reporter.element_creator.member_path(guild.members[0])
+    assert '"changed"' in git(path, "show", f"main:{member_path}")